@@ -0,0 +1,86 @@
+"""
+Check and time the archive fetch path against a fake repository tarball.
+
+Runs fully offline. Before timing, it checks that the tarball's top-level
+directory is stripped, that the extension and `include_paths` filters hold,
+and that a failing archive download falls back to the contents API.
+
+Usage: python -m benchmarks.bench_archive_fetch [n_files]
+"""
+
+import io
+import sys
+import time
+
+from benchmarks.fixtures import (
+    FakeGithubRepo,
+    make_fake_repo_archive,
+    make_fake_repo_files,
+)
+from chat.archive import iter_archive_files
+from chat.agent import GitHubRepoAssistant
+from core.config import settings
+
+
+def code_paths(files):
+    return sorted(p for p in files if p.endswith((".py", ".ts", ".js", ".go")))
+
+
+def check_archive_filters(files, archive: bytes):
+    fetched = list(
+        iter_archive_files(
+            io.BytesIO(archive),
+            settings.file_extenions,
+            blob_url_prefix="https://github.com/owner/repo/blob/0000000",
+        )
+    )
+    # Paths come back without the "<owner>-<repo>-<sha>/" prefix
+    assert sorted(f["path"] for f in fetched) == code_paths(files)
+    assert all(f["content"] == files[f["path"]] for f in fetched)
+    assert fetched[0]["url"].startswith("https://github.com/owner/repo/blob/0000000/src/")
+
+    wanted = set(code_paths(files)[:3]) | {"README.md"}
+    only = list(
+        iter_archive_files(
+            io.BytesIO(archive), settings.file_extenions, include_paths=wanted
+        )
+    )
+    # README.md is requested but still filtered out by extension
+    assert sorted(f["path"] for f in only) == code_paths(files)[:3]
+
+
+def check_contents_fallback(files):
+    repo = FakeGithubRepo(files, archive_error=RuntimeError("archive unavailable"))
+    assistant = GitHubRepoAssistant.__new__(GitHubRepoAssistant)
+    assistant.get_github_repo = lambda repo_url: repo
+
+    fetched = list(
+        assistant.iter_repo_files("https://github.com/owner/repo", fetch_mode="archive")
+    )
+    assert sorted(f["path"] for f in fetched) == code_paths(files)
+    assert repo.contents_calls > 0
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    files = make_fake_repo_files(n_files=n_files)
+    archive = make_fake_repo_archive(files)
+
+    check_archive_filters(files, archive)
+    check_contents_fallback(make_fake_repo_files(n_files=40, n_dirs=4))
+    print("checks: prefix stripping, filters and contents fallback OK")
+
+    start = time.perf_counter()
+    fetched = list(
+        iter_archive_files(io.BytesIO(archive), settings.file_extenions)
+    )
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"archive: {len(fetched)} files, {len(archive) / 1024:.0f} KiB, "
+        f"{elapsed * 1000:.1f} ms ({len(fetched) / elapsed:.0f} files/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Latency of cheap endpoints (/jobs, /get-all-repos) while chats are in flight.
+
+The agent's LLM call is replaced by a sleep, so this measures only how the
+API schedules work. For comparison the same load is sent to a route that
+calls the agent directly inside `async def`, as /chat used to.
+
+Usage: python -m benchmarks.bench_chat_load [concurrent_chats] [llm_seconds]
+Needs the API's environment (GROQ_API_KEY etc.) to import the app.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+import main
+from routes import chat as chat_routes
+
+
+def install_fakes(llm_seconds: float):
+    agent = chat_routes.github_agent
+
+    def slow_query(repo_id: int, question: str) -> str:
+        time.sleep(llm_seconds)
+        return f"answer to {question}"
+
+    agent.query_repository = slow_query
+    agent.repo_manager.get_repository = lambda repo_id: ("url", "collection")
+    chat_routes.chat_history_manager.add_chat_message = lambda **kwargs: None
+
+    # The pre-threadpool behaviour, kept for comparison
+    @main.app.post("/legacy-chat/{repo_id}")
+    async def legacy_chat(repo_id: int, req: chat_routes.ChatRequest):
+        return {"response": agent.query_repository(repo_id, req.message)}
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        for path in ("/api/jobs?limit=1", "/api/get-all-repos"):
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def run_scenario(chat_path: str, concurrent_chats: int, duration: float):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        samples = []
+        stop = asyncio.Event()
+        probes = [asyncio.create_task(probe(client, stop, samples)) for _ in range(4)]
+
+        async def chat_loop():
+            while not stop.is_set():
+                await client.post(chat_path, json={"message": "what does it do"})
+                # In-process transport never waits on a socket; let others run
+                await asyncio.sleep(0)
+
+        chats = [
+            asyncio.create_task(chat_loop())
+            for _ in range(concurrent_chats if chat_path else 0)
+        ]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*probes, *chats)
+        return samples
+
+
+def report(name: str, samples):
+    print(
+        f"{name:<28} n={len(samples):5d}  "
+        f"p50={statistics.median(samples):8.2f} ms  "
+        f"p99={percentile(samples, 99):8.2f} ms"
+    )
+
+
+def main_bench():
+    concurrent_chats = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    llm_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    duration = max(5.0, llm_seconds * 4)
+    install_fakes(llm_seconds)
+
+    report("idle", asyncio.run(run_scenario("", 0, duration)))
+    report(
+        f"{concurrent_chats} chats (threadpool)",
+        asyncio.run(run_scenario("/api/chat/1", concurrent_chats, duration)),
+    )
+    report(
+        f"{concurrent_chats} chats (blocking)",
+        asyncio.run(run_scenario("/legacy-chat/1", concurrent_chats, duration)),
+    )
+
+
+if __name__ == "__main__":
+    main_bench()
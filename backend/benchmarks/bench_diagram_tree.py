@@ -0,0 +1,40 @@
+"""
+Time the local Mermaid tree builder on repositories of growing size, with
+several chunks per file as stored in the vector metadata.
+
+Usage: python -m benchmarks.bench_diagram_tree [max_files]
+"""
+
+import sys
+import time
+
+from diagram.tree import MermaidTreeBuilder, extract_mermaid
+
+
+def make_paths(n_files: int, chunks_per_file: int = 3):
+    paths = []
+    for f in range(n_files):
+        depth = 1 + f % 6
+        directory = "/".join(f"pkg{(f >> d) % 9}" for d in range(depth))
+        paths.extend([f"{directory}/module_{f}.py"] * chunks_per_file)
+    return paths
+
+
+def main():
+    max_files = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    builder = MermaidTreeBuilder()
+    for n_files in sorted({min(500, max_files), min(5000, max_files), max_files}):
+        paths = make_paths(n_files)
+        builder.build("bench", paths)
+        start = time.perf_counter()
+        graph = builder.build("bench", paths)
+        elapsed = (time.perf_counter() - start) * 1000
+        valid = extract_mermaid(graph) is not None
+        print(
+            f"{n_files:>7} files  {elapsed:8.1f} ms  "
+            f"{graph.count(chr(10)) - 1:4d} lines  valid={valid}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+End-to-end ingestion and API benchmark, fully offline.
+
+A synthetic repository is served by a local fake GitHub API and every LLM
+call goes to a local fake chat-completion server that answers after
+`llm_seconds`. The run measures:
+
+- `process_repository` throughput (files/sec) and time per stage
+- peak RSS of the process before and after ingestion
+- /chat latency percentiles under `chat_concurrency` concurrent requests
+- /diagram and /podcast latency, first (generating) and cached
+
+Results are written as JSON to `output`. With a `baseline` file from an
+earlier run, metrics that got more than 20% worse are listed and the exit
+status is 1, so two versions can be compared in CI.
+
+Usage: python -m benchmarks.bench_e2e [n_files] [llm_seconds] [output] [baseline]
+Set REPO_FETCH_MODE=contents to fetch through the contents API instead of
+the tarball; PyGithub spaces its requests 0.25 s apart, which dominates
+that mode. The embedding model must already be in the fastembed cache.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+# Metrics compared against a baseline, and whether higher is better
+TRACKED = {
+    "ingest.files_per_second": True,
+    "ingest.peak_rss_mb": False,
+    "chat.p50_ms": False,
+    "chat.p99_ms": False,
+    "diagram.first_ms": False,
+    "podcast.first_ms": False,
+}
+REGRESSION_THRESHOLD = 0.2
+
+
+def configure_environment() -> str:
+    """
+    Point the settings at a fresh data directory, keep ingestion in this
+    process and lift the provider quotas the fake server doesn't have.
+    Settings are read on first import, so this runs before any app import.
+    """
+    data_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    os.environ.update(
+        CHROMA_DB_PATH=os.path.join(data_dir, "chroma_db"),
+        REPO_DB_PATH=os.path.join(data_dir, "repositories.db"),
+        SUMMARY_CACHE_DB_PATH=os.path.join(data_dir, "summary_cache.db"),
+        INGEST_WORKERS="0",
+        LLM_BACKEND="groq",
+        SUMMARIZER_REQUESTS_PER_MINUTE="1000000",
+        SUMMARIZER_TOKENS_PER_MINUTE="1000000000",
+        ANSWER_CACHE_ENABLED="false",
+    )
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.setdefault("GITHUB_PERSONAL_ACCESS_TOKEN", "bench")
+    return data_dir
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the per-file progress prints of every thread."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def bench_ingest(agent, repo_url: str) -> Dict[str, Any]:
+    stages: Dict[str, float] = {}
+    counts: Dict[str, Any] = {}
+
+    def progress(stage: str, **kwargs):
+        stages.setdefault(stage, time.perf_counter())
+        counts.update(kwargs)
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    with quiet():
+        ok, repo_id = agent.process_repository(repo_url, progress=progress)
+    elapsed = time.perf_counter() - start
+    if not ok:
+        raise RuntimeError(f"Ingestion failed: {counts.get('error')}")
+
+    order = [s for s in ("metadata", "fetch", "index", "rollup", "done") if s in stages]
+    stage_seconds = {
+        stage: round(stages[following] - stages[stage], 3)
+        for stage, following in zip(order, order[1:])
+    }
+    files = counts.get("files", 0)
+    return {
+        "repo_id": repo_id,
+        "files": files,
+        "vectors": counts.get("vectors", 0),
+        "seconds": round(elapsed, 3),
+        "files_per_second": round(files / elapsed, 2) if elapsed else 0.0,
+        "stage_seconds": stage_seconds,
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+async def bench_api(
+    app, repo_id: int, chats: int, chat_concurrency: int
+) -> Dict[str, Any]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+
+        async def timed(method: str, path: str, **kwargs) -> float:
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            response.raise_for_status()
+            return (time.perf_counter() - start) * 1000
+
+        results: Dict[str, Any] = {}
+        for name, method in (("diagram", "GET"), ("podcast", "POST")):
+            path = f"/api/{name}/{repo_id}"
+            first = await timed(method, path)
+            cached = [await timed(method, path) for _ in range(5)]
+            results[name] = {
+                "first_ms": round(first, 1),
+                "cached_ms": round(statistics.median(cached), 1),
+            }
+
+        # Distinct questions, so every request reaches the LLM
+        semaphore = asyncio.Semaphore(chat_concurrency)
+
+        async def chat(i: int) -> float:
+            async with semaphore:
+                message = {"message": f"What does module_{i} do? ({i})"}
+                return await timed("POST", f"/api/chat/{repo_id}", json=message)
+
+        start = time.perf_counter()
+        samples = await asyncio.gather(*(chat(i) for i in range(chats)))
+        elapsed = time.perf_counter() - start
+        results["chat"] = {
+            "requests": chats,
+            "concurrency": chat_concurrency,
+            "p50_ms": round(percentile(samples, 50), 1),
+            "p99_ms": round(percentile(samples, 99), 1),
+            "max_ms": round(max(samples), 1),
+            "requests_per_second": round(chats / elapsed, 2),
+        }
+        return results
+
+
+def lookup(results: Dict[str, Any], metric: str) -> Any:
+    value: Any = results
+    for part in metric.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(baseline: Dict[str, Any], results: Dict[str, Any]) -> List[str]:
+    """Tracked metrics more than REGRESSION_THRESHOLD worse than `baseline`."""
+    regressions = []
+    for metric, higher_is_better in TRACKED.items():
+        old, new = lookup(baseline, metric), lookup(results, metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > REGRESSION_THRESHOLD:
+            regressions.append(f"{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    llm_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    output = sys.argv[3] if len(sys.argv) > 3 else "bench_e2e.json"
+    baseline_path = sys.argv[4] if len(sys.argv) > 4 else None
+    chats, chat_concurrency = 100, 16
+
+    data_dir = configure_environment()
+    from benchmarks.fixtures import (
+        FakeGitHubServer,
+        FakeLLMServer,
+        make_fake_repo_files,
+    )
+    from core.config import settings
+
+    files = make_fake_repo_files(n_files=n_files, n_dirs=max(1, n_files // 25))
+    with FakeGitHubServer(files) as github, FakeLLMServer(llm_seconds) as llm:
+        # The ports are only known now; clients are created after this
+        settings.GITHUB_API_URL = github.url
+        settings.GROQ_BASE_URL = llm.url
+
+        import main as app_main
+        from routes.chat import github_agent
+
+        print(
+            f"Ingesting {n_files} files ({settings.repo_fetch_mode}), "
+            f"LLM latency {llm_seconds * 1000:.0f} ms, data in {data_dir}"
+        )
+        ingest = bench_ingest(github_agent, github.repo_url)
+        ingest["github_requests"] = github.requests
+        ingest["llm_requests"] = llm.requests
+        print(
+            f"  {ingest['files']} files in {ingest['seconds']:.1f}s "
+            f"({ingest['files_per_second']:.1f} files/s), "
+            f"peak RSS {ingest['peak_rss_mb']:.0f} MB"
+        )
+
+        with quiet():
+            api = asyncio.run(
+                bench_api(app_main.app, ingest["repo_id"], chats, chat_concurrency)
+            )
+        for name in ("diagram", "podcast"):
+            print(
+                f"  /{name}: first {api[name]['first_ms']:.0f} ms, "
+                f"cached {api[name]['cached_ms']:.1f} ms"
+            )
+        chat = api["chat"]
+        print(
+            f"  /chat x{chat['requests']} at {chat['concurrency']} concurrent: "
+            f"p50 {chat['p50_ms']:.0f} ms, p99 {chat['p99_ms']:.0f} ms"
+        )
+
+    results = {
+        "benchmark": "bench_e2e",
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "params": {
+            "n_files": n_files,
+            "llm_seconds": llm_seconds,
+            "fetch_mode": settings.repo_fetch_mode,
+            "chats": chats,
+            "chat_concurrency": chat_concurrency,
+        },
+        "ingest": ingest,
+        **api,
+    }
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(json.load(f), results)
+        for regression in regressions:
+            print(f"  Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Compare per-document `load_text` indexing with the batched VectorIndexer.
+
+Usage: python -m benchmarks.bench_indexing [n_docs]
+"""
+
+import sys
+import tempfile
+import time
+
+from agno.embedder.fastembed import FastEmbedEmbedder
+from agno.knowledge import AgentKnowledge
+from agno.vectordb.chroma import ChromaDb
+
+from benchmarks.fixtures import make_fake_repo_files
+from chat.indexer import VectorIndexer
+from core.config import settings
+
+
+def make_documents(n_docs: int, repo_id: int = 1):
+    files = make_fake_repo_files(n_files=n_docs)
+    return [
+        {
+            "content": f"File: {path}\n\nSummary: synthetic file {i}\n\n{content[:500]}",
+            "metadata": {
+                "file_path": path,
+                "repo_url": "https://github.com/owner/repo",
+                "repo_id": repo_id,
+                "type": "code_file",
+            },
+        }
+        for i, (path, content) in enumerate(files.items())
+    ][:n_docs]
+
+
+def bench_per_document(documents, chroma_path: str) -> float:
+    vector_db = ChromaDb(
+        collection="bench_per_document",
+        path=chroma_path,
+        persistent_client=True,
+        embedder=FastEmbedEmbedder(),
+    )
+    knowledge_base = AgentKnowledge(vector_db=vector_db)
+    vector_db.create()
+
+    start = time.perf_counter()
+    for doc in documents:
+        knowledge_base.load_text(text=doc["content"], filters=doc["metadata"])
+    return time.perf_counter() - start
+
+
+def bench_batched(documents, chroma_path: str) -> float:
+    embedder = FastEmbedEmbedder()
+    vector_db = ChromaDb(
+        collection="bench_batched",
+        path=chroma_path,
+        persistent_client=True,
+        embedder=embedder,
+    )
+    vector_db.create()
+    collection = vector_db.client.get_collection(name=vector_db.collection_name)
+    indexer = VectorIndexer(
+        model_name=embedder.id,
+        batch_size=settings.embed_batch_size,
+        chunk_chars=settings.embed_chunk_chars,
+    )
+    # Load the model outside the timed region, as a long-lived process would
+    indexer.model
+
+    start = time.perf_counter()
+    indexer.index_documents(collection, documents)
+    elapsed = time.perf_counter() - start
+
+    # A re-run must overwrite rather than duplicate
+    indexer.index_documents(collection, documents)
+    assert collection.count() == len(documents)
+    return elapsed
+
+
+def main():
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    documents = make_documents(n_docs)
+
+    with tempfile.TemporaryDirectory() as chroma_path:
+        per_document = bench_per_document(documents, chroma_path)
+        batched = bench_batched(documents, chroma_path)
+
+    print(f"per-document load_text: {n_docs / per_document:8.1f} docs/sec")
+    print(f"batched upsert:         {n_docs / batched:8.1f} docs/sec")
+    print(f"speedup:                {per_document / batched:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Time podcast context assembly on a large repository: reading every vector
+document and keeping the first 6500 characters (the old way) against the
+ranked, token-budgeted `PodcastContextBuilder`.
+
+Usage: python -m benchmarks.bench_podcast_context [n_files]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.resources import get_chroma_client
+from db.repo_db import RepositoryDataManager
+from db.symbol_db import SymbolStoreManager
+from podcast.context import PodcastContextBuilder
+
+DIMENSIONS = 384
+
+
+def fake_embed(text: str):
+    rng = np.random.default_rng(abs(hash(text)) % (2**32))
+    return rng.random(DIMENSIONS, dtype=np.float32).tolist()
+
+
+def make_files(n_files: int):
+    files = []
+    for f in range(n_files):
+        depth = f % 4
+        directory = "/".join(f"pkg{d}" for d in range(depth)) or "."
+        name = "main.py" if f == 0 else f"module_{f}.py"
+        files.append(
+            SimpleNamespace(
+                file_path=os.path.normpath(f"{directory}/{name}"),
+                summary=f"Module {f} handles part of the request pipeline. " * 8,
+                content_preview="def handler(request):\n    return request\n" * 10,
+                metadata={"file_size": 4000},
+                functions=[
+                    {"name": f"handle_{f}_{i}", "line": i, "signature": None}
+                    for i in range(f % 15)
+                ],
+                classes=[],
+            )
+        )
+    return files
+
+
+def old_context(collection, max_chars: int = 6500) -> str:
+    context = ""
+    for doc in collection.get()["documents"]:
+        if len(context) + len(doc) > max_chars:
+            break
+        context += "\n\n---\n\n" + doc
+    return context
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "repositories.db")
+        repo_id = RepositoryDataManager(db_path).add_repository(
+            "https://github.com/owner/big"
+        )
+        store = SymbolStoreManager(db_path)
+        files = make_files(n_files)
+        store.save_files(repo_id, files)
+
+        collection = get_chroma_client(os.path.join(tmp, "chroma")).create_collection(
+            "bench_podcast"
+        )
+        for start in range(0, n_files, 1000):
+            batch = files[start : start + 1000]
+            collection.add(
+                ids=[f"{repo_id}:{f.file_path}:0" for f in batch],
+                embeddings=[fake_embed(f.file_path) for f in batch],
+                documents=[
+                    f"File: {f.file_path}\nSummary: {f.summary}\n{f.content_preview}"
+                    for f in batch
+                ],
+                metadatas=[
+                    {"repo_id": repo_id, "file_path": f.file_path} for f in batch
+                ],
+            )
+
+        builder = PodcastContextBuilder(store, embed=fake_embed)
+        topic = "A deep dive into the big repository."
+
+        for name, build in (
+            ("read all, first 6500 chars", lambda: old_context(collection)),
+            ("ranked, token budget", lambda: builder.build(repo_id, topic, collection)),
+        ):
+            build()
+            start = time.perf_counter()
+            context = build()
+            elapsed = (time.perf_counter() - start) * 1000
+            first = context.strip().split("\n", 1)[0]
+            print(f"{name:<28} {elapsed:8.1f} ms  {len(context):6d} chars  {first}")
+
+
+if __name__ == "__main__":
+    main()
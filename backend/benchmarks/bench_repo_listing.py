@@ -0,0 +1,78 @@
+"""
+Time repository listing and lookups with many registered repositories,
+each carrying generated podcast and diagram scripts.
+
+Usage: python -m benchmarks.bench_repo_listing [n_repos]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from db.repo_db import Repository, RepositoryDataManager
+
+
+def time_call(func, repeat: int = 20) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    n_repos = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = RepositoryDataManager(os.path.join(tmp, "repositories.db"))
+        with manager.get_session() as session:
+            session.bulk_insert_mappings(
+                Repository,
+                [
+                    {
+                        "repo_url": f"https://github.com/owner{n % 500}/repo{n}",
+                        "collection_name": f"repo_{n}",
+                        "owner": f"owner{n % 500}",
+                        "stars": n % 5000,
+                        "podcast_script": "host: welcome back " * 300,
+                        "diagram_script": "graph TD\n  A --> B\n" * 300,
+                    }
+                    for n in range(n_repos)
+                ],
+            )
+            session.commit()
+
+        middle = n_repos // 2
+        url = f"https://github.com/owner{middle % 500}/repo{middle}"
+        since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
+        cases = [
+            ("all rows (list_repositories)", manager.list_repositories),
+            ("first page", lambda: manager.list_repository_page(limit=100)),
+            (
+                "page deep in the list",
+                lambda: manager.list_repository_page(limit=100, before=n_repos // 10),
+            ),
+            ("filter by owner", lambda: manager.list_repository_page(owner="owner7")),
+            (
+                "filter by stars",
+                lambda: manager.list_repository_page(min_stars=4990),
+            ),
+            (
+                "updated since",
+                lambda: manager.list_repository_page(updated_since=since),
+            ),
+            ("lookup by url", lambda: manager.get_repository_info_by_url(url)),
+            (
+                "by id, no scripts",
+                lambda: manager.get_full_repository_by_id(42, include=()),
+            ),
+            ("by id, with scripts", lambda: manager.get_full_repository_by_id(42)),
+        ]
+        for name, func in cases:
+            print(f"{name:<30} {time_call(func):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
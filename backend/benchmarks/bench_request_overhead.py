@@ -0,0 +1,72 @@
+"""
+Time the per-request setup of the diagram and podcast endpoints: building an
+orchestrator and running its first repository lookup, with cold clients and
+engines (the old per-request construction) and with the shared registry.
+
+Usage: python -m benchmarks.bench_request_overhead [requests]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import core.resources as resources
+import db.engine as engine_registry
+from diagram.agent import DiagramOrchestrator
+from podcast.agent import PodcastOrchestrator
+
+
+def reset_registry():
+    """Forget every shared resource, as if each request built its own."""
+    with resources._lock:
+        resources._instances.clear()
+    with engine_registry._engines_lock:
+        for engine in engine_registry._engines.values():
+            engine.dispose()
+        engine_registry._engines.clear()
+
+
+def handle_request(orchestrator_cls, db_path: str, chroma_path: str, repo_id: int):
+    orchestrator = orchestrator_cls(repo_db_path=db_path, chroma_path=chroma_path)
+    orchestrator.repo_manager.get_full_repository_by_id(repo_id)
+    orchestrator.chroma_client.list_collections()
+
+
+def time_requests(orchestrator_cls, cold: bool, requests: int, *args) -> list:
+    timings = []
+    for _ in range(requests):
+        if cold:
+            reset_registry()
+        start = time.perf_counter()
+        handle_request(orchestrator_cls, *args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "repositories.db")
+        chroma_path = os.path.join(tmp, "chroma")
+        repo_id = resources.get_repo_manager(db_path).add_repository(
+            "https://github.com/owner/repo"
+        )
+        resources.get_chroma_client(chroma_path).get_or_create_collection("repo_1")
+
+        for orchestrator_cls in (DiagramOrchestrator, PodcastOrchestrator):
+            for label, cold in (("per request", True), ("shared", False)):
+                timings = time_requests(
+                    orchestrator_cls, cold, requests, db_path, chroma_path, repo_id
+                )
+                print(
+                    f"{orchestrator_cls.__name__:22s} {label:12s} "
+                    f"p50 {statistics.median(timings):7.2f} ms  "
+                    f"max {max(timings):7.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Stress SQLite with concurrent chat-history writes and repository metadata
+updates, as the API and the ingestion workers do, and report throughput,
+latency and `database is locked` errors with SQLite's defaults and with
+performance mode (WAL and tuned pragmas).
+
+Threads in this process call `add_chat_message`; a separate process calls
+`update_repository_metadata`, like an ingestion worker. Each mode runs in
+its own interpreter so the engine registry starts clean.
+
+Usage: python -m benchmarks.bench_sqlite_writers [threads] [seconds]
+"""
+
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_writer(call, stop: threading.Event, latencies: list, errors: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            call()
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            errors.append(e)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def ingestion_process(db_path: str, repo_ids, seconds: float, results):
+    from db.repo_db import RepositoryDataManager
+
+    manager = RepositoryDataManager(db_path)
+    latencies, errors = [], []
+    stop = threading.Event()
+    counter = iter(range(10**9))
+
+    def update():
+        n = next(counter)
+        manager.update_repository_metadata(
+            repo_ids[n % len(repo_ids)], {"stars": n, "last_activity": f"tick {n}"}
+        )
+
+    timer = threading.Timer(seconds, stop.set)
+    timer.start()
+    run_writer(update, stop, latencies, errors)
+    results.put((latencies, len(errors)))
+
+
+def run_mode(threads: int, seconds: float):
+    from db.chat_db import ChatHistoryManager
+    from db.repo_db import RepositoryDataManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "repositories.db")
+        repos = RepositoryDataManager(db_path)
+        repo_ids = [
+            repos.add_repository(f"https://github.com/owner/repo{n}") for n in range(8)
+        ]
+        chats = ChatHistoryManager(db_path)
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        ingestion = context.Process(
+            target=ingestion_process, args=(db_path, repo_ids, seconds, results)
+        )
+        ingestion.start()
+
+        stop = threading.Event()
+        latencies, errors = [], []
+        workers = [
+            threading.Thread(
+                target=run_writer,
+                args=(
+                    lambda n=n: chats.add_chat_message(
+                        repo_id=repo_ids[n % len(repo_ids)],
+                        query="what does this repository do?",
+                        response="It indexes code. " * 40,
+                    ),
+                    stop,
+                    latencies,
+                    errors,
+                ),
+            )
+            for n in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        time.sleep(seconds)
+        stop.set()
+        for worker in workers:
+            worker.join()
+        update_latencies, update_errors = results.get()
+        ingestion.join()
+
+    for name, samples, error_count in (
+        ("add_chat_message", latencies, len(errors)),
+        ("update_repository_metadata", update_latencies, update_errors),
+    ):
+        if samples:
+            print(
+                f"  {name:<27} {len(samples) / seconds:8.0f} ops/s  "
+                f"p50={statistics.median(samples):7.2f} ms  "
+                f"p99={percentile(samples, 99):8.2f} ms  "
+                f"locked={error_count}"
+            )
+        else:
+            print(f"  {name:<27} no successful writes  locked={error_count}")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+    if os.environ.get("BENCH_SQLITE_CHILD"):
+        run_mode(threads, seconds)
+        return
+
+    for label, enabled in (("SQLite defaults", "false"), ("performance mode", "true")):
+        print(f"{label} ({threads} chat threads + 1 ingestion process, {seconds}s)")
+        env = dict(
+            os.environ, BENCH_SQLITE_CHILD="1", SQLITE_PERFORMANCE_MODE=enabled
+        )
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_sqlite_writers", *sys.argv[1:]],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
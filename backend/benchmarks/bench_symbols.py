@@ -0,0 +1,76 @@
+"""
+Time symbol table lookups (exact, prefix, fuzzy, per file) on a large repo.
+
+Usage: python -m benchmarks.bench_symbols [n_symbols]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from db.repo_db import RepositoryDataManager
+from db.symbol_db import SymbolStoreManager
+
+
+def make_code_summaries(n_symbols: int, per_file: int = 50):
+    summaries = []
+    for f in range(max(1, n_symbols // per_file)):
+        summaries.append(
+            SimpleNamespace(
+                file_path=f"src/pkg_{f % 20}/module_{f}.py",
+                summary=f"synthetic file {f}",
+                content_preview="",
+                metadata={},
+                functions=[
+                    {"name": f"handle_{f}_{i}", "line": i * 10, "signature": None}
+                    for i in range(per_file - 5)
+                ],
+                classes=[
+                    {"name": f"Widget{f}_{i}", "line": i, "signature": None}
+                    for i in range(5)
+                ],
+            )
+        )
+    return summaries
+
+
+def time_lookup(func, repeat: int = 50) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "repositories.db")
+        repo_id = RepositoryDataManager(db_path).add_repository(
+            "https://github.com/owner/repo"
+        )
+        store = SymbolStoreManager(db_path)
+        summaries = make_code_summaries(n_symbols)
+
+        start = time.perf_counter()
+        store.save_files(repo_id, summaries)
+        print(f"insert {n_symbols} symbols: {time.perf_counter() - start:8.2f} s")
+
+        target = f"handle_{len(summaries) // 2}_3"
+        lookups = {
+            "exact": lambda: store.search_symbols(repo_id, target, "exact"),
+            "prefix": lambda: store.search_symbols(repo_id, target[:-2], "prefix"),
+            "fuzzy": lambda: store.search_symbols(repo_id, target + "x", "fuzzy"),
+            "per file": lambda: store.list_symbols(
+                repo_id, file_path=summaries[0].file_path
+            ),
+        }
+        for name, lookup in lookups.items():
+            print(f"{name:<8} lookup: {time_lookup(lookup):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Time prompt budgeting for the summarizer on every source file of this
+backend: counting tokens and packing symbols and code into the prompt,
+against the old character slice.
+
+Usage: python -m benchmarks.bench_tokens [rounds]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from core.config import settings
+from core.tokens import PromptBudget, estimate_tokens
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TEMPLATE = "Analyze this code file.\nFile: {path}\nFunctions: {functions}\nCode:\n{code}"
+
+
+def load_sources():
+    sources = []
+    for path in sorted(BACKEND_DIR.rglob("*.py")):
+        if "__pycache__" not in path.parts:
+            sources.append((str(path.relative_to(BACKEND_DIR)), path.read_text()))
+    return sources
+
+
+def per_file_us(func, sources, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in sources:
+            func(item)
+    return (time.perf_counter() - start) * 1e6 / (rounds * len(sources))
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    sources = load_sources()
+    budget = PromptBudget(
+        settings.GROQ_Summarizer_MODEL_ID,
+        max_completion_tokens=settings.summarizer_completion_tokens,
+        max_prompt_tokens=settings.summarizer_prompt_tokens,
+    )
+
+    def sliced(item):
+        path, content = item
+        return TEMPLATE.format(path=path, functions="[]", code=content[:2000])
+
+    def packed(item):
+        path, content = item
+        functions, code = budget.allocate(
+            TEMPLATE.format(path=path, functions="", code=""),
+            [(str(["handler"] * 20), 1), (content, 6)],
+        )
+        return TEMPLATE.format(path=path, functions=functions, code=code)
+
+    total_chars = sum(len(content) for _, content in sources)
+    print(
+        f"{len(sources)} files, {total_chars / len(sources):.0f} chars on average, "
+        f"prompt budget {budget.available} tokens"
+    )
+    for name, func in (
+        ("len // 4", lambda item: len(item[1]) // 4),
+        ("estimate_tokens", lambda item: estimate_tokens(item[1])),
+        ("2000-char slice prompt", sliced),
+        ("budgeted prompt", packed),
+    ):
+        print(f"{name:<24} {per_file_us(func, sources, rounds):9.1f} us/file")
+
+    over = [item for item in sources if budget.count(packed(item)) > budget.available]
+    sliced_tokens = [estimate_tokens(sliced(item)) for item in sources]
+    print(
+        f"budgeted prompts over budget: {len(over)}; 2000-char slice prompts "
+        f"range {min(sliced_tokens)}-{max(sliced_tokens)} tokens"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Offline stand-ins for GitHub and the LLM API, shared by the benchmarks.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from core.fake_llm import fake_completion, fake_stream
+
+
+def make_fake_repo_files(
+    n_files: int = 200, n_dirs: int = 20, lines_per_file: int = 60
+) -> Dict[str, str]:
+    """Build a synthetic repository as a {path: content} mapping."""
+    files = {}
+    extensions = [".py", ".ts", ".js", ".go"]
+    for i in range(n_files):
+        ext = extensions[i % len(extensions)]
+        path = f"src/pkg_{i % n_dirs}/module_{i}{ext}"
+        body = [f"class Widget{i}:"]
+        for j in range(lines_per_file):
+            if j % 10 == 0:
+                body.append(f"    def method_{j}(self, value):")
+            body.append(f"        value = value + {j}  # line {j}")
+        files[path] = "\n".join(body) + "\n"
+
+    # Files that the extension filter should skip
+    files["README.md"] = "# Fake repository\n"
+    files["assets/logo.png"] = "not really a png"
+    return files
+
+
+def make_fake_repo_archive(
+    files: Dict[str, str], top_dir: str = "owner-repo-0000000", mtime: Optional[float] = None
+) -> bytes:
+    """
+    Pack files into a gzipped tarball laid out like a GitHub `tarball` download.
+    """
+    buffer = io.BytesIO()
+    mtime = time.time() if mtime is None else mtime
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        root = tarfile.TarInfo(top_dir)
+        root.type = tarfile.DIRTYPE
+        root.mtime = mtime
+        archive.addfile(root)
+        for path, content in files.items():
+            data = content.encode("utf-8")
+            info = tarfile.TarInfo(f"{top_dir}/{path}")
+            info.size = len(data)
+            info.mtime = mtime
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class FakeContentFile:
+    """The parts of PyGithub's ContentFile the ingestion code reads."""
+
+    def __init__(self, path: str, content: Optional[str] = None):
+        self.path = path
+        self.type = "file" if content is not None else "dir"
+        self.size = len(content.encode("utf-8")) if content is not None else 0
+        self.content = (
+            base64.b64encode(content.encode("utf-8")).decode("ascii")
+            if content is not None
+            else None
+        )
+        self.html_url = f"https://github.com/owner/repo/blob/main/{path}"
+
+
+class FakeGithubRepo:
+    """
+    In-memory stand-in for a PyGithub Repository, serving `files` through
+    the contents API. Set `archive_error` to make archive links fail.
+    """
+
+    def __init__(
+        self,
+        files: Dict[str, str],
+        head_sha: str = "0" * 40,
+        archive_error: Optional[Exception] = None,
+    ):
+        self.files = files
+        self.head_sha = head_sha
+        self.archive_error = archive_error
+        self.default_branch = "main"
+        self.html_url = "https://github.com/owner/repo"
+        self.contents_calls = 0
+
+    def get_branch(self, branch: str):
+        return SimpleNamespace(commit=SimpleNamespace(sha=self.head_sha))
+
+    def get_archive_link(self, archive_format: str, ref: Optional[str] = None) -> str:
+        if self.archive_error is not None:
+            raise self.archive_error
+        return f"fake://{archive_format}/{ref}"
+
+    def get_contents(self, path: str, ref: Optional[str] = None):
+        self.contents_calls += 1
+        if path in self.files:
+            return FakeContentFile(path, self.files[path])
+
+        prefix = f"{path}/" if path else ""
+        children = set()
+        for file_path in self.files:
+            if file_path.startswith(prefix):
+                children.add(prefix + file_path[len(prefix) :].split("/", 1)[0])
+        if not children:
+            raise FileNotFoundError(path)
+        return [
+            FakeContentFile(child, self.files.get(child)) for child in sorted(children)
+        ]
+
+
+class _Server:
+    """A ThreadingHTTPServer on a free local port, run in a daemon thread."""
+
+    def __init__(self, handler: type):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.owner = self
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self.requests = 0
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str = "application/json",
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, data: Any, **kwargs):
+        self.send_body(status, json.dumps(data).encode("utf-8"), **kwargs)
+
+
+class FakeGitHubServer(_Server):
+    """
+    The parts of the GitHub REST API that ingestion uses, serving one
+    synthetic repository `owner/name`: repository and commit metadata, the
+    contents API (one call per directory and per file, like GitHub) and
+    tarball downloads. Point `GITHUB_API_URL` at `url`.
+    """
+
+    def __init__(
+        self,
+        files: Dict[str, str],
+        owner: str = "owner",
+        name: str = "repo",
+        head_sha: str = "0" * 40,
+    ):
+        super().__init__(_GitHubHandler)
+        self.files = files
+        self.owner = owner
+        self.name = name
+        self.head_sha = head_sha
+        self.repo_url = f"https://github.com/{owner}/{name}"
+        self._archive: Optional[bytes] = None
+        # Directory listings, computed once
+        self.dirs: Dict[str, List[Tuple[str, str]]] = {"": []}
+        for path in sorted(files):
+            parts = path.split("/")
+            for depth in range(len(parts)):
+                parent = "/".join(parts[:depth])
+                child = "/".join(parts[: depth + 1])
+                kind = "file" if depth == len(parts) - 1 else "dir"
+                listing = self.dirs.setdefault(parent, [])
+                if kind == "file" or child not in self.dirs:
+                    listing.append((child, kind))
+                if kind == "dir":
+                    self.dirs.setdefault(child, [])
+
+    @property
+    def api(self) -> str:
+        return f"{self.url}/repos/{self.owner}/{self.name}"
+
+    def archive(self) -> bytes:
+        if self._archive is None:
+            top_dir = f"{self.owner}-{self.name}-{self.head_sha[:7]}"
+            self._archive = make_fake_repo_archive(self.files, top_dir, mtime=0)
+        return self._archive
+
+    def content(self, path: str, kind: str, ref: str) -> Dict[str, Any]:
+        item = {
+            "type": kind,
+            "name": path.rsplit("/", 1)[-1],
+            "path": path,
+            "sha": hashlib.sha1(path.encode("utf-8")).hexdigest(),
+            "size": 0,
+            "url": f"{self.api}/contents/{quote(path)}?ref={ref}",
+            "html_url": f"{self.repo_url}/blob/{ref}/{path}",
+        }
+        if kind == "file":
+            item["size"] = len(self.files[path].encode("utf-8"))
+        return item
+
+    def repository(self) -> Dict[str, Any]:
+        return {
+            "id": 1,
+            "name": self.name,
+            "full_name": f"{self.owner}/{self.name}",
+            "owner": {"login": self.owner},
+            "url": self.api,
+            "html_url": self.repo_url,
+            "description": "Synthetic repository for benchmarks",
+            "default_branch": "main",
+            "stargazers_count": 0,
+            "forks_count": 0,
+            "open_issues_count": 0,
+            "license": None,
+        }
+
+    def commits(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "sha": self.head_sha,
+                "html_url": f"{self.repo_url}/commit/{self.head_sha}",
+                "commit": {
+                    "message": "Synthetic commit",
+                    "author": {"name": "bench", "date": "2024-01-01T00:00:00Z"},
+                },
+            }
+        ]
+
+
+class _GitHubHandler(_Handler):
+    def do_GET(self):
+        server: FakeGitHubServer = self.server.owner
+        server.requests += 1
+        parsed = urlparse(self.path)
+        ref = parse_qs(parsed.query).get("ref", [server.head_sha])[0]
+        prefix = f"/repos/{server.owner}/{server.name}"
+        path = unquote(parsed.path)
+
+        if path == f"/archives/{server.owner}-{server.name}.tar.gz":
+            return self.send_body(200, server.archive(), "application/x-gzip")
+        if not path.startswith(prefix):
+            return self.send_json(404, {"message": "Not Found"})
+        rest = path[len(prefix) :].strip("/")
+
+        if rest == "":
+            return self.send_json(200, server.repository())
+        if rest.startswith("branches/"):
+            commit = {"sha": server.head_sha}
+            return self.send_json(200, {"name": rest[9:], "commit": commit})
+        if rest == "commits":
+            return self.send_json(200, server.commits())
+        if rest.startswith("tarball"):
+            location = f"{server.url}/archives/{server.owner}-{server.name}.tar.gz"
+            return self.send_body(302, b"", headers={"Location": location})
+        if rest == "contents" or rest.startswith("contents/"):
+            content_path = rest[len("contents") :].strip("/")
+            if content_path in server.files:
+                item = server.content(content_path, "file", ref)
+                content = server.files[content_path].encode("utf-8")
+                item["encoding"] = "base64"
+                item["content"] = base64.b64encode(content).decode("ascii")
+                return self.send_json(200, item)
+            if content_path in server.dirs:
+                listing = [
+                    server.content(child, kind, ref)
+                    for child, kind in server.dirs[content_path]
+                ]
+                return self.send_json(200, listing)
+        return self.send_json(404, {"message": "Not Found"})
+
+
+class FakeLLMServer(_Server):
+    """
+    An OpenAI-style chat completion endpoint that answers every request
+    after `latency` seconds, streaming included (see `core.fake_llm`).
+    Point `GROQ_BASE_URL` at `url`.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(_LLMHandler)
+        self.latency = latency
+
+
+class _LLMHandler(_Handler):
+    def do_POST(self):
+        server: FakeLLMServer = self.server.owner
+        server.requests += 1
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            return self.send_json(404, {"error": {"message": "Not found"}})
+        if server.latency > 0:
+            time.sleep(server.latency)
+        completion = fake_completion(body)
+        if body.get("stream"):
+            stream = b"".join(fake_stream(completion))
+            return self.send_body(200, stream, "text/event-stream")
+        return self.send_json(200, completion)
@@ -1,40 +1,74 @@
-import os
 import base64
 
 # import asyncio
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple, Set
 from dataclasses import dataclass
 from dotenv import load_dotenv
 import json
+import threading
+import time
 
 # Core libraries
 from github import Github
-from fastembed import TextEmbedding
-import chromadb
-from groq import Groq
+import numpy as np
 
 # Agno components
 from agno.agent import Agent
+from agno.run.response import RunResponseContentEvent
 from agno.models.groq import Groq as AgnoGroq
 from agno.vectordb.chroma import ChromaDb
-from agno.embedder.fastembed import FastEmbedEmbedder
 from agno.knowledge import AgentKnowledge
 
-from db.repo_db import RepositoryDataManager
+from db.summary_cache import SummaryCacheManager
+from db.symbol_db import SymbolStoreManager
+from db.answer_cache import AnswerCacheManager
+from db.rollup_db import RollupStoreManager
 from core.config import settings
+from core.llm import (
+    GatewayClient,
+    LLMError,
+    create_groq_client,
+    create_llm_gateway,
+)
+from core.rate_limit import TokenBucketLimiter
+from core.tokens import PromptBudget
+from core.residency import ResidencyManager
+from core.resources import (
+    SharedFastEmbedEmbedder,
+    get_chroma_client,
+    get_llm_gateway,
+    get_repo_manager,
+    get_shared_store,
+    reset_chroma_client,
+)
+from chat.archive import download_repo_archive, iter_archive_files
+from chat.indexer import VectorIndexer
+from chat.pipeline import BoundedPipeline
+from chat.rollup import RollupBuilder, repository_overview
+
+# Shared-store counter of changes to any repository's vectors
+VECTOR_GENERATION_KEY = "vectors:generation"
+# Collections of deleted repositories, left for the ingest writer to drop
+PENDING_DROP_PREFIX = "vectors:drop:"
 
 
 @dataclass
 class CodeSummary:
     file_path: str
-    content: str
+    content_preview: str
     summary: str
     functions: List[Dict[str, Any]]
     classes: List[Dict[str, Any]]
     metadata: Dict[str, Any]
 
 
+@dataclass
+class RepoComponents:
+    vector_db: ChromaDb
+    knowledge_base: AgentKnowledge
+
+
 class GitHubRepoAssistant:
     def __init__(
         self,
@@ -46,65 +80,185 @@ class GitHubRepoAssistant:
         load_dotenv()
 
         # Initialize APIs
-        self.github = Github(github_token or settings.GITHUB_TOKEN)
-        self.groq_client = Groq(api_key=groq_api_key or settings.GROQ_API_KEY)
+        self.github = Github(
+            github_token or settings.GITHUB_TOKEN, base_url=settings.GITHUB_API_URL
+        )
+        # Summaries and rollups go through the gateway, which retries itself
+        if groq_api_key:
+            self.llm = create_llm_gateway(
+                create_groq_client(api_key=groq_api_key, max_retries=0)
+            )
+        else:
+            self.llm = get_llm_gateway()
+        self.summary_limiter = TokenBucketLimiter(
+            requests_per_minute=settings.summarizer_requests_per_minute,
+            tokens_per_minute=settings.summarizer_tokens_per_minute,
+        )
+        self.summary_budget = PromptBudget(
+            settings.GROQ_Summarizer_MODEL_ID,
+            max_completion_tokens=settings.summarizer_completion_tokens,
+            max_prompt_tokens=settings.summarizer_prompt_tokens,
+        )
 
         # Initialize embedder
-        self.embedder = FastEmbedEmbedder()
+        self.embedder = SharedFastEmbedEmbedder()
         self.chroma_path = chroma_path
 
-        # Initialize repository manager
-        self.repo_manager = RepositoryDataManager(repo_db_path)
-
-        # Store vector databases for different repositories
-        self.vector_dbs: Dict[int, ChromaDb] = {}
-        self.knowledge_bases: Dict[int, AgentKnowledge] = {}
-        self.agents: Dict[int, Agent] = {}
-
-        self.repo_summaries: Dict[int, List[CodeSummary]] = {}
+        # Bulk indexing path, embedding with the same model as the embedder
+        self.indexer = VectorIndexer(
+            model_name=self.embedder.id,
+            batch_size=settings.embed_batch_size,
+            chunk_chars=settings.embed_chunk_chars,
+        )
 
-        # Initialize vector database
+        # Initialize repository manager
+        self.repo_manager = get_repo_manager(repo_db_path)
+
+        # File summaries and the function/class symbol table
+        self.symbol_store = SymbolStoreManager(repo_db_path)
+
+        # Directory and repository overviews rolled up from file summaries
+        self.rollup_store = RollupStoreManager(repo_db_path)
+        self.rollup_builder = RollupBuilder(
+            self.symbol_store,
+            self.rollup_store,
+            complete=lambda prompt: self.complete_with_summarizer(
+                prompt, settings.rollup_completion_tokens, "rollup"
+            ),
+            budget=PromptBudget(
+                settings.GROQ_Summarizer_MODEL_ID,
+                max_completion_tokens=settings.rollup_completion_tokens,
+                max_prompt_tokens=settings.rollup_prompt_tokens,
+            ),
+            max_depth=settings.rollup_max_depth,
+            concurrency=settings.summarizer_concurrency,
+            prompt_version=settings.ROLLUP_PROMPT_VERSION,
+        )
+
+        # State shared with the other API and worker processes
+        self.shared_state = get_shared_store()
+
+        # Chat answers per repository, reused for similar questions
+        self.answer_cache = AnswerCacheManager(
+            repo_db_path,
+            similarity_threshold=settings.answer_cache_similarity_threshold,
+            ttl_hours=settings.answer_cache_ttl_hours,
+            max_entries_per_repo=settings.answer_cache_max_entries_per_repo,
+            store=self.shared_state,
+        )
+
+        # Initialize persistent summary cache
+        self.summary_cache = SummaryCacheManager(
+            settings.summary_cache_db_path,
+            max_entries=settings.summary_cache_max_entries,
+            max_age_days=settings.summary_cache_max_age_days,
+        )
+
+        # Vector databases and knowledge bases of recently used repositories
+        self.resident_repos: ResidencyManager[RepoComponents] = ResidencyManager(
+            settings.max_resident_repos
+        )
+        # Bumped by whichever process writes or deletes vectors
+        self._vector_generation = self.shared_state.get(VECTOR_GENERATION_KEY, 0)
+        self._vector_generation_lock = threading.Lock()
+
+    def sync_vector_state(self):
+        """
+        Reopen the Chroma client if another process changed any vectors since
+        this one loaded them; a loaded index doesn't see others' writes.
+        """
+        generation = self.shared_state.get(VECTOR_GENERATION_KEY, 0)
+        with self._vector_generation_lock:
+            if generation == self._vector_generation:
+                return
+            self._vector_generation = generation
+            reset_chroma_client(self.chroma_path)
+            dropped = self.resident_repos.clear()
+        print(f"Vectors changed elsewhere, reloaded Chroma ({dropped} repos dropped)")
+
+    def publish_vector_change(self):
+        """Tell other processes that this one changed vectors."""
+        generation = self.shared_state.incr(VECTOR_GENERATION_KEY)
+        with self._vector_generation_lock:
+            # Our own client already sees our writes; only skip our own bump
+            if generation == self._vector_generation + 1:
+                self._vector_generation = generation
+
+    def get_repo_components(
+        self, repo_id: int, collection_name: str
+    ) -> RepoComponents:
+        """
+        Get a repository's vector database and knowledge base, rebuilding
+        them if they were evicted or never loaded
+        """
+        self.sync_vector_state()
 
-    def get_or_create_vector_db(self, repo_id: int, collection_name: str) -> ChromaDb:
-        if repo_id not in self.vector_dbs:
-            self.vector_dbs[repo_id] = ChromaDb(
+        def load() -> RepoComponents:
+            vector_db = ChromaDb(
                 collection=collection_name,
                 path=self.chroma_path,
                 persistent_client=True,
                 embedder=self.embedder,
             )
-        return self.vector_dbs[repo_id]
-
-    # Initialize Knowledge Base
-    def get_or_create_knowledge_base(
-        self, repo_id: int, vector_db: ChromaDb
-    ) -> AgentKnowledge:
-        if repo_id not in self.knowledge_bases:
-            self.knowledge_bases[repo_id] = AgentKnowledge(vector_db=vector_db)
-        return self.knowledge_bases[repo_id]
-
-    # Initialize agent
-    def get_or_create_agent(
-        self, repo_id: int, knowledge_base: AgentKnowledge
-    ) -> Agent:
-        if repo_id not in self.agents:
-            self.agents[repo_id] = Agent(
-                model=AgnoGroq(id=settings.GROQ_CHAT_MODEL_ID),
-                knowledge=knowledge_base,
-                search_knowledge=True,
-                show_tool_calls=True,
-                instructions=[
-                    "You are a GitHub repository assistant that can answer questions about code repositories.",
-                    "Use the knowledge base to find relevant code summaries, functions, and classes.",
-                    "Provide detailed explanations about code structure, functionality, and relationships.",
-                    "When explaining code, include file paths and specific function/class names when relevant.",
-                ],
+            # Reuse the process-wide client instead of opening another one
+            vector_db._client = get_chroma_client(self.chroma_path)
+            return RepoComponents(
+                vector_db=vector_db,
+                knowledge_base=AgentKnowledge(vector_db=vector_db),
             )
-        return self.agents[repo_id]
+
+        return self.resident_repos.get(repo_id, load)
+
+    def get_or_create_vector_db(self, repo_id: int, collection_name: str) -> ChromaDb:
+        return self.get_repo_components(repo_id, collection_name).vector_db
+
+    # Initialize agent. Agno agents keep per-run state on the instance, so
+    # each query gets its own; the knowledge base behind it is shared.
+    def create_agent(
+        self, knowledge_base: AgentKnowledge, repo_id: Optional[int] = None
+    ) -> Agent:
+        tools = []
+        if repo_id is not None:
+
+            def get_repository_overview() -> str:
+                """
+                Get an overview of the whole repository and its main
+                directories: purpose, architecture and components. Use it for
+                broad questions instead of searching many files.
+                """
+                return (
+                    self.get_repository_overview(repo_id)
+                    or "No overview is available yet; search the knowledge base."
+                )
+
+            tools.append(get_repository_overview)
+
+        return Agent(
+            # Agno makes the calls; the gateway limits, retries and counts them
+            model=AgnoGroq(
+                id=settings.GROQ_CHAT_MODEL_ID,
+                client=GatewayClient(self.llm, label="chat"),
+            ),
+            knowledge=knowledge_base,
+            search_knowledge=True,
+            tools=tools,
+            show_tool_calls=True,
+            # Otherwise every run is also posted to agno's API; AGNO_TELEMETRY
+            # still turns it back on
+            telemetry=False,
+            instructions=[
+                "You are a GitHub repository assistant that can answer questions about code repositories.",
+                "Use the knowledge base to find relevant code summaries, functions, and classes.",
+                "For broad questions about the purpose or architecture of the repository, start with get_repository_overview.",
+                "Provide detailed explanations about code structure, functionality, and relationships.",
+                "When explaining code, include file paths and specific function/class names when relevant.",
+            ],
+        )
 
     def delete_repository(self, repo_id: int) -> bool:
         """
-        Delete a repository from the database and its associated vector collection.
+        Delete a repository from the database and queue its vector
+        collection for the ingest writer to drop.
         """
         repo_data = self.repo_manager.get_repository(repo_id)
         if not repo_data:
@@ -113,50 +267,101 @@ class GitHubRepoAssistant:
         _, collection_name = repo_data
 
         # Delete from DB
+        self.symbol_store.delete_files(repo_id)
+        self.rollup_store.delete_rollups(repo_id)
+        self.answer_cache.invalidate(repo_id)
         db_deleted = self.repo_manager.delete_repository(repo_id)
         if not db_deleted:
             return False
 
-        # Delete ChromaDB collection
-        try:
-            # Get a client instance to delete the collection
-            chroma_client = chromadb.PersistentClient(path=self.chroma_path)
-            chroma_client.delete_collection(name=collection_name)
-            print(f"Successfully deleted collection: {collection_name}")
-        except Exception as e:
-            print(
-                f"Could not delete collection '{collection_name}'. It may not exist. Error: {e}"
-            )
-            # Continue even if collection deletion fails, as DB entry is main record
-
-        # Clear from memory
-        self.vector_dbs.pop(repo_id)
-        self.knowledge_bases.pop(repo_id)
-        self.agents.pop(repo_id)
-        self.repo_summaries.pop(repo_id)
+        # Only the ingest writer process writes to Chroma; it drops the
+        # collection before it claims another job
+        self.shared_state.set(f"{PENDING_DROP_PREFIX}{collection_name}", repo_id)
+        self.resident_repos.discard(repo_id)
 
         return True
 
-    def fetch_repo_files(
-        self, repo_url: str, file_extensions: List[str] = None
-    ) -> List[Dict[str, Any]]:
+    def drop_pending_collections(self) -> int:
         """
-        Fetch all files from a GitHub repository using PyGithub
+        Drop the collections of repositories deleted since the last call.
+        Runs in the ingest writer; returns how many were dropped.
         """
-        if file_extensions is None:
-            file_extensions = settings.file_extenions
+        pending = self.shared_state.items(PENDING_DROP_PREFIX)
+        for key in pending:
+            collection_name = key[len(PENDING_DROP_PREFIX) :]
+            try:
+                get_chroma_client(self.chroma_path).delete_collection(
+                    name=collection_name
+                )
+                print(f"Successfully deleted collection: {collection_name}")
+            except Exception as e:
+                print(
+                    f"Could not delete collection '{collection_name}'. It may not exist. Error: {e}"
+                )
+                # Continue even if collection deletion fails, as DB entry is main record
+            self.shared_state.delete(key)
+
+        if pending:
+            # Clear from memory in other processes
+            self.publish_vector_change()
+        return len(pending)
 
+    def get_github_repo(self, repo_url: str):
         # Extract owner and repo name from URL
         parts = repo_url.replace("https://github.com/", "").split("/")
         owner, repo_name = parts[0], parts[1]
+        return self.github.get_repo(f"{owner}/{repo_name}")
 
-        repo = self.github.get_repo(f"{owner}/{repo_name}")
-        files = []
+    def get_head_commit_sha(self, repo) -> str:
+        return repo.get_branch(repo.default_branch).commit.sha
+
+    def iter_repo_files(
+        self,
+        repo_url: str,
+        file_extensions: List[str] = None,
+        fetch_mode: Optional[str] = None,
+        ref: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield files from a GitHub repository one at a time.
+
+        `fetch_mode` is either "archive" (one tarball download, streamed) or
+        "contents" (one contents API call per directory). `ref` pins the
+        fetch to a commit and defaults to the head of the default branch.
+        """
+        if file_extensions is None:
+            file_extensions = settings.file_extenions
+        if fetch_mode is None:
+            fetch_mode = settings.repo_fetch_mode
+
+        repo = self.get_github_repo(repo_url)
+        if ref is None:
+            # Pin the fetch to a commit so file URLs stay valid
+            ref = self.get_head_commit_sha(repo)
+
+        if fetch_mode == "archive":
+            started = False
+            try:
+                for file_data in self.iter_repo_files_from_archive(
+                    repo, file_extensions, ref
+                ):
+                    started = True
+                    yield file_data
+                return
+            except Exception as e:
+                # Files already handed out can't be taken back
+                if started:
+                    raise
+                print(
+                    f"Archive fetch failed for {repo_url}, falling back to contents API: {e}"
+                )
 
         def get_files_recursive(contents):
             for content in contents:
                 if content.type == "dir":
-                    get_files_recursive(repo.get_contents(content.path))
+                    yield from get_files_recursive(
+                        repo.get_contents(content.path, ref=ref)
+                    )
                 else:
                     file_ext = Path(content.path).suffix
                     if file_ext in file_extensions:
@@ -165,19 +370,142 @@ class GitHubRepoAssistant:
                             file_content = base64.b64decode(content.content).decode(
                                 "utf-8"
                             )
-                            files.append(
-                                {
-                                    "path": content.path,
-                                    "content": file_content,
-                                    "size": content.size,
-                                    "url": content.html_url,
-                                }
-                            )
                         except Exception as e:
                             print(f"Error reading file {content.path}: {e}")
+                            continue
+                        yield {
+                            "path": content.path,
+                            "content": file_content,
+                            "size": content.size,
+                            "url": content.html_url,
+                        }
+
+        yield from get_files_recursive(repo.get_contents("", ref=ref))
+
+    def iter_repo_files_from_archive(
+        self,
+        repo,
+        file_extensions: List[str],
+        ref: str,
+        include_paths: Optional[Set[str]] = None,
+        skipped_paths: Optional[Set[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield files by downloading the repository tarball once and
+        streaming its members, instead of walking the contents API
+        """
+        archive_url = repo.get_archive_link("tarball", ref=ref)
+
+        response = download_repo_archive(
+            archive_url, timeout=settings.archive_download_timeout
+        )
+        with response:
+            yield from iter_archive_files(
+                response.raw,
+                file_extensions,
+                blob_url_prefix=f"{repo.html_url}/blob/{ref}",
+                include_paths=include_paths,
+                skipped_paths=skipped_paths,
+            )
+
+    def iter_files_at_ref(
+        self, repo, file_paths: Set[str], ref: str, failed_paths: Set[str]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield specific files at a commit. Small change sets use one contents
+        call per file; larger ones stream the tarball and keep only those paths.
+
+        Files that could not be fetched are added to `failed_paths`. Files
+        that are not UTF-8 text are skipped, as in a full ingestion.
+        """
+        if len(file_paths) > settings.incremental_archive_threshold:
+            yielded, undecodable = set(), set()
+            for file_data in self.iter_repo_files_from_archive(
+                repo,
+                settings.file_extenions,
+                ref,
+                include_paths=file_paths,
+                skipped_paths=undecodable,
+            ):
+                yielded.add(file_data["path"])
+                yield file_data
+            failed_paths.update(file_paths - yielded - undecodable)
+            return
+
+        for file_path in sorted(file_paths):
+            try:
+                content = repo.get_contents(file_path, ref=ref)
+            except Exception as e:
+                print(f"Error fetching file {file_path}: {e}")
+                failed_paths.add(file_path)
+                continue
+            try:
+                file_content = base64.b64decode(content.content).decode("utf-8")
+            except Exception as e:
+                print(f"Error reading file {file_path}: {e}")
+                continue
+            yield {
+                "path": content.path,
+                "content": file_content,
+                "size": content.size,
+                "url": content.html_url,
+            }
+
+    def get_changed_files(
+        self, repo, base_sha: str, head_sha: str
+    ) -> Optional[Tuple[Set[str], Set[str]]]:
+        """
+        Diff two commits and return (paths to re-ingest, paths to remove),
+        limited to ingested file types. Returns None when the diff can't be
+        trusted for an incremental update and a full rebuild is needed.
+        """
+        try:
+            comparison = repo.compare(base_sha, head_sha)
+        except Exception as e:
+            print(f"Could not compare {base_sha}...{head_sha}: {e}")
+            return None
+
+        # History was rewritten, or the file list was truncated by the API
+        if comparison.status not in ("ahead", "identical"):
+            return None
+        changed_files = list(comparison.files)
+        if len(changed_files) >= settings.compare_max_files:
+            return None
+
+        def is_code(path: Optional[str]) -> bool:
+            return bool(path) and Path(path).suffix in settings.file_extenions
+
+        upserted, removed = set(), set()
+        for changed in changed_files:
+            if changed.status == "removed":
+                if is_code(changed.filename):
+                    removed.add(changed.filename)
+                continue
+            if changed.status == "renamed" and is_code(changed.previous_filename):
+                removed.add(changed.previous_filename)
+            if is_code(changed.filename):
+                upserted.add(changed.filename)
+
+        return upserted, removed
+
+    def delete_file_vectors(
+        self, vector_db: ChromaDb, repo_id: int, file_paths: Optional[Set[str]] = None
+    ):
+        """
+        Delete a repository's vectors, either all of them or only those of
+        `file_paths`.
+        """
+        if not vector_db.exists():
+            return
+
+        where: Dict[str, Any] = {"repo_id": repo_id}
+        if file_paths is not None:
+            if not file_paths:
+                return
+            where = {"$and": [where, {"file_path": {"$in": sorted(file_paths)}}]}
 
-        get_files_recursive(repo.get_contents(""))
-        return files
+        collection = vector_db.client.get_collection(name=vector_db.collection_name)
+        collection.delete(where=where)
 
     def extract_code_elements(
         self, file_content: str, file_path: str
@@ -227,19 +555,33 @@ class GitHubRepoAssistant:
         self, file_content: str, file_path: str, code_elements: Dict[str, Any]
     ) -> str:
         """
-        Generate summary using Groq LLM
+        Generate summary using Groq LLM, reusing a cached summary when the
+        same content was already summarized with the same model and prompt
         """
-        prompt = f"""
+        content_hash = self.summary_cache.hash_content(file_content)
+        cache_key = (
+            content_hash,
+            settings.GROQ_Summarizer_MODEL_ID,
+            settings.SUMMARY_PROMPT_VERSION,
+        )
+        try:
+            cached = self.summary_cache.get(*cache_key)
+            if cached is not None:
+                return cached
+        except Exception as e:
+            print(f"Summary cache lookup failed for {file_path}: {e}")
+
+        template = """
         Analyze this code file and provide a comprehensive summary:
         
         File: {file_path}
         
-        Functions found: {[f["name"] for f in code_elements["functions"]]}
-        Classes found: {[c["name"] for c in code_elements["classes"]]}
+        Functions found: {functions}
+        Classes found: {classes}
         
         Code:
         ```
-        {file_content[:2000]}  # Truncate for API limits
+        {code}
         ```
         
         Please provide:
@@ -251,18 +593,105 @@ class GitHubRepoAssistant:
         
         Keep the summary concise but informative.
         """
+        # Symbol lists get a quarter of what the instructions leave, code the
+        # rest; whatever one of them doesn't need goes to the other
+        functions, classes, code = self.summary_budget.allocate(
+            template.format(file_path=file_path, functions="", classes="", code=""),
+            [
+                (str([f["name"] for f in code_elements["functions"]]), 1),
+                (str([c["name"] for c in code_elements["classes"]]), 1),
+                (file_content, 6),
+            ],
+        )
+        prompt = template.format(
+            file_path=file_path, functions=functions, classes=classes, code=code
+        )
+
+        summary = self.complete_with_summarizer(
+            prompt, settings.summarizer_completion_tokens, file_path
+        )
+        if summary is None:
+            return f"File: {file_path}\nContent preview: {file_content[:200]}..."
+        try:
+            self.summary_cache.put(*cache_key, summary)
+        except Exception as e:
+            print(f"Could not cache summary for {file_path}: {e}")
+        return summary
 
+    def complete_with_summarizer(
+        self, prompt: str, max_tokens: int, label: str
+    ) -> Optional[str]:
+        """
+        One summarizer completion through the LLM gateway, paced by the
+        shared rate limiter. None if it fails.
+        """
         try:
-            response = self.groq_client.chat.completions.create(
-                model=settings.GROQ_Summarizer_MODEL_ID,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
+            return self.llm.complete(
+                settings.GROQ_Summarizer_MODEL_ID,
+                [{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
                 temperature=0.3,
+                label=label,
+                max_retries=settings.summarizer_max_retries,
+                limiter=self.summary_limiter,
             )
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"Error generating summary for {file_path}: {e}")
-            return f"File: {file_path}\nContent preview: {file_content[:200]}..."
+        except LLMError as e:
+            print(f"Error generating summary for {label}: {e}")
+            return None
+
+    def build_document(
+        self,
+        repo_url: str,
+        repo_id: int,
+        file_data: Dict[str, Any],
+        code_elements: Dict[str, Any],
+        summary: str,
+    ) -> Tuple[CodeSummary, Dict[str, Any]]:
+        """
+        Build the stored file summary and the vector store document for a file.
+        Only a preview of the content is kept, so nothing downstream holds
+        on to whole files.
+        """
+        file_path = file_data["path"]
+        content_preview = file_data["content"][:500]
+
+        code_summary = CodeSummary(
+            file_path=file_path,
+            content_preview=content_preview,
+            summary=summary,
+            functions=code_elements["functions"],
+            classes=code_elements["classes"],
+            metadata={
+                "repo_url": repo_url,
+                "repo_id": repo_id,
+                "file_size": file_data["size"],
+                "file_url": file_data["url"],
+            },
+        )
+
+        # Prepare document for vector storage
+        document_text = f"""
+                File: {file_path}
+            
+                Summary: {summary}
+            
+                Functions: {", ".join([f["name"] for f in code_elements["functions"]])}
+                Classes: {", ".join([c["name"] for c in code_elements["classes"]])}
+            
+                Content Preview:
+                {content_preview}
+                """
+
+        document = {
+            "content": document_text,
+            "metadata": {
+                "file_path": file_path,
+                "repo_url": repo_url,
+                "repo_id": repo_id,
+                "type": "code_file",
+            },
+        }
+        return code_summary, document
 
     def fetch_github_metadata(self, repo_url: str):
         # Extract owner/repo from URL
@@ -298,12 +727,20 @@ class GitHubRepoAssistant:
             "last_activity": last_activity,
         }
 
-    def process_repository(self, repo_url: str) -> Tuple[bool, int]:
+    def process_repository(
+        self, repo_url: str, progress: Optional[Callable[..., None]] = None
+    ) -> Tuple[bool, int]:
         """
         Main workflow: GitHub Repo → Store URLs in db with ID → Parse Code → Summarize → Store in VectorDB
+
+        `progress(stage, **counts)` is called as the ingestion moves through
+        stages ("metadata", "fetch", "index", "rollup", "done", or "failed"
+        with `error`).
         """
+        report = progress or (lambda stage, **counts: None)
         try:
             print(f"=============Processing repository: {repo_url}")
+            report("metadata")
 
             # Add repository to database
             repo_id = self.repo_manager.add_repository(repo_url)
@@ -325,121 +762,279 @@ class GitHubRepoAssistant:
                 f"=============Added repository in db with col name and ID: {collection_name}, {repo_id}"
             )
 
-            # Create vector DB and knowledge base for this repository
+            # Create vector DB for this repository
             vector_db = self.get_or_create_vector_db(repo_id, collection_name)
-            knowledge_base = self.get_or_create_knowledge_base(repo_id, vector_db)
 
-            # Initialize repo summaries for this repository
-            if repo_id not in self.repo_summaries:
-                self.repo_summaries[repo_id] = []
-
-            # Step 1: Fetch repository files
-            print("=============Fetching repository files...")
-            files = self.fetch_repo_files(repo_url)
-            print(f"=============Found {len(files)} code files")
-
-            # Step 2-4: Parse, summarize, and prepare for vector storage
+            # Repositories ingested before the symbol table existed have no
+            # stored summaries; rebuild them (the summary cache makes it cheap)
+            summaries_loaded = self.symbol_store.has_files(repo_id)
+
+            # Step 1: Fetch repository files, or only those changed since the
+            # last ingested commit
+            report("fetch", repo_id=repo_id)
+            github_repo = self.get_github_repo(repo_url)
+            head_sha = self.get_head_commit_sha(github_repo)
+            last_sha = self.repo_manager.get_last_commit_sha(repo_id)
+
+            changes = None
+            failed_paths: Set[str] = set()
+            if summaries_loaded and last_sha == head_sha:
+                print(f"=============Repository is up to date at {head_sha}")
+                if not self.rollup_store.has_rollups(repo_id):
+                    # Ingested before rollups existed
+                    report("rollup", repo_id=repo_id)
+                    self.update_rollups(repo_id, repo_url)
+                report("done", repo_id=repo_id, files=0, vectors=0)
+                return True, repo_id
+            if summaries_loaded and last_sha:
+                changes = self.get_changed_files(github_repo, last_sha, head_sha)
+
+            if changes is not None:
+                upserted, removed = changes
+                print(
+                    f"=============Incremental update {last_sha[:7]}..{head_sha[:7]}: "
+                    f"{len(upserted)} changed, {len(removed)} removed"
+                )
+                stale_paths = upserted | removed
+                self.delete_file_vectors(vector_db, repo_id, stale_paths)
+                self.symbol_store.delete_files(repo_id, stale_paths)
+                files = self.iter_files_at_ref(
+                    github_repo, upserted, head_sha, failed_paths
+                )
+            else:
+                # First ingestion, or a diff we can't trust: rebuild from scratch.
+                # Forget the old SHA first: if the rebuild stops partway, the
+                # next sync must rebuild again, not diff from the old commit
+                self.repo_manager.update_last_commit_sha(repo_id, None)
+                self.delete_file_vectors(vector_db, repo_id)
+                self.symbol_store.delete_files(repo_id)
+                files = self.iter_repo_files(repo_url, ref=head_sha)
+
+            # Step 2-5: Stream files through parse → summarize → embed/store.
+            # Bounded hand-offs keep only a window of files in memory.
             print("=============Processing files...")
-            documents = []
-
-            for file_data in files:
-                file_path = file_data["path"]
-                file_content = file_data["content"]
-
-                print(f"=============Processing: {file_path}")
-
-                # Extract code elements directly
-                code_elements = self.extract_code_elements(file_content, file_path)
+            vector_db.create()
+            collection = vector_db.client.get_collection(name=vector_db.collection_name)
+            batch: List[Dict[str, Any]] = []
+            batch_summaries: List[CodeSummary] = []
+            counts = {"files": 0, "vectors": 0}
+            started = time.perf_counter()
+
+            def parse(file_data: Dict[str, Any]):
+                print(f"=============Processing: {file_data['path']}")
+                code_elements = self.extract_code_elements(
+                    file_data["content"], file_data["path"]
+                )
+                return file_data, code_elements
 
-                # Generate summary with LLM
+            def summarize(item):
+                file_data, code_elements = item
+                # Generate summary with LLM, rate limited across workers
                 summary = self.summarize_with_llm(
-                    file_content, file_path, code_elements
+                    file_data["content"], file_data["path"], code_elements
                 )
-
-                # Create code summary object
-                code_summary = CodeSummary(
-                    file_path=file_path,
-                    content=file_content,
-                    summary=summary,
-                    functions=code_elements["functions"],
-                    classes=code_elements["classes"],
-                    metadata={
-                        "repo_url": repo_url,
-                        "repo_id": repo_id,
-                        "file_size": file_data["size"],
-                        "file_url": file_data["url"],
-                    },
+                return self.build_document(
+                    repo_url, repo_id, file_data, code_elements, summary
                 )
 
-                self.repo_summaries[repo_id].append(code_summary)
+            def flush():
+                if batch:
+                    counts["vectors"] += self.indexer.index_documents(collection, batch)
+                    self.symbol_store.save_files(repo_id, batch_summaries)
+                    batch.clear()
+                    batch_summaries.clear()
+                    report("index", repo_id=repo_id, **counts)
+
+            def store(item):
+                code_summary, document = item
+                batch_summaries.append(code_summary)
+                batch.append(document)
+                counts["files"] += 1
+                if len(batch) >= settings.embed_batch_size:
+                    flush()
+
+            BoundedPipeline(
+                [
+                    ("parse", parse, 1),
+                    ("summarize", summarize, settings.summarizer_concurrency),
+                ],
+                window=settings.ingest_window_size,
+            ).run(files, store)
+            flush()
 
-                # Prepare document for vector storage
-                document_text = f"""
-                File: {file_path}
-            
-                Summary: {summary}
-            
-                Functions: {", ".join([f["name"] for f in code_elements["functions"]])}
-                Classes: {", ".join([c["name"] for c in code_elements["classes"]])}
-            
-                Content Preview:
-                {file_content[:500]}
-                """
+            report("rollup", repo_id=repo_id, **counts)
+            self.update_rollups(repo_id, repo_url)
 
-                documents.append(
-                    {
-                        "content": document_text,
-                        "metadata": {
-                            "file_path": file_path,
-                            "repo_url": repo_url,
-                            "repo_id": repo_id,
-                            "type": "code_file",
-                        },
-                    }
+            print(
+                f"================Stored {counts['vectors']} vectors for {counts['files']} files "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            if failed_paths:
+                # Keep the old SHA so the next sync diffs these files again
+                print(
+                    f"================Could not fetch {len(failed_paths)} changed files, "
+                    f"keeping last ingested commit {last_sha[:7]}: {sorted(failed_paths)}"
                 )
-
-            # Step 5: Store in Vector Database
-            print("================Storing in vector database...")
-
-            if documents:
-                for doc in documents:
-                    knowledge_base.load_text(
-                        text=doc["content"],
-                        filters=doc["metadata"],
-                    )
+            else:
+                self.repo_manager.update_last_commit_sha(repo_id, head_sha)
+            # Cached chat answers describe the previous contents
+            self.answer_cache.invalidate(repo_id)
+            self.publish_vector_change()
             print(
-                f"================Successfully processed {len(files)} files from {repo_url}"
+                f"================Successfully processed {counts['files']} files from {repo_url}"
             )
 
+            try:
+                evicted = self.summary_cache.evict()
+                if evicted:
+                    print(f"================Evicted {evicted} stale summary cache entries")
+            except Exception as e:
+                print(f"Summary cache eviction failed: {e}")
+
+            report("done", repo_id=repo_id, failed_files=len(failed_paths), **counts)
             return True, repo_id
         except Exception as e:
             print(f"Error Occured in Repository Processing {e}")
+            report("failed", error=str(e))
             return False, -1
 
-    def query_repository(self, repo_id: int, question: str) -> str:
+    def update_rollups(self, repo_id: int, repo_url: str):
+        """Rewrite the directory and repository rollups whose files changed."""
+        if not settings.rollup_enabled:
+            return
+        started = time.perf_counter()
+        try:
+            stats = self.rollup_builder.update(repo_id, repo_url)
+        except Exception as e:
+            # Rollups are an optimization; the next ingestion retries
+            print(f"Could not update rollups for {repo_url}: {e}")
+            return
+        print(
+            f"================Rollups: {stats['rewritten']} rewritten, "
+            f"{stats['reused']} reused in {time.perf_counter() - started:.1f}s"
+        )
+
+    def get_repository_overview(self, repo_id: int) -> str:
+        return repository_overview(
+            self.rollup_store,
+            repo_id,
+            settings.rollup_overview_tokens,
+            self.summary_budget.count,
+        )
+
+    def load_repo_agent(self, repo_id: int) -> Optional[Agent]:
         """
-        Query the repository using the agent
+        Build a chat agent for a repository, loading its shared components
+        if needed
         """
         repo_data = self.repo_manager.get_repository(repo_id)
         if not repo_data:
-            return "Repository not found."
+            return None
 
         # Ensure components are loaded for the repo
         _, collection_name = repo_data
-        vector_db = self.get_or_create_vector_db(repo_id, collection_name)
-        knowledge_base = self.get_or_create_knowledge_base(repo_id, vector_db)
-        agent = self.get_or_create_agent(repo_id, knowledge_base)
+        components = self.get_repo_components(repo_id, collection_name)
+        return self.create_agent(components.knowledge_base, repo_id)
 
-        return agent.run(question).content
+    def lookup_cached_answer(
+        self, repo_id: int, question: str
+    ) -> Tuple[Optional[str], Optional[str], Optional[np.ndarray]]:
+        """
+        Look the question up in the answer cache. Returns (answer or None,
+        commit the lookup was made against, question embedding) so a miss can
+        be stored afterwards. Cache failures count as misses.
+        """
+        commit_sha = self.repo_manager.get_last_commit_sha(repo_id)
+        if not settings.answer_cache_enabled:
+            return None, commit_sha, None
+        try:
+            answer, embedding = self.answer_cache.lookup(
+                repo_id, commit_sha, question, self.indexer.embed_query
+            )
+            return answer, commit_sha, embedding
+        except Exception as e:
+            print(f"Answer cache lookup failed: {e}")
+            return None, commit_sha, None
+
+    def store_cached_answer(
+        self,
+        repo_id: int,
+        commit_sha: Optional[str],
+        question: str,
+        answer: Optional[str],
+        embedding: Optional[np.ndarray],
+    ):
+        if not settings.answer_cache_enabled or not answer:
+            return
+        try:
+            self.answer_cache.put(repo_id, commit_sha, question, answer, embedding)
+        except Exception as e:
+            print(f"Could not cache answer: {e}")
+
+    def query_repository(self, repo_id: int, question: str) -> str:
+        """
+        Query the repository using the agent
+        """
+        agent = self.load_repo_agent(repo_id)
+        if agent is None:
+            return "Repository not found."
+
+        cached, commit_sha, embedding = self.lookup_cached_answer(repo_id, question)
+        if cached is not None:
+            return cached
+
+        answer = agent.run(question).content
+        self.store_cached_answer(repo_id, commit_sha, question, answer, embedding)
+        return answer
+
+    def stream_repository(self, repo_id: int, question: str) -> Iterator[str]:
+        """
+        Query the repository, yielding the answer in chunks as the model
+        produces them. Closing the iterator stops the run.
+        """
+        agent = self.load_repo_agent(repo_id)
+        if agent is None:
+            yield "Repository not found."
+            return
+
+        cached, commit_sha, embedding = self.lookup_cached_answer(repo_id, question)
+        if cached is not None:
+            yield cached
+            return
+
+        parts: List[str] = []
+        for event in agent.run(question, stream=True):
+            # Tool calls and run lifecycle events carry no answer text
+            if isinstance(event, RunResponseContentEvent) and isinstance(
+                event.content, str
+            ):
+                parts.append(event.content)
+                yield event.content
+        # Only reached when the stream was consumed to the end
+        self.store_cached_answer(
+            repo_id, commit_sha, question, "".join(parts), embedding
+        )
 
     def get_file_summary(self, repo_id: int, file_path: str) -> Optional[CodeSummary]:
         """
         Get summary for a specific file
         """
-        for summary in self.repo_summaries.get(repo_id, []):
-            if summary.file_path == file_path:
-                return summary
-        return None
+        repo_file = self.symbol_store.get_file(repo_id, file_path)
+        if repo_file is None:
+            return None
+        symbols = self.symbol_store.list_symbols(repo_id, file_path=file_path)
+        return CodeSummary(
+            file_path=repo_file.file_path,
+            content_preview=repo_file.content_preview or "",
+            summary=repo_file.summary,
+            functions=[s for s in symbols if s["kind"] == "function"],
+            classes=[s for s in symbols if s["kind"] == "class"],
+            metadata={
+                "repo_id": repo_id,
+                "file_size": repo_file.file_size,
+                "file_url": repo_file.file_url,
+            },
+        )
 
     def list_functions(
         self, repo_id: int, file_path: Optional[str] = None
@@ -447,11 +1042,7 @@ class GitHubRepoAssistant:
         """
         List all functions, optionally filtered by file
         """
-        functions = []
-        for summary in self.repo_summaries.get(repo_id, []):
-            if file_path is None or summary.file_path == file_path:
-                functions.extend(summary.functions)
-        return functions
+        return self.symbol_store.list_symbols(repo_id, "function", file_path)
 
     def list_classes(
         self, repo_id: int, file_path: Optional[str] = None
@@ -459,11 +1050,24 @@ class GitHubRepoAssistant:
         """
         List all classes, optionally filtered by file
         """
-        classes = []
-        for summary in self.repo_summaries.get(repo_id, []):
-            if file_path is None or summary.file_path == file_path:
-                classes.extend(summary.classes)
-        return classes
+        return self.symbol_store.list_symbols(repo_id, "class", file_path)
+
+    def find_symbols(
+        self,
+        repo_id: int,
+        name: str,
+        match: str = "exact",
+        kind: Optional[str] = None,
+        file_path: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find functions/classes by exact name, name prefix or fuzzy match,
+        optionally only those of one kind or in one file
+        """
+        return self.symbol_store.search_symbols(
+            repo_id, name, match, kind, file_path, limit
+        )
 
 
 # # Usage Example
@@ -0,0 +1,69 @@
+import tarfile
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Set
+
+import requests
+
+
+def download_repo_archive(archive_url: str, timeout: int = 60) -> requests.Response:
+    """
+    Open a streaming download of a repository tarball.
+
+    The caller is responsible for closing the returned response.
+    """
+    response = requests.get(archive_url, stream=True, timeout=timeout)
+    response.raise_for_status()
+    # Let urllib3 undo any transfer encoding so tarfile sees the raw gzip stream
+    response.raw.decode_content = True
+    return response
+
+
+def iter_archive_files(
+    fileobj: IO[bytes],
+    file_extensions: List[str],
+    blob_url_prefix: str = "",
+    include_paths: Optional[Set[str]] = None,
+    skipped_paths: Optional[Set[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream code files out of a gzipped repository tarball.
+
+    Members are read sequentially, so the archive never has to be held in
+    memory or on disk. GitHub tarballs wrap everything in a single
+    `<owner>-<repo>-<sha>/` directory, which is stripped from the paths.
+    If `include_paths` is given, only those files are read. Files that
+    can't be decoded as UTF-8 are skipped and added to `skipped_paths`.
+    """
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+
+            parts = member.name.split("/", 1)
+            if len(parts) < 2 or not parts[1]:
+                continue
+            file_path = parts[1]
+
+            # Apply the extension filter before touching the member's data
+            if Path(file_path).suffix not in file_extensions:
+                continue
+            if include_paths is not None and file_path not in include_paths:
+                continue
+
+            try:
+                extracted = archive.extractfile(member)
+                if extracted is None:
+                    continue
+                file_content = extracted.read().decode("utf-8")
+            except Exception as e:
+                print(f"Error reading file {file_path}: {e}")
+                if skipped_paths is not None:
+                    skipped_paths.add(file_path)
+                continue
+
+            yield {
+                "path": file_path,
+                "content": file_content,
+                "size": member.size,
+                "url": f"{blob_url_prefix}/{file_path}" if blob_url_prefix else "",
+            }
@@ -0,0 +1,103 @@
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+from fastembed import TextEmbedding
+
+from core.resources import get_text_embedding
+
+
+class VectorIndexer:
+    """
+    Bulk indexing path for repository documents.
+
+    Documents are split into chunks, embedded in batches with a single
+    FastEmbed model instance, and written with one `collection.upsert` per
+    batch. Ids are derived from (repo_id, file_path, chunk_index), so
+    re-indexing a file overwrites its vectors instead of duplicating them.
+    """
+
+    def __init__(
+        self, model_name: str, batch_size: int = 64, chunk_chars: int = 2000
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.chunk_chars = chunk_chars
+        self._model = None
+
+    @property
+    def model(self) -> TextEmbedding:
+        # Loading the ONNX model is expensive, so share one per process
+        if self._model is None:
+            self._model = get_text_embedding(self.model_name)
+        return self._model
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Unit-length embedding of a short text, for similarity lookups."""
+        embedding = np.asarray(next(iter(self.model.embed([text]))), dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    @staticmethod
+    def document_id(repo_id: int, file_path: str, chunk_index: int) -> str:
+        return f"{repo_id}:{file_path}:{chunk_index}"
+
+    def chunk_text(self, text: str) -> List[str]:
+        """
+        Split text into `chunk_chars` pieces. The embedding model ignores
+        everything past its input window, so chunks should fit inside it.
+        """
+        text = text.replace("\x00", "\ufffd")
+        if len(text) <= self.chunk_chars:
+            return [text]
+        return [
+            text[start : start + self.chunk_chars]
+            for start in range(0, len(text), self.chunk_chars)
+        ]
+
+    def index_documents(
+        self, collection, documents: Iterable[Dict[str, Any]]
+    ) -> int:
+        """
+        Embed and upsert documents shaped like {"content": str, "metadata": dict}.
+        The metadata must carry `repo_id` and `file_path`. Returns the number
+        of chunks written.
+        """
+        ids: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        written = 0
+
+        def flush():
+            nonlocal written
+            if not ids:
+                return
+            embeddings = [
+                embedding.tolist()
+                for embedding in self.model.embed(texts, batch_size=self.batch_size)
+            ]
+            collection.upsert(
+                ids=list(ids),
+                embeddings=embeddings,
+                documents=list(texts),
+                metadatas=list(metadatas),
+            )
+            written += len(ids)
+            ids.clear()
+            texts.clear()
+            metadatas.clear()
+
+        for doc in documents:
+            metadata = doc["metadata"]
+            for chunk_index, chunk in enumerate(self.chunk_text(doc["content"])):
+                ids.append(
+                    self.document_id(
+                        metadata["repo_id"], metadata["file_path"], chunk_index
+                    )
+                )
+                texts.append(chunk)
+                metadatas.append({**metadata, "chunk_index": chunk_index})
+                if len(ids) >= self.batch_size:
+                    flush()
+        flush()
+
+        return written
@@ -0,0 +1,161 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+# Marks the end of a stream between stages
+_DONE = object()
+
+# (name, function, number of worker threads)
+Stage = Tuple[str, Callable[[Any], Any], int]
+
+
+class PipelineError(Exception):
+    """Raised in the caller when a pipeline stage fails."""
+
+
+class BoundedPipeline:
+    """
+    Run a source iterator through worker stages into a sink, with bounded
+    queues between stages.
+
+    The source may only have `window` items in flight, counted until the
+    sink has consumed them, so a slow stage (e.g. rate-limited
+    summarization) holds back the fetcher instead of letting items pile
+    up in memory. The window also bounds the buffer that restores source
+    order when a stage runs several workers. A stage may return None to
+    drop an item.
+    """
+
+    def __init__(self, stages: List[Stage], window: int = 32):
+        self.stages = stages
+        self.window = max(1, window)
+        self._slots = threading.Semaphore(self.window)
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+
+    def _fail(self, error: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_source(self, source: Iterable[Any], out_q: queue.Queue):
+        try:
+            for seq, item in enumerate(source):
+                while not self._slots.acquire(timeout=0.1):
+                    if self._stop.is_set():
+                        return
+                if not self._put(out_q, (seq, item)):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # Release whatever the source holds open (e.g. an archive download)
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+            self._put(out_q, _DONE)
+
+    def _run_worker(
+        self, func: Callable[[Any], Any], in_q: queue.Queue, out_q: queue.Queue
+    ):
+        while True:
+            entry = self._get(in_q)
+            if entry is _DONE:
+                # Let sibling workers see the end of the stream too
+                self._put(in_q, _DONE)
+                return
+            seq, item = entry
+            try:
+                result = func(item) if item is not None else None
+            except BaseException as e:
+                self._fail(e)
+                return
+            if not self._put(out_q, (seq, result)):
+                return
+
+    def _close_stage(self, workers: List[threading.Thread], out_q: queue.Queue):
+        for worker in workers:
+            worker.join()
+        self._put(out_q, _DONE)
+
+    def run(self, source: Iterable[Any], sink: Callable[[Any], None]):
+        # The window caps items in flight, so these queues never fill up
+        queues = [
+            queue.Queue(maxsize=self.window + 1) for _ in range(len(self.stages) + 1)
+        ]
+        threads = [
+            threading.Thread(
+                target=self._run_source,
+                args=(source, queues[0]),
+                name="pipeline-source",
+                daemon=True,
+            )
+        ]
+
+        for index, (name, func, workers) in enumerate(self.stages):
+            stage_workers = [
+                threading.Thread(
+                    target=self._run_worker,
+                    args=(func, queues[index], queues[index + 1]),
+                    name=f"pipeline-{name}-{n}",
+                    daemon=True,
+                )
+                for n in range(max(1, workers))
+            ]
+            threads.extend(stage_workers)
+            threads.append(
+                threading.Thread(
+                    target=self._close_stage,
+                    args=(stage_workers, queues[index + 1]),
+                    name=f"pipeline-{name}-close",
+                    daemon=True,
+                )
+            )
+
+        for thread in threads:
+            thread.start()
+
+        # Restore source order; only out-of-order items wait in this buffer
+        pending = {}
+        next_seq = 0
+        try:
+            while True:
+                entry = self._get(queues[-1])
+                if entry is _DONE:
+                    break
+                seq, result = entry
+                pending[seq] = result
+                while next_seq in pending:
+                    result = pending.pop(next_seq)
+                    next_seq += 1
+                    if result is not None:
+                        sink(result)
+                    self._slots.release()
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise PipelineError(str(self._error)) from self._error
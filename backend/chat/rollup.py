@@ -0,0 +1,252 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from core.tokens import PromptBudget
+from db.rollup_db import ROOT_PATH, RollupStoreManager
+from db.symbol_db import SymbolStoreManager
+
+DIRECTORY_PROMPT = """
+Below are summaries of the files and subdirectories in the `{path}` directory of the {repo} repository.
+Write a compact overview of this directory in at most 150 words: what it is responsible for, its main components and how they fit together. Mention file or directory names only when they matter.
+
+{children}
+"""
+REPOSITORY_PROMPT = """
+Below are summaries of the top-level files and directories of the {repo} repository.
+Write a compact overview of the whole repository in at most 250 words: what it does, its architecture, the main components and how they interact, and where execution starts.
+
+{children}
+"""
+PART_PROMPT = """
+Below are summaries of some of the files and subdirectories in `{path}` of the {repo} repository.
+Summarize what they are responsible for in at most 150 words.
+
+{children}
+"""
+SEPARATOR = "\n\n---\n\n"
+
+
+def rollup_dir(file_path: str, max_depth: int) -> str:
+    """The rollup directory of a file: its directory, cut to `max_depth` parts."""
+    parts = file_path.split("/")[:-1]
+    return "/".join(parts[:max_depth])
+
+
+def parent_dir(path: str) -> str:
+    return path.rpartition("/")[0]
+
+
+def depth_of(path: str) -> int:
+    return path.count("/") + 1 if path else 0
+
+
+def repository_overview(
+    rollup_store: RollupStoreManager,
+    repo_id: int,
+    max_tokens: int,
+    count_tokens: Callable[[str], int],
+) -> str:
+    """
+    The repository rollup and the largest top-level directories' rollups,
+    within `max_tokens`. Empty if the repository has none yet.
+    """
+    sections, used = [], 0
+    for rollup in rollup_store.list_rollups(repo_id, max_depth=1):
+        title = f"{rollup['path']}/" if rollup["path"] else "Repository overview"
+        section = f"{title} ({rollup['file_count']} files):\n{rollup['summary']}"
+        cost = count_tokens(section)
+        if used + cost > max_tokens:
+            continue
+        sections.append(section)
+        used += cost
+    return SEPARATOR.join(sections)
+
+
+class RollupBuilder:
+    """
+    Map-reduce summaries of a repository: file summaries → directory
+    rollups → one repository rollup.
+
+    Directories down to `max_depth` get a rollup written from the summaries
+    of their files (files deeper down count toward their ancestor at
+    `max_depth`) and the rollups of their subdirectories. A rollup's input
+    hash covers the hashes of all its children, so after an incremental
+    ingestion only the changed directories and their ancestors are rewritten.
+    Directories at the same depth don't depend on each other and are
+    summarized `concurrency` at a time. A directory whose children don't fit
+    one prompt is summarized in parts first, then the parts are combined.
+    """
+
+    def __init__(
+        self,
+        symbol_store: SymbolStoreManager,
+        rollup_store: RollupStoreManager,
+        complete: Callable[[str], Optional[str]],
+        budget: PromptBudget,
+        max_depth: int = 2,
+        concurrency: int = 8,
+        prompt_version: str = "1",
+        page_size: int = 500,
+    ):
+        self.symbol_store = symbol_store
+        self.rollup_store = rollup_store
+        self.complete = complete
+        self.budget = budget
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.prompt_version = prompt_version
+        self.page_size = page_size
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _scan(self, repo_id: int) -> Dict[str, Dict[str, str]]:
+        """{rollup directory: {file path: summary hash}}, a page at a time."""
+        files: Dict[str, Dict[str, str]] = {}
+        after = None
+        while True:
+            page = self.symbol_store.list_file_summaries(
+                repo_id, limit=self.page_size, after=after
+            )
+            for file_path, summary in page:
+                directory = rollup_dir(file_path, self.max_depth)
+                files.setdefault(directory, {})[file_path] = self._hash(summary)
+            if len(page) < self.page_size:
+                return files
+            after = page[-1][0]
+
+    def _sections(
+        self, prompt: str, path: str, repo: str, children: List[Tuple[str, str]]
+    ) -> List[List[str]]:
+        """Child sections grouped so each group fits one prompt."""
+        fixed = prompt.format(path=path or "/", repo=repo, children="")
+        room = max(1, self.budget.available - self.budget.count(fixed))
+        groups: List[List[str]] = [[]]
+        used = 0
+        for name, text in children:
+            section = self.budget.fit(f"{name}:\n{text.strip()}", room)
+            cost = self.budget.count(section) + self.budget.count(SEPARATOR)
+            if groups[-1] and used + cost > room:
+                groups.append([])
+                used = 0
+            groups[-1].append(section)
+            used += cost
+        return groups
+
+    def reduce(
+        self, path: str, repo: str, children: List[Tuple[str, str]]
+    ) -> Optional[str]:
+        """Summarize `children` (name, text), in parts if they don't fit."""
+        prompt = REPOSITORY_PROMPT if path == ROOT_PATH else DIRECTORY_PROMPT
+        while True:
+            groups = self._sections(prompt, path, repo, children)
+            if len(groups) == 1:
+                children_text = SEPARATOR.join(groups[0])
+                return self.complete(
+                    prompt.format(path=path or "/", repo=repo, children=children_text)
+                )
+            # Map: summarize each part; reduce: go again over the parts
+            parts = []
+            for i, group in enumerate(groups):
+                children_text = SEPARATOR.join(group)
+                part = self.complete(
+                    PART_PROMPT.format(
+                        path=path or "/", repo=repo, children=children_text
+                    )
+                )
+                if part is None:
+                    return None
+                parts.append((f"Part {i + 1}", part))
+            children = parts
+
+    @staticmethod
+    def fallback(children: List[Tuple[str, str]]) -> str:
+        names = ", ".join(name for name, _ in children[:20])
+        more = f" and {len(children) - 20} more" if len(children) > 20 else ""
+        return f"Contains {names}{more}."
+
+    def update(self, repo_id: int, repo: str) -> Dict[str, int]:
+        """
+        Bring the repository's rollups up to date with its file summaries.
+        Returns how many were rewritten and reused.
+        """
+        files = self._scan(repo_id)
+        if not files:
+            self.rollup_store.delete_rollups(repo_id)
+            return {"rewritten": 0, "reused": 0}
+        stored = self.rollup_store.get_hashes(repo_id)
+
+        # Every rollup directory and its ancestors, with their subdirectories
+        subdirs: Dict[str, Set[str]] = {ROOT_PATH: set()}
+        for directory in files:
+            path = directory
+            subdirs.setdefault(path, set())
+            while path != ROOT_PATH:
+                siblings = subdirs.setdefault(parent_dir(path), set())
+                if path in siblings:
+                    break
+                siblings.add(path)
+                path = parent_dir(path)
+
+        file_counts: Dict[str, int] = {}
+        hashes: Dict[str, Optional[str]] = {}
+        summaries: Dict[str, str] = {}
+        stats = {"rewritten": 0, "reused": 0}
+
+        def build(path: str) -> Optional[dict]:
+            own = files.get(path, {})
+            children = sorted(subdirs[path])
+            file_counts[path] = len(own) + sum(file_counts[c] for c in children)
+            keys = [f"f:{p}:{h}" for p, h in sorted(own.items())]
+            keys += [f"d:{c}:{hashes[c]}" for c in children]
+            input_hash = self._hash(
+                "\n".join([self.prompt_version, self.budget.model_id] + keys)
+            )
+            # Fallbacks are stored without a hash, so they never match
+            if stored.get(path) == input_hash:
+                hashes[path] = input_hash
+                return None
+
+            texts: List[Tuple[str, str]] = []
+            paths = sorted(own)
+            for start in range(0, len(paths), self.page_size):
+                batch = self.symbol_store.get_files(
+                    repo_id, paths[start : start + self.page_size]
+                )
+                texts.extend((f.file_path, f.summary) for f in batch)
+            texts.sort()
+            missing = [c for c in children if c not in summaries]
+            summaries.update(self.rollup_store.get_summaries(repo_id, missing))
+            texts += [(f"{c}/", summaries.get(c, "")) for c in children]
+
+            summary = self.reduce(path, repo, texts)
+            hashes[path] = input_hash if summary is not None else None
+            summaries[path] = summary if summary is not None else self.fallback(texts)
+            return {
+                "path": path,
+                "depth": depth_of(path),
+                "summary": summaries[path],
+                "input_hash": hashes[path],
+                "file_count": file_counts[path],
+            }
+
+        levels: Dict[int, List[str]] = {}
+        for path in subdirs:
+            levels.setdefault(depth_of(path), []).append(path)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # Deepest first: a directory needs its subdirectories' rollups
+            for depth in sorted(levels, reverse=True):
+                rewritten = [
+                    rollup
+                    for rollup in executor.map(build, sorted(levels[depth]))
+                    if rollup is not None
+                ]
+                self.rollup_store.save_rollups(repo_id, rewritten)
+                stats["rewritten"] += len(rewritten)
+                stats["reused"] += len(levels[depth]) - len(rewritten)
+
+        self.rollup_store.delete_rollups(repo_id, keep=subdirs)
+        return stats
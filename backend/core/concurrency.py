@@ -0,0 +1,29 @@
+import functools
+from typing import Any, Callable, Optional, TypeVar
+
+import anyio
+
+from core.config import settings
+
+T = TypeVar("T")
+
+_chat_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def get_chat_limiter() -> anyio.CapacityLimiter:
+    """
+    Limiter for blocking LLM calls made on behalf of chat requests. It is
+    separate from the default threadpool, so slow chats can't take the
+    threads that cheap sync endpoints run on.
+    """
+    global _chat_limiter
+    if _chat_limiter is None:
+        _chat_limiter = anyio.CapacityLimiter(settings.chat_concurrency)
+    return _chat_limiter
+
+
+async def run_chat_call(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking chat call in a worker thread, `chat_concurrency` at a time."""
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs), limiter=get_chat_limiter()
+    )
@@ -1,7 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
-from typing import List
+from typing import Dict, List
 
 load_dotenv()
 
@@ -12,12 +12,15 @@ class Settings(BaseSettings):
     # DB Paths
     chroma_db_path: str = "./data/chroma_db"
     repo_db_path: str = "./data/repositories.db"
+    summary_cache_db_path: str = "./data/summary_cache.db"
 
     # API settings
     API_STR: str = "/api"
 
-    # GitHub settings
+    # GitHub settings; point GITHUB_API_URL at GitHub Enterprise or a local
+    # stand-in (see benchmarks.fixtures.FakeGitHubServer)
     GITHUB_TOKEN: str = os.getenv("GITHUB_PERSONAL_ACCESS_TOKEN", "")
+    GITHUB_API_URL: str = os.getenv("GITHUB_API_URL", "https://api.github.com")
 
     # Groq settings
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
@@ -25,10 +28,140 @@ class Settings(BaseSettings):
     GROQ_CHAT_MODEL_ID: str = "meta-llama/llama-4-scout-17b-16e-instruct"
     GROQ_Summarizer_MODEL_ID: str = "meta-llama/llama-4-scout-17b-16e-instruct"
 
+    # Bump when the summarizer prompt changes to invalidate cached summaries
+    SUMMARY_PROMPT_VERSION: str = "2"
+    # Bump when the rollup prompts change to rewrite every rollup
+    ROLLUP_PROMPT_VERSION: str = "1"
+
     GROQ_Diagram_MODEL_ID: str = "llama3-8b-8192"
     GROQ_POD_MODEL_ID: str = "llama3-8b-8192"
 
+    # LLM gateway (core.llm): "groq", "fake" (canned local answers after
+    # `llm_fake_latency_seconds`, for offline runs and benchmarks) or
+    # "package.module:ClassName" for a custom httpx transport. An empty
+    # GROQ_BASE_URL keeps the SDK's default endpoint.
+    llm_backend: str = "groq"
+    GROQ_BASE_URL: str = os.getenv("GROQ_BASE_URL", "")
+    llm_fake_latency_seconds: float = 0.0
+    # Calls in flight per model (`llm_model_concurrency` overrides by model
+    # id), retries of 429/5xx with exponential backoff, and each call's deadline
+    llm_max_concurrency: int = 8
+    llm_model_concurrency: Dict[str, int] = {}
+    llm_max_retries: int = 3
+    llm_backoff_seconds: float = 1.0
+    llm_max_backoff_seconds: float = 30.0
+    llm_timeout_seconds: float = 60.0
+    # Recent calls kept for usage and latency stats
+    llm_usage_history: int = 1000
+
+    # Prompt budgets (see core.tokens). Model id -> local tokenizer.json for
+    # exact counts; models without one use a fast estimate.
+    tokenizer_files: Dict[str, str] = {}
+    # Summaries don't improve much past this, and input tokens count
+    # against summarizer_tokens_per_minute
+    summarizer_prompt_tokens: int = 1500
+    summarizer_completion_tokens: int = 1000
+
     # Repo Processing Setting
+    # "archive" downloads one tarball per repo, "contents" walks the contents API
+    repo_fetch_mode: str = "archive"
+    archive_download_timeout: int = 60
+
+    # Incremental re-ingestion
+    # Above this many changed files, stream the tarball instead of per-file calls
+    incremental_archive_threshold: int = 50
+    # The compare API lists at most 300 files; a full list forces a rebuild
+    compare_max_files: int = 300
+
+    # Summarizer concurrency and provider budgets
+    summarizer_concurrency: int = 8
+    summarizer_requests_per_minute: int = 30
+    summarizer_tokens_per_minute: int = 30000
+    summarizer_max_retries: int = 5
+
+    # Most files held in memory at once while ingesting
+    ingest_window_size: int = 32
+
+    # Vector indexing
+    embed_batch_size: int = 64
+    # bge-small-en-v1.5 truncates input at 512 tokens (~2000 chars), so
+    # longer documents are split to keep all of their text embedded
+    embed_chunk_chars: int = 2000
+
+    # Ingestion job queue: jobs run at once in the API's ingestion process.
+    # 0 leaves them to a standalone `python -m core.jobs`, which is what
+    # several API workers need; one ingestion process writes at a time
+    ingest_workers: int = 2
+    ingest_writer_lease_seconds: float = 30.0
+    job_poll_interval: float = 1.0
+    job_heartbeat_seconds: int = 15
+    # A running job without a heartbeat for this long is requeued
+    job_stale_after_seconds: int = 120
+    job_max_attempts: int = 3
+    job_shutdown_timeout: float = 5.0
+
+    # Repositories whose vector DB handles stay loaded (least recently used go)
+    max_resident_repos: int = 32
+
+    # Chat LLM calls running at once; more wait in line without blocking the API
+    chat_concurrency: int = 8
+
+    # Chat answer cache: exact normalized match, or embedding similarity
+    answer_cache_enabled: bool = True
+    answer_cache_similarity_threshold: float = 0.92
+    answer_cache_ttl_hours: int = 24
+    answer_cache_max_entries_per_repo: int = 500
+
+    # SQLite storage: WAL journal and tuned pragmas for concurrent writers.
+    # Off leaves SQLite's defaults (rollback journal, full fsync per commit)
+    sqlite_performance_mode: bool = True
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 10000
+    sqlite_cache_size_kb: int = 65536
+    sqlite_mmap_size_bytes: int = 268435456
+    # Connections per engine; FastAPI's threadpool runs up to 40 requests
+    sqlite_pool_size: int = 20
+    sqlite_max_overflow: int = 20
+    sqlite_pool_timeout: float = 30.0
+
+    # Podcast context: token budget, rows per page when ranking files, and
+    # how many nearest vectors to the episode topic boost their files
+    podcast_context_tokens: int = 1600
+    podcast_context_page_size: int = 500
+    podcast_topic_candidates: int = 50
+
+    # Directory and repository rollups of the file summaries, for directories
+    # down to `rollup_max_depth`; podcast and chat overviews use up to
+    # `rollup_overview_tokens` of them
+    rollup_enabled: bool = True
+    rollup_max_depth: int = 2
+    rollup_prompt_tokens: int = 6000
+    rollup_completion_tokens: int = 400
+    rollup_overview_tokens: int = 1200
+
+    # Diagrams: directories deeper than `diagram_max_depth` collapse to one
+    # node, and at most `diagram_max_children` entries show per directory.
+    # With `diagram_llm_refine`, the LLM relabels and regroups the result.
+    diagram_max_depth: int = 3
+    diagram_max_children: int = 12
+    diagram_llm_refine: bool = False
+
+    # State every API and worker process shares: "sqlite", "memory" (single
+    # process only) or "package.module:ClassName" for a custom SharedStore
+    shared_store_backend: str = "sqlite"
+
+    # Single-flight for podcast, diagram and setup requests: how long a
+    # leader's lease lasts if its process dies, how often followers in other
+    # processes check for the result, and how long they wait before giving up
+    single_flight_lease_seconds: float = 300.0
+    single_flight_poll_seconds: float = 0.5
+    single_flight_wait_seconds: float = 600.0
+
+    # Summary cache eviction
+    summary_cache_max_entries: int = 50000
+    summary_cache_max_age_days: int = 30
+
+    # Code file types to ingest
     file_extenions: List[str] = [
         ".py",
         ".js",
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import re
+import time
+import uuid
+from typing import Any, Dict, Iterator, List
+
+import httpx
+
+from core.tokens import estimate_tokens
+
+WORDS = (
+    "module handles requests parses input stores results in the database and "
+    "exposes helpers used by the rest of the application while keeping "
+    "configuration errors and retries in one place"
+).split()
+
+
+def fake_reply(messages: List[Dict[str, Any]], max_tokens: int) -> str:
+    """
+    A deterministic answer to `messages`: a Mermaid block in the prompt is
+    returned as is, so diagram refinement stays valid; anything else gets a
+    few sentences that depend only on the prompt.
+    """
+    prompt = str(messages[-1].get("content") or "") if messages else ""
+    match = re.search(r"```mermaid\s*\n.*?```", prompt, re.DOTALL)
+    if match:
+        return match.group(0)
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    count = max(1, min(max_tokens, 60))
+    words = [WORDS[(seed + i * 7) % len(WORDS)] for i in range(count)]
+    return "Hello there! This " + " ".join(words) + "."
+
+
+def fake_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """An OpenAI-style chat completion for a request `body`."""
+    messages = body.get("messages") or []
+    content = fake_reply(messages, body.get("max_tokens") or 256)
+    prompt_tokens = sum(
+        estimate_tokens(str(message.get("content") or "")) for message in messages
+    )
+    completion_tokens = estimate_tokens(content)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def fake_stream(completion: Dict[str, Any]) -> Iterator[bytes]:
+    """`completion` as server-sent events, one chunk per word."""
+    base = {key: completion[key] for key in ("id", "created", "model")}
+    content = completion["choices"][0]["message"]["content"]
+    words = content.split(" ")
+    for i, word in enumerate(words):
+        delta = {"content": word if i == 0 else " " + word}
+        if i == 0:
+            delta["role"] = "assistant"
+        chunk = {
+            **base,
+            "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+    last = {
+        **base,
+        "object": "chat.completion.chunk",
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        "x_groq": {"usage": completion["usage"]},
+    }
+    yield f"data: {json.dumps(last)}\n\n".encode("utf-8")
+    yield b"data: [DONE]\n\n"
+
+
+class FakeLLMTransport(httpx.BaseTransport):
+    """
+    An httpx transport that answers chat completions locally, after
+    `latency` seconds, so the Groq client (and everything built on it) runs
+    offline. Select it with `llm_backend = "fake"`.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/chat/completions"):
+            return httpx.Response(404, json={"error": {"message": "Not found"}})
+        body = json.loads(request.read() or b"{}")
+        if self.latency > 0:
+            time.sleep(self.latency)
+        completion = fake_completion(body)
+        if body.get("stream"):
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=b"".join(fake_stream(completion)),
+            )
+        return httpx.Response(200, json=completion)
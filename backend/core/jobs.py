@@ -0,0 +1,196 @@
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Set
+
+from core.config import settings
+from db.job_db import JobManager
+
+# Held by the one process allowed to write to the embedded Chroma database
+WRITER_LEASE_KEY = "ingest:writer"
+
+
+def _run_job(jobs: JobManager, assistant, job, worker: str):
+    print(f"=============Worker {worker} running job {job['id']}: {job['repo_url']}")
+    # Keep the job alive while long stages report no progress
+    done = threading.Event()
+
+    def beat():
+        while not done.wait(settings.job_heartbeat_seconds):
+            jobs.heartbeat(job["id"])
+
+    heartbeat = threading.Thread(target=beat, daemon=True)
+    heartbeat.start()
+
+    errors: List[str] = []
+
+    def progress(stage: str, **counts):
+        if stage == "failed":
+            errors.append(str(counts.get("error")))
+        jobs.update_progress(job["id"], stage, counts)
+
+    try:
+        success, repo_id = assistant.process_repository(
+            job["repo_url"], progress=progress
+        )
+    except Exception as e:
+        success, repo_id = False, -1
+        errors.append(str(e))
+    finally:
+        done.set()
+        heartbeat.join()
+
+    error = None
+    if not success:
+        error = errors[-1] if errors else "Failed to process repository."
+    jobs.finish(job["id"], success, repo_id=repo_id if success else None, error=error)
+
+
+def _serve_as_writer(
+    store, jobs: JobManager, worker: str, stop_event, poll_interval: float, threads: int
+):
+    """
+    Claim and run up to `threads` ingestion jobs at once while this process
+    holds the writer lease, until `stop_event` is set or the lease is lost.
+    """
+    from chat.agent import PENDING_DROP_PREFIX, GitHubRepoAssistant
+
+    lease_seconds = settings.ingest_writer_lease_seconds
+    lost = threading.Event()
+    released = threading.Event()
+
+    def renew():
+        while not released.wait(lease_seconds / 3):
+            if store.get(WRITER_LEASE_KEY) != worker:
+                print(f"=============Ingest writer {worker} lost its lease")
+                lost.set()
+                return
+            store.set(WRITER_LEASE_KEY, worker, ttl=lease_seconds)
+
+    renewer = threading.Thread(target=renew, daemon=True)
+    renewer.start()
+
+    # One assistant per thread, created on its first job; models and
+    # clients behind them are shared by the whole process
+    local = threading.local()
+
+    def assistant() -> GitHubRepoAssistant:
+        if not hasattr(local, "assistant"):
+            local.assistant = GitHubRepoAssistant()
+        return local.assistant
+
+    def run(job):
+        _run_job(jobs, assistant(), job, worker)
+
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ingest")
+    running: Set[Future] = set()
+    try:
+        while not stop_event.is_set() and not lost.is_set():
+            # Deleted repositories go first, so a re-added one starts clean
+            if store.items(PENDING_DROP_PREFIX):
+                assistant().drop_pending_collections()
+            jobs.recover_stale()
+            running = {future for future in running if not future.done()}
+            job = jobs.claim_next(worker) if len(running) < threads else None
+            if job is None:
+                stop_event.wait(poll_interval)
+                continue
+            running.add(executor.submit(run, job))
+    finally:
+        # Keep the lease while running jobs finish
+        executor.shutdown(wait=True)
+        released.set()
+        renewer.join()
+        store.delete_if(WRITER_LEASE_KEY, worker)
+
+
+def _worker_main(db_path: str, stop_event, poll_interval: float, threads: int):
+    """Run ingestion jobs whenever this process holds the writer lease."""
+    # Imported here so the API process doesn't pay for it when spawning
+    from core.resources import get_shared_store
+
+    store = get_shared_store()
+    jobs = JobManager(
+        db_path,
+        stale_after_seconds=settings.job_stale_after_seconds,
+        max_attempts=settings.job_max_attempts,
+    )
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    while not stop_event.is_set():
+        # Embedded Chroma takes one writing process; any other pool waits
+        # here and takes over once the writer exits or its lease runs out
+        if not store.add(
+            WRITER_LEASE_KEY, worker, ttl=settings.ingest_writer_lease_seconds
+        ):
+            stop_event.wait(poll_interval)
+            continue
+        print(f"=============Ingest writer {worker} running up to {threads} jobs")
+        _serve_as_writer(store, jobs, worker, stop_event, poll_interval, threads)
+
+
+class IngestWorkerPool:
+    """
+    Runs repository ingestion in a separate process, fed by the durable job
+    queue in `JobManager`, with up to `workers` jobs at a time on threads.
+
+    The embedded Chroma database takes a single writing process, so that
+    process holds a lease in the shared store: when several API processes
+    (or a standalone `python -m core.jobs`) each start a pool, one writes
+    and the others stand by. With more than one API worker, set
+    `ingest_workers` to 0 and run `python -m core.jobs` once instead.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.ingest_workers,
+        db_path: str = settings.repo_db_path,
+        poll_interval: float = settings.job_poll_interval,
+    ):
+        self.workers = workers
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        # Spawn, not fork: the parent may already hold SQLite/Chroma handles
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+
+    def start(self):
+        if self.workers < 1:
+            return
+        self._process = self._context.Process(
+            target=_worker_main,
+            args=(self.db_path, self._stop_event, self.poll_interval, self.workers),
+            name="ingest-writer",
+            daemon=True,
+        )
+        self._process.start()
+        print(f"=============Started ingestion ({self.workers} jobs at once)")
+
+    def stop(self, timeout: Optional[float] = settings.job_shutdown_timeout):
+        """
+        Ask the ingestion process to exit, then terminate it if still busy
+        after `timeout`. Its jobs are requeued once the heartbeat goes stale.
+        """
+        self._stop_event.set()
+        if self._process is None:
+            return
+        self._process.join(timeout or 0)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._process = None
+
+
+if __name__ == "__main__":
+    # Run ingestion without the API, e.g. next to `uvicorn --workers N`
+    pool = IngestWorkerPool(workers=max(1, settings.ingest_workers))
+    pool.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.stop()
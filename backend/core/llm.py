@@ -0,0 +1,455 @@
+import hashlib
+import importlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+import httpx
+from groq import (
+    Groq,
+    APIConnectionError,
+    APIStatusError,
+    ConflictError,
+    InternalServerError,
+    RateLimitError,
+)
+
+from core.config import settings
+from core.rate_limit import TokenBucketLimiter
+from core.tokens import estimate_tokens
+
+
+class LLMError(Exception):
+    """A completion that failed for good: retries or time ran out."""
+
+
+@dataclass
+class LLMCall:
+    """One completion as the gateway saw it, for usage accounting."""
+
+    model: str
+    label: str
+    status: str  # "ok", "error" or "timeout"
+    latency_ms: float
+    attempts: int
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    finished_at: float = 0.0
+
+
+def create_transport(backend: str) -> Optional[httpx.BaseTransport]:
+    """
+    The HTTP transport for `llm_backend`: None for the real Groq API, the
+    local fake, or a "package.module:ClassName" httpx transport.
+    """
+    if backend == "groq":
+        return None
+    if backend == "fake":
+        from core.fake_llm import FakeLLMTransport
+
+        return FakeLLMTransport(latency=settings.llm_fake_latency_seconds)
+    module_name, _, class_name = backend.partition(":")
+    if not class_name:
+        raise ValueError(
+            f"Unknown LLM backend {backend!r}; "
+            "use 'groq', 'fake' or 'package.module:ClassName'"
+        )
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class SharedGroq(Groq):
+    """
+    A Groq client that is shared, never copied: agno deep-copies the chat
+    model on every run, which would otherwise clone the connection pool.
+    """
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def create_groq_client(
+    api_key: Optional[str] = None, max_retries: Optional[int] = None
+) -> Groq:
+    """A Groq client for the configured backend, base URL and timeout."""
+    kwargs: Dict[str, Any] = {
+        "api_key": api_key or settings.GROQ_API_KEY,
+        "timeout": settings.llm_timeout_seconds,
+    }
+    if settings.GROQ_BASE_URL:
+        kwargs["base_url"] = settings.GROQ_BASE_URL
+    if max_retries is not None:
+        kwargs["max_retries"] = max_retries
+    transport = create_transport(settings.llm_backend)
+    if transport is not None:
+        kwargs["http_client"] = httpx.Client(transport=transport)
+    return SharedGroq(**kwargs)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class LLMGateway:
+    """
+    The one way the backend asks an LLM for a completion.
+
+    All calls share one client, so one HTTP connection pool. At most
+    `max_concurrency` calls per model are in flight (`model_concurrency`
+    overrides it per model id); the rest wait their turn. 429, 409, 5xx and
+    connection errors are retried with exponential backoff and jitter,
+    honoring `retry-after`, as long as the call's deadline (`timeout`
+    seconds from the start) leaves room. Identical requests made while one
+    is in flight wait for its answer instead of calling again.
+
+    Every call is recorded with its latency and token usage; `stats` sums
+    them per model, and `recent` lists the last `history_size` calls. The
+    numbers cover this process only.
+    """
+
+    def __init__(
+        self,
+        client: Groq,
+        max_concurrency: int = 8,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 30.0,
+        timeout_seconds: float = 60.0,
+        history_size: int = 1000,
+    ):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency or {}
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout_seconds = timeout_seconds
+
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._calls: Deque[LLMCall] = deque(maxlen=history_size)
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def _semaphore(self, model: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if model not in self._semaphores:
+                limit = self.model_concurrency.get(model, self.max_concurrency)
+                self._semaphores[model] = threading.BoundedSemaphore(max(1, limit))
+            return self._semaphores[model]
+
+    @staticmethod
+    def _key(model: str, messages: List[Dict[str, str]], **params: Any) -> str:
+        payload = json.dumps([model, messages, params], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float = 0.0,
+        label: str = "",
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        limiter: Optional[TokenBucketLimiter] = None,
+    ) -> str:
+        """
+        The completion text for `messages`. Raises `LLMError` when every
+        attempt failed or the deadline passed. A `limiter` paces each
+        attempt (time spent waiting on it doesn't count toward `timeout`)
+        and is told about rate limits.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout_seconds)
+        key = self._key(
+            model, messages, max_tokens=max_tokens, temperature=temperature
+        )
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self._count(model, "coalesced")
+            try:
+                return future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                raise LLMError(f"Timed out waiting for {label or model}")
+
+        try:
+            response = self._call(
+                model,
+                messages,
+                {"max_tokens": max_tokens, "temperature": temperature},
+                label,
+                deadline,
+                self.max_retries if max_retries is None else max_retries,
+                limiter,
+            )
+            result = response.choices[0].message.content or ""
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def create(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        label: str = "",
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        limiter: Optional[TokenBucketLimiter] = None,
+        **params: Any,
+    ) -> Any:
+        """
+        The SDK's own response for `messages` and request `params` (tools,
+        `stream=True`, ...), for callers that need more than the text. It
+        gets the limits, retries and accounting of `complete`, but no
+        coalescing. A stream holds its concurrency slot until it is
+        exhausted or closed, and is recorded then.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout_seconds)
+        return self._call(
+            model,
+            messages,
+            params,
+            label,
+            deadline,
+            self.max_retries if max_retries is None else max_retries,
+            limiter,
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * (2**attempt))
+        # Jitter keeps callers that failed together from retrying together
+        return delay * random.uniform(0.5, 1.0)
+
+    def _call(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        params: Dict[str, Any],
+        label: str,
+        deadline: float,
+        max_retries: int,
+        limiter: Optional[TokenBucketLimiter],
+    ) -> Any:
+        started = time.monotonic()
+        name = label or model
+        estimated_tokens = None
+        semaphore = self._semaphore(model)
+        attempt = 0
+        while True:
+            attempt += 1
+            if limiter is not None:
+                if estimated_tokens is None:
+                    estimated_tokens = (params.get("max_tokens") or 0) + sum(
+                        estimate_tokens(str(m.get("content") or ""))
+                        for m in messages
+                    )
+                # Pacing is queueing, not a slow call: it doesn't use up time
+                waited = time.monotonic()
+                limiter.acquire(estimated_tokens)
+                deadline += time.monotonic() - waited
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not semaphore.acquire(timeout=remaining):
+                self._record(model, label, "timeout", started, attempt)
+                raise LLMError(f"Deadline passed before calling the LLM for {name}")
+            streaming = False
+            try:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    timeout=max(0.1, deadline - time.monotonic()),
+                    **params,
+                )
+            except RateLimitError as e:
+                retry_after = e.response.headers.get("retry-after")
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    delay = self._backoff(attempt - 1)
+                if limiter is not None:
+                    limiter.on_rate_limited(delay)
+                error: Exception = e
+                reason = "Rate limited"
+            except (APIConnectionError, ConflictError, InternalServerError) as e:
+                # Connection errors, timeouts, 409 and 5xx are worth retrying
+                delay = self._backoff(attempt - 1)
+                error = e
+                reason = f"Transient LLM error ({e})"
+            except APIStatusError as e:
+                self._record(model, label, "error", started, attempt)
+                raise LLMError(f"LLM request for {name} failed: {e}") from e
+            else:
+                if limiter is not None:
+                    limiter.on_success()
+                if params.get("stream"):
+                    streaming = True
+                    return self._stream(
+                        response, model, label, started, attempt, semaphore
+                    )
+                usage = getattr(response, "usage", None)
+                self._record(
+                    model,
+                    label,
+                    "ok",
+                    started,
+                    attempt,
+                    getattr(usage, "prompt_tokens", 0) or 0,
+                    getattr(usage, "completion_tokens", 0) or 0,
+                )
+                return response
+            finally:
+                # A stream gives its slot back once it is read
+                if not streaming:
+                    semaphore.release()
+
+            if attempt > max_retries or time.monotonic() + delay >= deadline:
+                status = "error" if attempt > max_retries else "timeout"
+                self._record(model, label, status, started, attempt)
+                raise LLMError(f"LLM request for {name} failed: {error}") from error
+            print(f"{reason} on {name}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _stream(
+        self,
+        stream: Any,
+        model: str,
+        label: str,
+        started: float,
+        attempts: int,
+        semaphore: threading.BoundedSemaphore,
+    ) -> Iterator[Any]:
+        status, usage = "error", None
+        try:
+            for chunk in stream:
+                # Groq reports the usage on the last chunk
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                yield chunk
+            status = "ok"
+        finally:
+            semaphore.release()
+            self._record(
+                model,
+                label,
+                status,
+                started,
+                attempts,
+                getattr(usage, "prompt_tokens", 0) or 0,
+                getattr(usage, "completion_tokens", 0) or 0,
+            )
+
+    def _count(self, model: str, field: str, amount: float = 1):
+        with self._lock:
+            totals = self._totals.setdefault(model, {})
+            totals[field] = totals.get(field, 0) + amount
+
+    def _record(
+        self,
+        model: str,
+        label: str,
+        status: str,
+        started: float,
+        attempts: int,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ):
+        call = LLMCall(
+            model=model,
+            label=label,
+            status=status,
+            latency_ms=(time.monotonic() - started) * 1000,
+            attempts=attempts,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            finished_at=time.time(),
+        )
+        with self._lock:
+            self._calls.append(call)
+            totals = self._totals.setdefault(model, {})
+            for field, amount in (
+                ("calls", 1),
+                (status, 1),
+                ("retries", attempts - 1),
+                ("prompt_tokens", prompt_tokens),
+                ("completion_tokens", completion_tokens),
+                ("latency_ms", call.latency_ms),
+            ):
+                totals[field] = totals.get(field, 0) + amount
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """The last `limit` calls, newest first."""
+        with self._lock:
+            calls = list(self._calls)[-limit:] if limit > 0 else []
+        return [asdict(call) for call in reversed(calls)]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per model: call, retry and coalescing counts, tokens and latency."""
+        with self._lock:
+            totals = {model: dict(fields) for model, fields in self._totals.items()}
+            latencies: Dict[str, List[float]] = {}
+            for call in self._calls:
+                if call.status == "ok":
+                    latencies.setdefault(call.model, []).append(call.latency_ms)
+        for model, fields in totals.items():
+            calls = fields.get("calls", 0)
+            latency = fields.get("latency_ms", 0)
+            fields["avg_latency_ms"] = latency / calls if calls else 0.0
+            fields["p50_latency_ms"] = _percentile(latencies.get(model, []), 0.5)
+            fields["p99_latency_ms"] = _percentile(latencies.get(model, []), 0.99)
+        return totals
+
+
+def create_llm_gateway(client: Groq) -> LLMGateway:
+    """An `LLMGateway` over `client` with the limits from `settings`."""
+    return LLMGateway(
+        client,
+        max_concurrency=settings.llm_max_concurrency,
+        model_concurrency=settings.llm_model_concurrency,
+        max_retries=settings.llm_max_retries,
+        backoff_seconds=settings.llm_backoff_seconds,
+        max_backoff_seconds=settings.llm_max_backoff_seconds,
+        timeout_seconds=settings.llm_timeout_seconds,
+        history_size=settings.llm_usage_history,
+    )
+
+
+class GatewayClient:
+    """
+    Stands in for a Groq client where a library makes the completion calls
+    itself, like agno's models: `chat.completions.create` goes through
+    `gateway.create` under `label`.
+    """
+
+    def __init__(self, gateway: LLMGateway, label: str = ""):
+        self.gateway = gateway
+        self.label = label
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs: Any) -> Any:
+        kwargs.setdefault("label", self.label)
+        return self.gateway.create(**kwargs)
+
+    def is_closed(self) -> bool:
+        return False
+
+    def __deepcopy__(self, memo):
+        # Like SharedGroq: agno copies the model on every run
+        return self
@@ -0,0 +1,89 @@
+import threading
+import time
+
+
+class TokenBucketLimiter:
+    """
+    Thread-safe limiter for an LLM provider quota.
+
+    Two token buckets are refilled continuously: one for requests per minute
+    and one for tokens per minute. `acquire` blocks until both can cover the
+    call. When the provider still answers 429, `on_rate_limited` pauses every
+    caller and halves the effective rate; `on_success` restores it gradually.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        min_rate_factor: float = 0.1,
+        recovery_step: float = 0.05,
+    ):
+        self.requests_per_minute = max(1, requests_per_minute)
+        self.tokens_per_minute = max(1, tokens_per_minute)
+        self.min_rate_factor = min_rate_factor
+        self.recovery_step = recovery_step
+
+        self._lock = threading.Lock()
+        self._request_tokens = float(self.requests_per_minute)
+        self._llm_tokens = float(self.tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._rate_factor = 1.0
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        per_second = self._rate_factor / 60.0
+        self._request_tokens = min(
+            self.requests_per_minute,
+            self._request_tokens + elapsed * self.requests_per_minute * per_second,
+        )
+        self._llm_tokens = min(
+            self.tokens_per_minute,
+            self._llm_tokens + elapsed * self.tokens_per_minute * per_second,
+        )
+
+    def acquire(self, tokens: int = 1):
+        """Block until one request carrying `tokens` tokens fits the budget."""
+        tokens = min(max(1, tokens), self.tokens_per_minute)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._request_tokens >= 1 and self._llm_tokens >= tokens:
+                        self._request_tokens -= 1
+                        self._llm_tokens -= tokens
+                        return
+
+                    per_second = self._rate_factor / 60.0
+                    wait = max(
+                        (1 - self._request_tokens)
+                        / (self.requests_per_minute * per_second),
+                        (tokens - self._llm_tokens)
+                        / (self.tokens_per_minute * per_second),
+                    )
+            time.sleep(max(wait, 0.01))
+
+    def on_rate_limited(self, retry_after: float):
+        """
+        Pause all callers for `retry_after` seconds and slow the refill rate.
+        The rate is halved at most once per pause window.
+        """
+        with self._lock:
+            now = time.monotonic()
+            # Workers that hit the same burst all report it; slow down once
+            if self._paused_until <= now:
+                self._rate_factor = max(self.min_rate_factor, self._rate_factor / 2)
+            self._paused_until = max(self._paused_until, now + max(retry_after, 0.0))
+
+    def on_success(self):
+        with self._lock:
+            self._rate_factor = min(1.0, self._rate_factor + self.recovery_step)
+
+    @property
+    def rate_factor(self) -> float:
+        return self._rate_factor
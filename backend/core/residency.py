@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ResidencyManager(Generic[T]):
+    """
+    Bounded LRU of per-repository objects that are cheap to rebuild but
+    should not accumulate (vector DB handles, knowledge bases).
+
+    `get` returns the resident value or builds it with `loader`; at most
+    `max_resident` repositories stay loaded and the least recently used one
+    is dropped when another is loaded. Concurrent callers for the same
+    repository share one load; loads of different repositories run in
+    parallel.
+    """
+
+    def __init__(
+        self,
+        max_resident: int,
+        on_evict: Optional[Callable[[int, T], None]] = None,
+        latency_window: int = 256,
+    ):
+        self.max_resident = max(1, max_resident)
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[int, T]" = OrderedDict()
+        self._loading: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._loads = 0
+        self._evictions = 0
+        # Recent rebuild durations in seconds
+        self._load_times: Deque[float] = deque(maxlen=latency_window)
+
+    def get(self, repo_id: int, loader: Callable[[], T]) -> T:
+        with self._lock:
+            if repo_id in self._entries:
+                self._entries.move_to_end(repo_id)
+                self._hits += 1
+                return self._entries[repo_id]
+            load_lock = self._loading.setdefault(repo_id, threading.Lock())
+
+        with load_lock:
+            # Another caller may have finished loading while we waited
+            with self._lock:
+                if repo_id in self._entries:
+                    self._entries.move_to_end(repo_id)
+                    self._hits += 1
+                    return self._entries[repo_id]
+
+            started = time.perf_counter()
+            try:
+                value = loader()
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(repo_id, None)
+                raise
+            elapsed = time.perf_counter() - started
+
+            evicted = []
+            with self._lock:
+                self._entries[repo_id] = value
+                self._loading.pop(repo_id, None)
+                self._loads += 1
+                self._load_times.append(elapsed)
+                while len(self._entries) > self.max_resident:
+                    evicted.append(self._entries.popitem(last=False))
+                    self._evictions += 1
+
+        for evicted_id, evicted_value in evicted:
+            print(f"Evicted repository {evicted_id} from memory")
+            if self.on_evict is not None:
+                self.on_evict(evicted_id, evicted_value)
+        return value
+
+    def discard(self, repo_id: int) -> bool:
+        """Drop a repository if it is resident. Returns whether it was."""
+        with self._lock:
+            value = self._entries.pop(repo_id, None)
+        if value is None:
+            return False
+        if self.on_evict is not None:
+            self.on_evict(repo_id, value)
+        return True
+
+    def clear(self) -> int:
+        """Drop every resident repository. Returns how many there were."""
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+        if self.on_evict is not None:
+            for repo_id, value in entries:
+                self.on_evict(repo_id, value)
+        return len(entries)
+
+    def __contains__(self, repo_id: int) -> bool:
+        with self._lock:
+            return repo_id in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            load_times = sorted(self._load_times)
+            stats: Dict[str, Any] = {
+                "resident": len(self._entries),
+                "max_resident": self.max_resident,
+                "hits": self._hits,
+                "loads": self._loads,
+                "evictions": self._evictions,
+            }
+
+        def percentile(pct: float) -> Optional[float]:
+            if not load_times:
+                return None
+            index = min(len(load_times) - 1, int(pct / 100 * len(load_times)))
+            return load_times[index] * 1000
+
+        stats["rebuild_ms"] = {
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "max": load_times[-1] * 1000 if load_times else None,
+        }
+        return stats
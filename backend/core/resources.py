@@ -0,0 +1,128 @@
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import chromadb
+import numpy as np
+from agno.embedder.fastembed import FastEmbedEmbedder
+from fastembed import TextEmbedding
+from groq import Groq
+
+from core.config import settings
+
+T = TypeVar("T")
+
+_instances: Dict[Tuple[Any, ...], Any] = {}
+_lock = threading.RLock()
+
+
+def _shared(key: Tuple[Any, ...], factory: Callable[[], T]) -> T:
+    # RLock: factories may themselves ask the registry for dependencies
+    with _lock:
+        if key not in _instances:
+            _instances[key] = factory()
+        return _instances[key]
+
+
+def get_chroma_client(path: str = settings.chroma_db_path) -> chromadb.ClientAPI:
+    """The persistent Chroma client for `path`, shared by the whole process."""
+    return _shared(
+        ("chroma", os.path.abspath(path)),
+        lambda: chromadb.PersistentClient(path=path),
+    )
+
+
+def get_groq_client(max_retries: Optional[int] = None) -> Groq:
+    """
+    A Groq client with its own HTTP connection pool, shared per retry
+    policy. `None` keeps the SDK's default retries. It talks to whatever
+    `llm_backend` and `GROQ_BASE_URL` select.
+    """
+    from core.llm import create_groq_client
+
+    return _shared(
+        ("groq", max_retries), lambda: create_groq_client(max_retries=max_retries)
+    )
+
+
+def get_llm_gateway():
+    """The completion gateway every agent shares; see `core.llm.LLMGateway`."""
+    from core.llm import create_llm_gateway
+
+    # The gateway retries itself, within each call's deadline
+    return _shared(
+        ("llm_gateway",),
+        lambda: create_llm_gateway(get_groq_client(max_retries=0)),
+    )
+
+
+def get_text_embedding(model_name: str) -> TextEmbedding:
+    """A loaded FastEmbed model; loading the ONNX weights is the slow part."""
+    return _shared(
+        ("fastembed", model_name), lambda: TextEmbedding(model_name=model_name)
+    )
+
+
+@dataclass
+class SharedFastEmbedEmbedder(FastEmbedEmbedder):
+    """FastEmbedEmbedder that reuses the process-wide model instead of
+    loading it again for every embedding."""
+
+    def get_embedding(self, text: str) -> List[float]:
+        embedding = next(iter(get_text_embedding(self.id).embed([text])))
+        return np.asarray(embedding, dtype=np.float32).tolist()
+
+
+def get_repo_manager(db_path: str = settings.repo_db_path):
+    from db.repo_db import RepositoryDataManager
+
+    return _shared(
+        ("repo_manager", os.path.abspath(db_path)),
+        lambda: RepositoryDataManager(db_path),
+    )
+
+
+def get_chat_history_manager(db_path: str = settings.repo_db_path):
+    from db.chat_db import ChatHistoryManager
+
+    return _shared(
+        ("chat_history", os.path.abspath(db_path)),
+        lambda: ChatHistoryManager(db_path),
+    )
+
+
+def get_shared_store(backend: str = settings.shared_store_backend):
+    """The cross-process state store; see `core.shared_store.SharedStore`."""
+    from core.shared_store import create_shared_store
+
+    return _shared(("shared_store", backend), lambda: create_shared_store(backend))
+
+
+def get_single_flight():
+    """Deduplicates concurrent generations; see `core.single_flight`."""
+    from core.single_flight import SingleFlight
+
+    return _shared(
+        ("single_flight",),
+        lambda: SingleFlight(
+            get_shared_store(),
+            lease_seconds=settings.single_flight_lease_seconds,
+            poll_seconds=settings.single_flight_poll_seconds,
+            wait_seconds=settings.single_flight_wait_seconds,
+        ),
+    )
+
+
+def reset_chroma_client(path: str = settings.chroma_db_path):
+    """
+    Drop the Chroma client for `path` so the next `get_chroma_client` opens a
+    fresh one. A client never sees vectors another process adds to an index
+    it has already loaded, so this is how writes elsewhere become visible.
+    Handles from the old client keep working, on the old data.
+    """
+    with _lock:
+        client = _instances.pop(("chroma", os.path.abspath(path)), None)
+        if client is not None:
+            # Chroma caches one system per path; the new client needs its own
+            client.clear_system_cache()
@@ -0,0 +1,123 @@
+import importlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import settings
+
+
+class SharedStore(ABC):
+    """
+    Key/value state that every API and worker process must agree on: cache
+    counters, generation numbers and the like. Values are JSON-serializable;
+    `ttl` is in seconds.
+
+    The default backend is SQLite (`db.shared_state_db.SQLiteSharedStore`),
+    which needs nothing beyond the repository database. Set
+    `shared_store_backend` to "package.module:ClassName" to plug in another
+    subclass that implements these methods (e.g. one backed by Redis).
+    """
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set `key` only if it is missing or expired. True if it was set."""
+
+    @abstractmethod
+    def delete_if(self, key: str, value: Any) -> bool:
+        """Delete `key` only while it still holds `value`. True if deleted."""
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1) -> int:
+        """Atomically add `amount` to an integer (0 if missing); return the sum."""
+
+    @abstractmethod
+    def items(self, prefix: str) -> Dict[str, Any]:
+        """All live keys starting with `prefix`, with their values."""
+
+
+class MemorySharedStore(SharedStore):
+    """In-process store, for a single worker or tests."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> bool:
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        if entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return False
+        return True
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data[key][0] if self._live(key) else default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            expires_at = time.time() + ttl if ttl is not None else None
+            self._data[key] = (value, expires_at)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key):
+                return False
+            expires_at = time.time() + ttl if ttl is not None else None
+            self._data[key] = (value, expires_at)
+            return True
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        with self._lock:
+            if not self._live(key) or self._data[key][0] != value:
+                return False
+            del self._data[key]
+            return True
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            value = (self._data[key][0] if self._live(key) else 0) + amount
+            self._data[key] = (value, None)
+            return value
+
+    def items(self, prefix: str) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                key: self._data[key][0]
+                for key in list(self._data)
+                if key.startswith(prefix) and self._live(key)
+            }
+
+
+def create_shared_store(backend: str) -> SharedStore:
+    if backend == "sqlite":
+        from db.shared_state_db import SQLiteSharedStore
+
+        return SQLiteSharedStore(settings.repo_db_path)
+    if backend == "memory":
+        return MemorySharedStore()
+    module_name, _, class_name = backend.partition(":")
+    if not class_name:
+        raise ValueError(
+            f"Unknown shared store backend {backend!r}; "
+            "use 'sqlite', 'memory' or 'package.module:ClassName'"
+        )
+    return getattr(importlib.import_module(module_name), class_name)()
@@ -0,0 +1,96 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, TypeVar
+
+from core.shared_store import SharedStore
+
+T = TypeVar("T")
+
+LEASE_PREFIX = "single_flight:"
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time, across threads and processes.
+
+    Within a process, the first caller for a key becomes the leader and the
+    others wait on its future. Across processes, leaders race for a lease in
+    the `SharedStore`; the one that gets it runs `func`, the rest poll
+    `check` (which returns the stored result, or None while there is none)
+    until it shows up or the lease is released. If the lease holder fails,
+    the next poller takes over. A lease held by a crashed process expires
+    after `lease_seconds`; after `wait_seconds` a waiter stops waiting and
+    runs `func` itself.
+    """
+
+    def __init__(
+        self,
+        store: SharedStore,
+        lease_seconds: float = 300.0,
+        poll_seconds: float = 0.5,
+        wait_seconds: float = 600.0,
+    ):
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.wait_seconds = wait_seconds
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def do(
+        self,
+        key: str,
+        func: Callable[[], T],
+        check: Optional[Callable[[], Optional[T]]] = None,
+    ) -> T:
+        """Return `func()`, or the result of the call already running for `key`."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._run_leased(key, func, check)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _run_leased(
+        self,
+        key: str,
+        func: Callable[[], T],
+        check: Optional[Callable[[], Optional[T]]],
+    ) -> T:
+        lease_key = LEASE_PREFIX + key
+        token = f"{self._owner}:{uuid.uuid4().hex}"
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            if self.store.add(lease_key, token, ttl=self.lease_seconds):
+                try:
+                    # The previous holder may have stored the result already
+                    result = check() if check else None
+                    return result if result is not None else func()
+                finally:
+                    self.store.delete_if(lease_key, token)
+
+            result = check() if check else None
+            if result is not None:
+                return result
+            if time.monotonic() >= deadline:
+                print(f"Gave up waiting for {key}; running it in this process")
+                return func()
+            time.sleep(self.poll_seconds)
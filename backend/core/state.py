@@ -1,5 +0,0 @@
-agent_ready = False
-agent_error = False
-processing_start_time = None
-error_message = None
-last_processed_repo_id = None
\ No newline at end of file
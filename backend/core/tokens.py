@@ -0,0 +1,171 @@
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.config import settings
+
+# Context windows (prompt + completion) of the Groq models used in `Settings`
+CONTEXT_WINDOWS: Dict[str, int] = {
+    "meta-llama/llama-4-scout-17b-16e-instruct": 131072,
+    "meta-llama/llama-4-maverick-17b-128e-instruct": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "llama-3.1-8b-instant": 131072,
+    "llama3-8b-8192": 8192,
+    "llama3-70b-8192": 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+MAX_CHARS_PER_TOKEN = 16
+
+# The Llama 3 / 4 pre-tokenizer, which splits text into pieces before BPE:
+# letter runs (with one leading non-letter), digits in threes, punctuation
+# runs and whitespace. ASCII classes keep it fast; other scripts fall into
+# the punctuation branch and are charged as long pieces.
+_PIECE = re.compile(
+    r"[^\r\nA-Za-z0-9]?[A-Za-z]+"
+    r"|[0-9]{1,3}"
+    r"| ?[^\sA-Za-z0-9]+[\r\n]*"
+    r"|\s*[\r\n]+"
+    r"|\s+(?!\S)"
+    r"|\s+"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Token count without loading a vocabulary: one per pre-tokenizer piece,
+    plus one per 5 characters of pieces longer than 6, which BPE usually
+    splits. Pieces are at least one token each, so the estimate rarely
+    falls far below the real count.
+    """
+    if not text:
+        return 0
+    pieces = _PIECE.findall(text)
+    extra = sum(
+        len(piece) // 5 for piece in pieces if len(piece) > 6 and not piece.isspace()
+    )
+    return len(pieces) + extra
+
+
+_tokenizers: Dict[str, Optional[Callable[[str], int]]] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def _load_tokenizer(model_id: str) -> Optional[Callable[[str], int]]:
+    path = settings.tokenizer_files.get(model_id)
+    if not path:
+        return None
+    try:
+        # Ships with fastembed; reads a local tokenizer.json, no download
+        from tokenizers import Tokenizer
+
+        tokenizer = Tokenizer.from_file(path)
+    except Exception as e:
+        print(f"Could not load tokenizer for {model_id} from {path}: {e}")
+        return None
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def get_token_counter(model_id: str) -> Callable[[str], int]:
+    """
+    Token counter for `model_id`: its real tokenizer when a tokenizer.json
+    is configured in `tokenizer_files`, `estimate_tokens` otherwise.
+    """
+    with _tokenizers_lock:
+        if model_id not in _tokenizers:
+            _tokenizers[model_id] = _load_tokenizer(model_id)
+        return _tokenizers[model_id] or estimate_tokens
+
+
+def context_window(model_id: str) -> int:
+    return CONTEXT_WINDOWS.get(model_id, DEFAULT_CONTEXT_WINDOW)
+
+
+class PromptBudget:
+    """
+    Token budget for one prompt to `model_id`.
+
+    The prompt may use the model's context window minus the completion
+    (`max_completion_tokens`) and a safety margin, capped at
+    `max_prompt_tokens` where input tokens cost more than they help (for
+    example against a tokens-per-minute limit). `fit` trims one text to a
+    token count; `allocate` shares what the fixed instructions leave
+    between several parts, such as metadata and code.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        max_completion_tokens: int,
+        max_prompt_tokens: Optional[int] = None,
+        margin: float = 0.05,
+    ):
+        self.model_id = model_id
+        self.count = get_token_counter(model_id)
+        window = context_window(model_id)
+        available = int(window * (1 - margin)) - max_completion_tokens
+        if max_prompt_tokens is not None:
+            available = min(available, max_prompt_tokens)
+        self.available = max(0, available)
+
+    def fit(
+        self,
+        text: str,
+        max_tokens: int,
+        marker: str = "\n...",
+        tokens: Optional[int] = None,
+    ) -> str:
+        """
+        `text` cut (at a line break where possible) to `max_tokens`. Pass
+        `tokens` when the count of `text` is already known.
+        """
+        if max_tokens <= 0:
+            return ""
+        if tokens is None:
+            tokens = self.count(text)
+        if tokens <= max_tokens:
+            return text
+        # Cut proportionally, then shrink until the count fits; one or two
+        # rounds are usual, so long texts are counted only a few times
+        budget = max_tokens - self.count(marker)
+        end = int(len(text) * budget / tokens)
+        while end > 0:
+            cut = text.rfind("\n", end // 2, end)
+            candidate = text[: cut if cut > 0 else end]
+            used = self.count(candidate)
+            if used <= budget:
+                return candidate + marker
+            end = int(end * budget / used * 0.95)
+        return ""
+
+    def allocate(self, fixed: str, parts: Sequence[Tuple[str, float]]) -> List[str]:
+        """
+        Trim `parts` (text, weight > 0) to fit beside the `fixed` text. Each
+        part gets a share of the remaining tokens by weight; what short parts
+        don't use goes to the others.
+        """
+        remaining = max(0, self.available - self.count(fixed))
+        # No part can use more than `remaining` tokens, and no real text
+        # averages MAX_CHARS_PER_TOKEN, so huge inputs are never counted whole
+        limit = remaining * MAX_CHARS_PER_TOKEN
+        parts = [(text[:limit], weight) for text, weight in parts]
+        costs = [self.count(text) for text, _ in parts]
+        shares = [0] * len(parts)
+        pending = [i for i, cost in enumerate(costs) if cost]
+        while pending and remaining > 0:
+            total_weight = sum(parts[i][1] for i in pending)
+            quota = {i: int(remaining * parts[i][1] / total_weight) for i in pending}
+            satisfied = [i for i in pending if costs[i] <= quota[i]]
+            if not satisfied:
+                for i in pending:
+                    shares[i] = quota[i]
+                break
+            for i in satisfied:
+                remaining -= costs[i]
+                shares[i] = costs[i]
+                pending.remove(i)
+        return [
+            text
+            if shares[i] >= costs[i]
+            else self.fit(text, shares[i], tokens=costs[i])
+            for i, (text, _) in enumerate(parts)
+        ]
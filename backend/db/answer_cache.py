@@ -0,0 +1,253 @@
+import re
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    LargeBinary,
+    ForeignKey,
+    Index,
+)
+from sqlalchemy.orm import sessionmaker, Session
+from core.shared_store import MemorySharedStore, SharedStore
+from .repo_db import Base
+from .engine import get_engine
+
+_STATS_PREFIX = "answer_cache:stats:"
+
+
+class AnswerCacheEntry(Base):
+    __tablename__ = "answer_cache"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    repo_id = Column(Integer, ForeignKey("repositories.id"), nullable=False)
+    # Commit the answer was produced against; other commits never match
+    commit_sha = Column(String, nullable=True)
+    normalized_question = Column(String, nullable=False)
+    question = Column(Text, nullable=False)
+    answer = Column(Text, nullable=False)
+    embedding = Column(LargeBinary, nullable=True)  # unit-length float32
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+    last_accessed = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_answer_cache_repo_question", "repo_id", "normalized_question"),
+    )
+
+
+class AnswerCacheManager:
+    """
+    Per-repository cache of chat answers.
+
+    A question hits when its normalized text matches a cached one exactly,
+    or when its embedding's cosine similarity to a cached question reaches
+    `similarity_threshold`. Entries expire after `ttl_hours`, each repository
+    keeps at most `max_entries_per_repo` (least recently used go first), and
+    `invalidate` drops a repository's entries after it is re-ingested.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "./data/repositories.db",
+        similarity_threshold: float = 0.92,
+        ttl_hours: int = 24,
+        max_entries_per_repo: int = 500,
+        store: Optional[SharedStore] = None,
+    ):
+        # Repository's relationships must resolve when used on their own
+        from .chat_db import ChatHistory
+
+        self.similarity_threshold = similarity_threshold
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_entries_per_repo = max_entries_per_repo
+        self.engine = get_engine(db_path)
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        Base.metadata.create_all(bind=self.engine, tables=[AnswerCacheEntry.__table__])
+
+        # Hit/miss counters, shared by every process using the same store
+        self.store = store or MemorySharedStore()
+
+    def get_session(self) -> Session:
+        return self.SessionLocal()
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace."""
+        text = re.sub(r"[^\w\s]", " ", question.lower())
+        return " ".join(text.split())
+
+    def _record(self, repo_id: int, outcome: str):
+        self.store.incr(f"{_STATS_PREFIX}{repo_id}:{outcome}")
+
+    def lookup(
+        self,
+        repo_id: int,
+        commit_sha: Optional[str],
+        question: str,
+        embed: Callable[[str], np.ndarray],
+    ) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Return (cached answer or None, question embedding). `embed` is only
+        called when there is no exact match; the embedding is returned so a
+        miss can be stored without embedding the question twice.
+        """
+        normalized = self.normalize_question(question)
+        cutoff = datetime.now() - self.ttl
+        with self.get_session() as session:
+            try:
+                fresh = session.query(AnswerCacheEntry).filter(
+                    AnswerCacheEntry.repo_id == repo_id,
+                    AnswerCacheEntry.commit_sha == commit_sha,
+                    AnswerCacheEntry.created_at >= cutoff,
+                )
+                entry = fresh.filter(
+                    AnswerCacheEntry.normalized_question == normalized
+                ).first()
+                outcome = "exact"
+                embedding = None
+
+                if entry is None:
+                    embedding = embed(question)
+                    rows = (
+                        session.query(AnswerCacheEntry.id, AnswerCacheEntry.embedding)
+                        .filter(
+                            AnswerCacheEntry.repo_id == repo_id,
+                            AnswerCacheEntry.commit_sha == commit_sha,
+                            AnswerCacheEntry.created_at >= cutoff,
+                            AnswerCacheEntry.embedding.isnot(None),
+                        )
+                        .all()
+                    )
+                    if rows:
+                        matrix = np.frombuffer(
+                            b"".join(row.embedding for row in rows), dtype=np.float32
+                        ).reshape(len(rows), -1)
+                        scores = matrix @ embedding
+                        best = int(np.argmax(scores))
+                        if scores[best] >= self.similarity_threshold:
+                            entry = session.get(AnswerCacheEntry, rows[best].id)
+                            outcome = "semantic"
+
+                if entry is None:
+                    self._record(repo_id, "miss")
+                    return None, embedding
+
+                entry.hits += 1
+                entry.last_accessed = datetime.now()
+                answer = entry.answer
+                session.commit()
+                self._record(repo_id, outcome)
+                return answer, embedding
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def put(
+        self,
+        repo_id: int,
+        commit_sha: Optional[str],
+        question: str,
+        answer: str,
+        embedding: Optional[np.ndarray],
+    ):
+        with self.get_session() as session:
+            try:
+                session.add(
+                    AnswerCacheEntry(
+                        repo_id=repo_id,
+                        commit_sha=commit_sha,
+                        normalized_question=self.normalize_question(question),
+                        question=question,
+                        answer=answer,
+                        embedding=(
+                            embedding.astype(np.float32).tobytes()
+                            if embedding is not None
+                            else None
+                        ),
+                    )
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+        self.evict(repo_id)
+
+    def evict(self, repo_id: int) -> int:
+        """Drop expired entries, then the least recently used over the cap."""
+        with self.get_session() as session:
+            try:
+                removed = (
+                    session.query(AnswerCacheEntry)
+                    .filter(
+                        AnswerCacheEntry.repo_id == repo_id,
+                        AnswerCacheEntry.created_at < datetime.now() - self.ttl,
+                    )
+                    .delete(synchronize_session=False)
+                )
+                keep = (
+                    session.query(AnswerCacheEntry.id)
+                    .filter(AnswerCacheEntry.repo_id == repo_id)
+                    .order_by(AnswerCacheEntry.last_accessed.desc())
+                    .limit(self.max_entries_per_repo)
+                )
+                removed += (
+                    session.query(AnswerCacheEntry)
+                    .filter(
+                        AnswerCacheEntry.repo_id == repo_id,
+                        AnswerCacheEntry.id.notin_(keep.scalar_subquery()),
+                    )
+                    .delete(synchronize_session=False)
+                )
+                session.commit()
+                return removed
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def invalidate(self, repo_id: int) -> int:
+        """Drop every cached answer for a repository."""
+        with self.get_session() as session:
+            try:
+                removed = (
+                    session.query(AnswerCacheEntry)
+                    .filter(AnswerCacheEntry.repo_id == repo_id)
+                    .delete(synchronize_session=False)
+                )
+                session.commit()
+                return removed
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/miss counts across all processes, overall and per repo."""
+        per_repo: Dict[int, Dict[str, int]] = {}
+        for key, count in self.store.items(_STATS_PREFIX).items():
+            repo_id, outcome = key[len(_STATS_PREFIX) :].split(":")
+            counts = per_repo.setdefault(
+                int(repo_id), {"exact": 0, "semantic": 0, "miss": 0}
+            )
+            counts[outcome] = count
+        totals = {"exact": 0, "semantic": 0, "miss": 0}
+        for counts in per_repo.values():
+            for key, value in counts.items():
+                totals[key] += value
+        hits = totals["exact"] + totals["semantic"]
+        lookups = hits + totals["miss"]
+        with self.get_session() as session:
+            entries = session.query(AnswerCacheEntry.id).count()
+        return {
+            "hits": hits,
+            "exact_hits": totals["exact"],
+            "semantic_hits": totals["semantic"],
+            "misses": totals["miss"],
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "per_repo": per_repo,
+        }
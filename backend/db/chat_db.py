@@ -1,10 +1,20 @@
-import os
-from pathlib import Path
 from datetime import datetime
-from typing import List
-from sqlalchemy import create_engine, Column, Integer, Text, DateTime, func, ForeignKey
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    func,
+    ForeignKey,
+    Index,
+    tuple_,
+    type_coerce,
+)
 from sqlalchemy.orm import sessionmaker, Session, relationship
 from .repo_db import Base  
+from .engine import get_engine
 
 
 class ChatHistory(Base):
@@ -16,12 +26,14 @@ class ChatHistory(Base):
     timestamp = Column(DateTime, default=func.now())
     repository = relationship("Repository", back_populates="chat_history")
 
+    __table_args__ = (
+        Index("ix_chat_history_repo_timestamp_id", "repo_id", "timestamp", "id"),
+    )
+
 
 class ChatHistoryManager:
     def __init__(self, db_path: str = "./data/repositories.db"):
-        db_dir = Path(db_path).parent
-        os.makedirs(db_dir, exist_ok=True)
-        self.engine = create_engine(f"sqlite:///{db_path}", echo=False)
+        self.engine = get_engine(db_path)
         self.SessionLocal = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
@@ -51,4 +63,83 @@ class ChatHistoryManager:
                 .order_by(ChatHistory.timestamp.asc())
                 .all()
             )
-            return history
\ No newline at end of file
+            return history
+
+    def get_chat_page(
+        self,
+        repo_id: int,
+        limit: int = 50,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        response_chars: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        One page of a repository's history in chronological order, using the
+        (repo_id, timestamp, id) index so the cost doesn't grow with history.
+
+        `before`/`after` are message ids: the page holds the `limit` messages
+        right before or after that one, or the latest `limit` without either.
+        `response_chars` truncates responses in SQL. Returns (rows, whether
+        more messages exist beyond the page in the direction read).
+        """
+        # Compare the stored text as is: func.now() writes timestamps without
+        # microseconds, so a bound datetime would not compare equal to them
+        timestamp = type_coerce(ChatHistory.timestamp, String)
+        key = tuple_(timestamp, ChatHistory.id)
+        response = ChatHistory.response
+        if response_chars is not None:
+            # One extra character tells whether the response was cut
+            response = func.substr(ChatHistory.response, 1, response_chars + 1)
+
+        with self.get_session() as session:
+            query = session.query(
+                ChatHistory.id,
+                ChatHistory.repo_id,
+                ChatHistory.query,
+                response.label("response"),
+                ChatHistory.timestamp,
+            ).filter(ChatHistory.repo_id == repo_id)
+
+            cursor_id = after if after is not None else before
+            if cursor_id is not None:
+                cursor = (
+                    session.query(timestamp, ChatHistory.id)
+                    .filter(ChatHistory.id == cursor_id)
+                    .first()
+                )
+                if cursor is None:
+                    raise ValueError(f"Unknown history cursor: {cursor_id}")
+                if after is not None:
+                    query = query.filter(key > tuple_(*cursor))
+                else:
+                    query = query.filter(key < tuple_(*cursor))
+
+            if after is not None:
+                query = query.order_by(timestamp.asc(), ChatHistory.id.asc())
+            else:
+                query = query.order_by(timestamp.desc(), ChatHistory.id.desc())
+            rows = query.limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if after is None:
+            rows.reverse()
+        page = []
+        for row in rows:
+            response_text = row.response
+            truncated = (
+                response_chars is not None and len(response_text) > response_chars
+            )
+            page.append(
+                {
+                    "id": row.id,
+                    "repo_id": row.repo_id,
+                    "query": row.query,
+                    "response": (
+                        response_text[:response_chars] if truncated else response_text
+                    ),
+                    "response_truncated": truncated,
+                    "timestamp": row.timestamp,
+                }
+            )
+        return page, has_more
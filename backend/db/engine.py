@@ -0,0 +1,72 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    """Per-connection settings for performance mode."""
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers run alongside the single writer; the mode is
+        # stored in the file, so this is a no-op after the first connection
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # NORMAL only fsyncs at checkpoints, which is durable enough under WAL
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_bytes)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def create_sqlite_engine(
+    db_path: str, performance_mode: Optional[bool] = None
+) -> Engine:
+    """
+    Create an engine for a SQLite file. In performance mode connections use
+    WAL and the pragmas above, and the pool is sized for the API threadpool.
+    """
+    if performance_mode is None:
+        performance_mode = settings.sqlite_performance_mode
+    os.makedirs(Path(db_path).parent, exist_ok=True)
+    if not performance_mode:
+        return create_engine(f"sqlite:///{db_path}", echo=False)
+
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        echo=False,
+        # Pooled connections are handed between threads, one at a time
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000,
+        },
+        pool_size=settings.sqlite_pool_size,
+        max_overflow=settings.sqlite_max_overflow,
+        pool_timeout=settings.sqlite_pool_timeout,
+    )
+    event.listen(engine, "connect", _apply_pragmas)
+    return engine
+
+
+def get_engine(db_path: str) -> Engine:
+    """
+    Return the process-wide engine for a SQLite file, creating it on first
+    use. Every manager on the same file shares its connection pool.
+    """
+    key = os.path.abspath(db_path)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = create_sqlite_engine(db_path)
+            _engines[key] = engine
+        return engine
@@ -0,0 +1,247 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.orm import sessionmaker, Session
+from .repo_db import Base, normalize_repo_url
+from .engine import get_engine
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    repo_url = Column(String, nullable=False)
+    status = Column(String, nullable=False, default=QUEUED)
+    stage = Column(String, nullable=True)
+    progress = Column(Text, nullable=True)  # JSON counters of the current stage
+    repo_id = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_ingest_jobs_status_id", "status", "id"),
+        Index("ix_ingest_jobs_repo_url", "repo_url"),
+    )
+
+
+def job_to_dict(job: IngestJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "repo_url": job.repo_url,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": json.loads(job.progress) if job.progress else {},
+        "repo_id": job.repo_id,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class JobManager:
+    """
+    Durable queue of repository ingestion jobs.
+
+    Any number of worker processes may poll it: `claim_next` moves a job from
+    queued to running with a conditional UPDATE, so each job is claimed once.
+    Running jobs whose worker stopped sending heartbeats are put back in the
+    queue, up to `max_attempts` tries.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "./data/repositories.db",
+        stale_after_seconds: int = 120,
+        max_attempts: int = 3,
+    ):
+        # Repository's relationships must resolve when used on their own
+        from .chat_db import ChatHistory
+
+        self.stale_after = timedelta(seconds=stale_after_seconds)
+        self.max_attempts = max_attempts
+        self.engine = get_engine(db_path)
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        Base.metadata.create_all(bind=self.engine, tables=[IngestJob.__table__])
+
+    def get_session(self) -> Session:
+        return self.SessionLocal()
+
+    def enqueue(self, repo_url: str) -> Dict[str, Any]:
+        """Queue an ingestion, or return the job already active for this URL."""
+        normalized = normalize_repo_url(repo_url)
+        with self.get_session() as session:
+            try:
+                # Few jobs are active at once; compare URLs in canonical form
+                active = (
+                    session.query(IngestJob)
+                    .filter(IngestJob.status.in_(ACTIVE_STATUSES))
+                    .order_by(IngestJob.id.desc())
+                    .all()
+                )
+                for existing in active:
+                    if normalize_repo_url(existing.repo_url) == normalized:
+                        return job_to_dict(existing)
+
+                job = IngestJob(repo_url=repo_url, status=QUEUED)
+                session.add(job)
+                session.commit()
+                session.refresh(job)
+                return job_to_dict(job)
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def claim_next(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job, or return None."""
+        with self.get_session() as session:
+            try:
+                while True:
+                    job_id = (
+                        session.query(IngestJob.id)
+                        .filter(IngestJob.status == QUEUED)
+                        .order_by(IngestJob.id)
+                        .limit(1)
+                        .scalar()
+                    )
+                    if job_id is None:
+                        return None
+
+                    now = datetime.now()
+                    claimed = (
+                        session.query(IngestJob)
+                        .filter(IngestJob.id == job_id, IngestJob.status == QUEUED)
+                        .update(
+                            {
+                                IngestJob.status: RUNNING,
+                                IngestJob.worker: worker,
+                                IngestJob.attempts: IngestJob.attempts + 1,
+                                IngestJob.started_at: now,
+                                IngestJob.heartbeat_at: now,
+                                IngestJob.stage: None,
+                                IngestJob.progress: None,
+                                IngestJob.error: None,
+                            },
+                            synchronize_session=False,
+                        )
+                    )
+                    session.commit()
+                    if claimed:
+                        return job_to_dict(session.get(IngestJob, job_id))
+                    # Another worker won the race; try the next job
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def update_progress(
+        self, job_id: int, stage: str, progress: Optional[Dict[str, Any]] = None
+    ):
+        with self.get_session() as session:
+            try:
+                session.query(IngestJob).filter(IngestJob.id == job_id).update(
+                    {
+                        IngestJob.stage: stage,
+                        IngestJob.progress: json.dumps(progress or {}),
+                        IngestJob.heartbeat_at: datetime.now(),
+                    },
+                    synchronize_session=False,
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def heartbeat(self, job_id: int):
+        with self.get_session() as session:
+            try:
+                session.query(IngestJob).filter(
+                    IngestJob.id == job_id, IngestJob.status == RUNNING
+                ).update(
+                    {IngestJob.heartbeat_at: datetime.now()},
+                    synchronize_session=False,
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def finish(
+        self,
+        job_id: int,
+        success: bool,
+        repo_id: Optional[int] = None,
+        error: Optional[str] = None,
+    ):
+        with self.get_session() as session:
+            try:
+                session.query(IngestJob).filter(IngestJob.id == job_id).update(
+                    {
+                        IngestJob.status: SUCCEEDED if success else FAILED,
+                        IngestJob.repo_id: repo_id,
+                        IngestJob.error: error,
+                        IngestJob.finished_at: datetime.now(),
+                    },
+                    synchronize_session=False,
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def recover_stale(self) -> int:
+        """
+        Requeue running jobs whose worker died, or fail them once they have
+        used up their attempts. Returns the number of jobs touched.
+        """
+        cutoff = datetime.now() - self.stale_after
+        with self.get_session() as session:
+            try:
+                stale = session.query(IngestJob).filter(
+                    IngestJob.status == RUNNING, IngestJob.heartbeat_at < cutoff
+                )
+                failed = stale.filter(IngestJob.attempts >= self.max_attempts).update(
+                    {
+                        IngestJob.status: FAILED,
+                        IngestJob.error: "Worker stopped responding",
+                        IngestJob.finished_at: datetime.now(),
+                    },
+                    synchronize_session=False,
+                )
+                requeued = stale.update(
+                    {IngestJob.status: QUEUED, IngestJob.worker: None},
+                    synchronize_session=False,
+                )
+                session.commit()
+                return failed + requeued
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self.get_session() as session:
+            job = session.get(IngestJob, job_id)
+            return job_to_dict(job) if job else None
+
+    def list_jobs(
+        self, status: Optional[str] = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        with self.get_session() as session:
+            query = session.query(IngestJob)
+            if status is not None:
+                query = query.filter(IngestJob.status == status)
+            jobs = query.order_by(IngestJob.id.desc()).limit(limit).all()
+            return [job_to_dict(job) for job in jobs]
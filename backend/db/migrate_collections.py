@@ -0,0 +1,107 @@
+"""
+Re-key vector collections to the stable names from `collection_name_for`.
+
+Repositories added before stable naming live in collections named
+`repo_{hash(url) % 100}`, which differ between processes and are shared by
+unrelated repositories. For each such repository this copies its own vectors
+(matched by the `repo_id` metadata) into its new collection, points the
+database row at it, and finally drops old collections no row uses any more.
+
+Stop the API and ingestion workers first; they keep collection handles open.
+
+Usage: python -m db.migrate_collections [--dry-run]
+"""
+
+import sys
+from typing import Any, Dict, List
+
+from core.config import settings
+from core.resources import get_chroma_client
+from .repo_db import Repository, RepositoryDataManager, collection_name_for
+
+
+def _copy_repo_vectors(source, target, repo_id: int, batch_size: int) -> int:
+    """Copy one repository's vectors between collections. Returns the count."""
+    copied = 0
+    while True:
+        batch = source.get(
+            where={"repo_id": repo_id},
+            include=["embeddings", "documents", "metadatas"],
+            limit=batch_size,
+            offset=copied,
+        )
+        if not batch["ids"]:
+            return copied
+        target.upsert(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+        )
+        copied += len(batch["ids"])
+
+
+def migrate_collections(
+    repo_db_path: str = settings.repo_db_path,
+    chroma_path: str = settings.chroma_db_path,
+    dry_run: bool = False,
+    batch_size: int = 500,
+) -> List[Dict[str, Any]]:
+    """Re-key every repository whose collection name is not the stable one."""
+    repo_manager = RepositoryDataManager(repo_db_path)
+    chroma_client = get_chroma_client(chroma_path)
+    existing = {collection.name for collection in chroma_client.list_collections()}
+
+    with repo_manager.get_session() as session:
+        repos = session.query(
+            Repository.id, Repository.repo_url, Repository.collection_name
+        ).all()
+
+    report: List[Dict[str, Any]] = []
+    old_names = set()
+    for repo_id, repo_url, old_name in repos:
+        new_name = collection_name_for(repo_url)
+        if old_name == new_name:
+            continue
+        old_names.add(old_name)
+        entry = {"repo_id": repo_id, "from": old_name, "to": new_name, "vectors": 0}
+        report.append(entry)
+        if dry_run:
+            continue
+
+        if old_name in existing:
+            source = chroma_client.get_collection(name=old_name)
+            target = chroma_client.get_or_create_collection(name=new_name)
+            entry["vectors"] = _copy_repo_vectors(
+                source, target, repo_id, batch_size
+            )
+
+        updates: Dict[str, Any] = {"collection_name": new_name}
+        if not entry["vectors"]:
+            # Nothing to carry over: make the next ingestion a full rebuild
+            updates["last_commit_sha"] = None
+        repo_manager.update_repository_metadata(repo_id, updates)
+        print(
+            f"Repository {repo_id}: {old_name} -> {new_name} "
+            f"({entry['vectors']} vectors)"
+        )
+
+    if not dry_run:
+        with repo_manager.get_session() as session:
+            still_used = {
+                name for (name,) in session.query(Repository.collection_name).all()
+            }
+        for name in sorted((old_names & existing) - still_used):
+            chroma_client.delete_collection(name=name)
+            print(f"Deleted old collection {name}")
+
+    return report
+
+
+if __name__ == "__main__":
+    dry_run = "--dry-run" in sys.argv[1:]
+    report = migrate_collections(dry_run=dry_run)
+    verb = "Would re-key" if dry_run else "Re-keyed"
+    print(f"{verb} {len(report)} repositories")
+    for entry in report if dry_run else []:
+        print(f"  {entry['repo_id']}: {entry['from']} -> {entry['to']}")
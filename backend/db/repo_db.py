@@ -1,13 +1,45 @@
-import os
-from pathlib import Path
+import hashlib
 from datetime import datetime
-from typing import List, Optional, Tuple, Dict, Any
-from sqlalchemy.orm import sessionmaker, Session, relationship
+from urllib.parse import urlparse
+from typing import List, Optional, Tuple, Dict, Any, Iterable
+from sqlalchemy.orm import sessionmaker, Session, relationship, defer
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, func, Text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import (
+    inspect,
+    text,
+    Column,
+    Integer,
+    String,
+    DateTime,
+    func,
+    Text,
+    Index,
+    type_coerce,
+)
+from .engine import get_engine
 
 Base = declarative_base()
 
+# Generated scripts can be large; only load them where they are used
+SCRIPT_COLUMNS = ("podcast_script", "diagram_script")
+
+# Columns returned when listing repositories (no scripts, no activity log)
+LISTING_COLUMNS = (
+    "id",
+    "repo_url",
+    "collection_name",
+    "created_at",
+    "last_updated",
+    "name",
+    "description",
+    "stars",
+    "forks",
+    "issues",
+    "license",
+    "owner",
+)
+
 
 class Repository(Base):
     __tablename__ = "repositories"
@@ -27,17 +59,60 @@ class Repository(Base):
     license = Column(String, nullable=True)
     owner = Column(String, nullable=True)
     last_activity = Column(Text, nullable=True)
+    last_commit_sha = Column(String, nullable=True)
     chat_history = relationship(
         "ChatHistory", back_populates="repository", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("ix_repositories_owner", "owner"),
+        Index("ix_repositories_stars", "stars"),
+        Index("ix_repositories_last_updated", "last_updated"),
+        Index("ix_repositories_collection_name", "collection_name"),
+    )
+
+
+def normalize_repo_url(repo_url: str) -> str:
+    """
+    Canonical "host/owner/repo" form of a repository URL, so spellings of the
+    same repository (scheme, case, trailing slash or ".git") compare equal.
+    """
+    url = repo_url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parsed = urlparse(url)
+    path = parsed.path.strip("/")
+    if path.endswith(".git"):
+        path = path[: -len(".git")]
+    return f"{parsed.netloc.lower()}/{path.lower()}"
+
+
+def collection_name_for(repo_url: str) -> str:
+    """
+    Vector collection name for a repository: the same in every process and
+    across restarts, and distinct for distinct repositories (160 bits of
+    SHA-256 of the normalized URL).
+    """
+    digest = hashlib.sha256(normalize_repo_url(repo_url).encode("utf-8"))
+    return f"repo_{digest.hexdigest()[:40]}"
+
+
+def _without_scripts(include: Iterable[str] = ()):
+    """
+    Query options deferring the script columns not in `include`. Reading a
+    deferred column raises instead of querying a closed session.
+    """
+    return [
+        defer(getattr(Repository, name), raiseload=True)
+        for name in SCRIPT_COLUMNS
+        if name not in include
+    ]
+
 
 class RepositoryDataManager:
     def __init__(self, db_path: str = "./data/repositories.db"):
-        db_dir = Path(db_path).parent
-        os.makedirs(db_dir, exist_ok=True)
         self.db_path = db_path
-        self.engine = create_engine(f"sqlite:///{db_path}", echo=False)
+        self.engine = get_engine(db_path)
         self.SessionLocal = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
@@ -45,8 +120,40 @@ class RepositoryDataManager:
 
     def init_database(self):
         from .chat_db import ChatHistory
+        from .symbol_db import RepoFile, CodeSymbol
+        from .job_db import IngestJob
+        from .answer_cache import AnswerCacheEntry
 
         Base.metadata.create_all(bind=self.engine)
+        self.migrate_schema()
+
+    def migrate_schema(self):
+        """
+        Add columns and indexes that were introduced after a table was first
+        created. `create_all` only creates missing tables, never their parts.
+        """
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                if not inspector.has_table(table.name):
+                    continue
+                existing = {col["name"] for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.execute(
+                        text(
+                            f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                        )
+                    )
+                # Indexes added to a table after it was created
+                existing_indexes = {
+                    index["name"] for index in inspector.get_indexes(table.name)
+                }
+                for index in table.indexes:
+                    if index.name not in existing_indexes:
+                        index.create(conn)
 
     def get_session(self) -> Session:
         return self.SessionLocal()
@@ -54,18 +161,23 @@ class RepositoryDataManager:
     def add_repository(self, repo_url: str) -> int:
         with self.get_session() as session:
             try:
-                # Check if repository already exists
-                existing_repo = (
-                    session.query(Repository)
-                    .filter(Repository.repo_url == repo_url)
-                    .first()
+                # Check if repository already exists, under any spelling of its URL
+                collection_name = collection_name_for(repo_url)
+                existing_id = (
+                    session.query(Repository.id)
+                    .filter(
+                        (Repository.repo_url == repo_url)
+                        | (Repository.collection_name == collection_name)
+                    )
+                    .order_by(Repository.id)
+                    .limit(1)
+                    .scalar()
                 )
 
-                if existing_repo:
-                    return existing_repo.id
+                if existing_id is not None:
+                    return existing_id
 
                 # Create new repository entry
-                collection_name = f"repo_{hash(repo_url) % 100}"
                 new_repo = Repository(
                     repo_url=repo_url, collection_name=collection_name
                 )
@@ -76,46 +188,127 @@ class RepositoryDataManager:
 
                 return new_repo.id
 
+            except IntegrityError:
+                # Another process registered the same URL first
+                session.rollback()
+                return (
+                    session.query(Repository.id)
+                    .filter(Repository.repo_url == repo_url)
+                    .scalar()
+                )
             except Exception as e:
                 session.rollback()
                 raise e
 
     def get_repository(self, repo_id: int) -> Optional[Tuple[str, str]]:
         with self.get_session() as session:
-            repo = session.query(Repository).filter(Repository.id == repo_id).first()
-            if repo:
-                return (repo.repo_url, repo.collection_name)
-            return None
+            repo = (
+                session.query(Repository.repo_url, Repository.collection_name)
+                .filter(Repository.id == repo_id)
+                .first()
+            )
+            return tuple(repo) if repo else None
 
-    def get_full_repository_by_id(self, repo_id: int) -> Optional[Repository]:
+    def get_full_repository_by_id(
+        self, repo_id: int, include: Iterable[str] = SCRIPT_COLUMNS
+    ) -> Optional[Repository]:
         """
-        Get the full Repository object by its ID, including all columns.
+        Get the Repository object by its ID. Of the script columns only those
+        in `include` are loaded; pass `include=()` when neither is needed.
         """
         with self.get_session() as session:
-            repo = session.query(Repository).filter(Repository.id == repo_id).first()
+            repo = (
+                session.query(Repository)
+                .options(*_without_scripts(include))
+                .filter(Repository.id == repo_id)
+                .first()
+            )
             return repo
 
     def get_repository_by_url(self, repo_url: str) -> Optional[Tuple[int, str]]:
         with self.get_session() as session:
             repo = (
+                session.query(Repository.id, Repository.collection_name)
+                .filter(Repository.repo_url == repo_url)
+                .first()
+            )
+            return tuple(repo) if repo else None
+
+    def get_repository_info_by_url(self, repo_url: str) -> Optional[Repository]:
+        """Like `get_full_repository_by_id`, by the (unique, indexed) URL."""
+        with self.get_session() as session:
+            return (
                 session.query(Repository)
+                .options(*_without_scripts())
                 .filter(Repository.repo_url == repo_url)
                 .first()
             )
-            if repo:
-                return (repo.id, repo.collection_name)
-            return None
 
     def list_repositories(self) -> List[Tuple[int, str, str, datetime]]:
         """
         Get all repositories stored in DB
         """
         with self.get_session() as session:
-            repos = session.query(Repository).all()
-            return [
-                (repo.id, repo.repo_url, repo.collection_name, repo.created_at)
-                for repo in repos
-            ]
+            repos = session.query(
+                Repository.id,
+                Repository.repo_url,
+                Repository.collection_name,
+                Repository.created_at,
+            ).all()
+            return [tuple(repo) for repo in repos]
+
+    def list_repository_page(
+        self,
+        limit: int = 100,
+        before: Optional[int] = None,
+        owner: Optional[str] = None,
+        min_stars: Optional[int] = None,
+        updated_since: Optional[datetime] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        One page of repositories, newest first, with only `LISTING_COLUMNS`.
+        `before` is a repository id to continue after. Each filter uses its
+        own index. Returns (rows, whether more repositories match).
+        """
+        with self.get_session() as session:
+            query = session.query(
+                *(getattr(Repository, name) for name in LISTING_COLUMNS)
+            )
+            if before is not None:
+                query = query.filter(Repository.id < before)
+            if owner is not None:
+                query = query.filter(Repository.owner == owner)
+            if min_stars is not None:
+                query = query.filter(Repository.stars >= min_stars)
+            if updated_since is not None:
+                # func.now() stores second-precision text, so compare as text
+                query = query.filter(
+                    type_coerce(Repository.last_updated, String)
+                    >= updated_since.strftime("%Y-%m-%d %H:%M:%S")
+                )
+            rows = query.order_by(Repository.id.desc()).limit(limit + 1).all()
+        return [row._asdict() for row in rows[:limit]], len(rows) > limit
+
+    def get_last_commit_sha(self, repo_id: int) -> Optional[str]:
+        with self.get_session() as session:
+            return (
+                session.query(Repository.last_commit_sha)
+                .filter(Repository.id == repo_id)
+                .scalar()
+            )
+
+    def update_last_commit_sha(self, repo_id: int, commit_sha: Optional[str]):
+        with self.get_session() as session:
+            try:
+                repo = (
+                    session.query(Repository).filter(Repository.id == repo_id).first()
+                )
+                if repo:
+                    repo.last_commit_sha = commit_sha
+                    session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
 
     def update_repository_timestamp(self, repo_id: int):
         with self.get_session() as session:
@@ -160,7 +353,10 @@ class RepositoryDataManager:
         with self.get_session() as session:
             try:
                 repo = (
-                    session.query(Repository).filter(Repository.id == repo_id).first()
+                    session.query(Repository)
+                    .options(*_without_scripts(metadata))
+                    .filter(Repository.id == repo_id)
+                    .first()
                 )
                 if repo:
                     for key, value in metadata.items():
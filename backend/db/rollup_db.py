@@ -0,0 +1,146 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import sessionmaker, Session
+from .repo_db import Base
+from .engine import get_engine
+
+# Path of the repository-level rollup
+ROOT_PATH = ""
+
+
+class RepoRollup(Base):
+    __tablename__ = "repo_rollups"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    repo_id = Column(Integer, ForeignKey("repositories.id"), nullable=False)
+    path = Column(String, nullable=False)  # directory, or "" for the repository
+    depth = Column(Integer, nullable=False)
+    summary = Column(Text, nullable=False)
+    # Hash of the children's summaries the rollup was written from; None
+    # when it is a fallback to be rewritten by the next ingestion
+    input_hash = Column(String, nullable=True)
+    file_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint("repo_id", "path", name="uq_repo_rollups_repo_path"),
+    )
+
+
+def rollup_to_dict(rollup: RepoRollup) -> Dict[str, Any]:
+    return {
+        "path": rollup.path,
+        "depth": rollup.depth,
+        "summary": rollup.summary,
+        "input_hash": rollup.input_hash,
+        "file_count": rollup.file_count,
+    }
+
+
+class RollupStoreManager:
+    """
+    Directory- and repository-level summaries built from the per-file
+    summaries (see `chat.rollup.RollupBuilder`).
+    """
+
+    def __init__(self, db_path: str = "./data/repositories.db"):
+        # Repository's relationships must resolve when used on their own
+        from .chat_db import ChatHistory
+
+        self.engine = get_engine(db_path)
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        Base.metadata.create_all(bind=self.engine, tables=[RepoRollup.__table__])
+
+    def get_session(self) -> Session:
+        return self.SessionLocal()
+
+    def has_rollups(self, repo_id: int) -> bool:
+        with self.get_session() as session:
+            return (
+                session.query(RepoRollup.id)
+                .filter(RepoRollup.repo_id == repo_id)
+                .first()
+                is not None
+            )
+
+    def get_hashes(self, repo_id: int) -> Dict[str, Optional[str]]:
+        """{path: input_hash} of every stored rollup, without the summaries."""
+        with self.get_session() as session:
+            rows = session.query(RepoRollup.path, RepoRollup.input_hash).filter(
+                RepoRollup.repo_id == repo_id
+            )
+            return {path: input_hash for path, input_hash in rows}
+
+    def get_summaries(self, repo_id: int, paths: Iterable[str]) -> Dict[str, str]:
+        with self.get_session() as session:
+            rows = session.query(RepoRollup.path, RepoRollup.summary).filter(
+                RepoRollup.repo_id == repo_id, RepoRollup.path.in_(list(paths))
+            )
+            return {path: summary for path, summary in rows}
+
+    def list_rollups(
+        self, repo_id: int, max_depth: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Rollups from the repository down, largest directories first."""
+        with self.get_session() as session:
+            query = session.query(RepoRollup).filter(RepoRollup.repo_id == repo_id)
+            if max_depth is not None:
+                query = query.filter(RepoRollup.depth <= max_depth)
+            query = query.order_by(
+                RepoRollup.depth, RepoRollup.file_count.desc(), RepoRollup.path
+            )
+            return [rollup_to_dict(rollup) for rollup in query.all()]
+
+    def save_rollups(self, repo_id: int, rollups: Iterable[Dict[str, Any]]):
+        """Insert or replace rollups given as dicts like `rollup_to_dict`'s."""
+        rows = [
+            {**rollup, "repo_id": repo_id, "updated_at": datetime.now()}
+            for rollup in rollups
+        ]
+        if not rows:
+            return
+        statement = insert(RepoRollup)
+        statement = statement.on_conflict_do_update(
+            index_elements=[RepoRollup.repo_id, RepoRollup.path],
+            set_={
+                name: statement.excluded[name]
+                for name in (
+                    "depth",
+                    "summary",
+                    "input_hash",
+                    "file_count",
+                    "updated_at",
+                )
+            },
+        )
+        with self.get_session() as session:
+            try:
+                session.execute(statement, rows)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def delete_rollups(self, repo_id: int, keep: Optional[Iterable[str]] = None):
+        """Delete the repository's rollups, except those at `keep` paths."""
+        with self.get_session() as session:
+            try:
+                query = session.query(RepoRollup).filter(RepoRollup.repo_id == repo_id)
+                if keep is not None:
+                    query = query.filter(RepoRollup.path.notin_(list(keep)))
+                query.delete(synchronize_session=False)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
@@ -0,0 +1,155 @@
+import json
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import Column, Float, Integer, String, Text, case, cast, or_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import sessionmaker, Session
+from core.shared_store import SharedStore
+from .repo_db import Base
+from .engine import get_engine
+
+# Upper bound for prefix range scans on the primary key
+_PREFIX_END = "\U0010ffff"
+
+
+class SharedState(Base):
+    __tablename__ = "shared_state"
+    key = Column(String, primary_key=True)
+    value = Column(Text, nullable=False)  # JSON
+    expires_at = Column(Float, nullable=True)  # Unix time
+
+
+class SQLiteSharedStore(SharedStore):
+    """`SharedStore` in a table of the repository database."""
+
+    def __init__(self, db_path: str = "./data/repositories.db"):
+        # Repository's relationships must resolve when used on their own
+        from .chat_db import ChatHistory
+
+        self.engine = get_engine(db_path)
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        Base.metadata.create_all(bind=self.engine, tables=[SharedState.__table__])
+
+    def get_session(self) -> Session:
+        return self.SessionLocal()
+
+    @staticmethod
+    def _live():
+        now = time.time()
+        return or_(SharedState.expires_at.is_(None), SharedState.expires_at > now)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self.get_session() as session:
+            value = (
+                session.query(SharedState.value)
+                .filter(SharedState.key == key, self._live())
+                .scalar()
+            )
+            return json.loads(value) if value is not None else default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl is not None else None
+        statement = insert(SharedState).values(
+            key=key, value=json.dumps(value), expires_at=expires_at
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[SharedState.key],
+            set_={"value": statement.excluded.value, "expires_at": expires_at},
+        )
+        with self.get_session() as session:
+            try:
+                session.execute(statement)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def delete(self, key: str) -> bool:
+        with self.get_session() as session:
+            try:
+                deleted = (
+                    session.query(SharedState)
+                    .filter(SharedState.key == key)
+                    .delete(synchronize_session=False)
+                )
+                session.commit()
+                return bool(deleted)
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        # Overwrites only an expired row, in one statement
+        expires_at = time.time() + ttl if ttl is not None else None
+        statement = insert(SharedState).values(
+            key=key, value=json.dumps(value), expires_at=expires_at
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[SharedState.key],
+            set_={"value": statement.excluded.value, "expires_at": expires_at},
+            where=SharedState.expires_at <= time.time(),
+        ).returning(SharedState.key)
+        with self.get_session() as session:
+            try:
+                added = session.execute(statement).first() is not None
+                session.commit()
+                return added
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        with self.get_session() as session:
+            try:
+                deleted = (
+                    session.query(SharedState)
+                    .filter(
+                        SharedState.key == key,
+                        SharedState.value == json.dumps(value),
+                        self._live(),
+                    )
+                    .delete(synchronize_session=False)
+                )
+                session.commit()
+                return bool(deleted)
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        # One statement, so concurrent increments from any process add up
+        expired = SharedState.expires_at <= time.time()
+        current = case((expired, 0), else_=cast(SharedState.value, Integer))
+        statement = insert(SharedState).values(
+            key=key, value=str(amount), expires_at=None
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[SharedState.key],
+            set_={
+                "value": cast(current + amount, String),
+                "expires_at": None,
+            },
+        ).returning(SharedState.value)
+        with self.get_session() as session:
+            try:
+                value = session.execute(statement).scalar_one()
+                session.commit()
+                return int(value)
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def items(self, prefix: str) -> Dict[str, Any]:
+        with self.get_session() as session:
+            rows = (
+                session.query(SharedState.key, SharedState.value)
+                .filter(
+                    SharedState.key >= prefix,
+                    SharedState.key < prefix + _PREFIX_END,
+                    self._live(),
+                )
+                .all()
+            )
+            return {key: json.loads(value) for key, value in rows}
@@ -0,0 +1,143 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.orm import sessionmaker, Session, declarative_base
+from sqlalchemy import Column, Integer, String, DateTime, Text, func
+from .engine import get_engine
+
+# The cache lives in its own database file, so it has its own metadata
+CacheBase = declarative_base()
+
+
+class SummaryCacheEntry(CacheBase):
+    __tablename__ = "summary_cache"
+
+    content_hash = Column(String, primary_key=True)
+    model_id = Column(String, primary_key=True)
+    prompt_version = Column(String, primary_key=True)
+    summary = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=func.now())
+    last_accessed = Column(DateTime, default=func.now(), index=True)
+
+
+class SummaryCacheManager:
+    """
+    Persistent cache of LLM file summaries, keyed by
+    (content hash, summarizer model id, prompt version).
+
+    The file path is deliberately not part of the key, so renamed or copied
+    files with identical content reuse one summary. That summary may name
+    the path it was first written for.
+    """
+
+    # Hits only refresh `last_accessed` once it is older than this, so a
+    # fully cached re-ingest is read-only
+    touch_interval = timedelta(days=1)
+
+    def __init__(
+        self,
+        db_path: str = "./data/summary_cache.db",
+        max_entries: int = 50000,
+        max_age_days: int = 30,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.engine = get_engine(db_path)
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        CacheBase.metadata.create_all(bind=self.engine)
+
+    def get_session(self) -> Session:
+        return self.SessionLocal()
+
+    @staticmethod
+    def hash_content(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(
+        self, content_hash: str, model_id: str, prompt_version: str
+    ) -> Optional[str]:
+        """Return a cached summary, marking it as used at most once a day."""
+        with self.get_session() as session:
+            try:
+                entry = session.get(
+                    SummaryCacheEntry, (content_hash, model_id, prompt_version)
+                )
+                if entry is None:
+                    return None
+                summary = entry.summary
+                now = datetime.now()
+                if entry.last_accessed is None or (
+                    now - entry.last_accessed > self.touch_interval
+                ):
+                    entry.last_accessed = now
+                    session.commit()
+                return summary
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def put(
+        self, content_hash: str, model_id: str, prompt_version: str, summary: str
+    ):
+        with self.get_session() as session:
+            try:
+                session.merge(
+                    SummaryCacheEntry(
+                        content_hash=content_hash,
+                        model_id=model_id,
+                        prompt_version=prompt_version,
+                        summary=summary,
+                        size=len(summary),
+                        last_accessed=datetime.now(),
+                    )
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def evict(self) -> int:
+        """
+        Drop entries not used within `max_age_days`, then the least recently
+        used entries beyond `max_entries`. Returns the number of rows removed.
+        """
+        with self.get_session() as session:
+            try:
+                cutoff = datetime.now() - timedelta(days=self.max_age_days)
+                removed = (
+                    session.query(SummaryCacheEntry)
+                    .filter(SummaryCacheEntry.last_accessed < cutoff)
+                    .delete(synchronize_session=False)
+                )
+
+                overflow = (
+                    session.query(SummaryCacheEntry).count() - self.max_entries
+                )
+                if overflow > 0:
+                    oldest = (
+                        session.query(
+                            SummaryCacheEntry.content_hash,
+                            SummaryCacheEntry.model_id,
+                            SummaryCacheEntry.prompt_version,
+                        )
+                        .order_by(SummaryCacheEntry.last_accessed.asc())
+                        .limit(overflow)
+                        .all()
+                    )
+                    for content_hash, model_id, prompt_version in oldest:
+                        session.query(SummaryCacheEntry).filter(
+                            SummaryCacheEntry.content_hash == content_hash,
+                            SummaryCacheEntry.model_id == model_id,
+                            SummaryCacheEntry.prompt_version == prompt_version,
+                        ).delete(synchronize_session=False)
+                    removed += len(oldest)
+
+                session.commit()
+                return removed
+            except Exception as e:
+                session.rollback()
+                raise e
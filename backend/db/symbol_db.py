@@ -0,0 +1,315 @@
+import difflib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import (
+    func,
+    select,
+    Column,
+    Integer,
+    String,
+    Text,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import sessionmaker, Session
+from .repo_db import Base
+from .engine import get_engine
+
+# Upper bound for prefix range scans, so they can use the (repo_id, name) index
+_PREFIX_END = "\U0010ffff"
+
+
+class RepoFile(Base):
+    __tablename__ = "repo_files"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    repo_id = Column(Integer, ForeignKey("repositories.id"), nullable=False)
+    file_path = Column(String, nullable=False)
+    summary = Column(Text, nullable=False)
+    content_preview = Column(Text, nullable=True)
+    file_size = Column(Integer, nullable=True)
+    file_url = Column(String, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("repo_id", "file_path", name="uq_repo_files_repo_path"),
+    )
+
+
+class CodeSymbol(Base):
+    __tablename__ = "code_symbols"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    repo_id = Column(Integer, ForeignKey("repositories.id"), nullable=False)
+    name = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # "function" or "class"
+    file_path = Column(String, nullable=False)
+    line = Column(Integer, nullable=False)
+    signature = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_code_symbols_repo_name", "repo_id", "name"),
+        Index("ix_code_symbols_repo_file", "repo_id", "file_path"),
+    )
+
+
+def symbol_to_dict(symbol: CodeSymbol) -> Dict[str, Any]:
+    return {
+        "name": symbol.name,
+        "kind": symbol.kind,
+        "line": symbol.line,
+        "signature": symbol.signature,
+        "file_path": symbol.file_path,
+    }
+
+
+class SymbolStoreManager:
+    """
+    Persistent per-repository file summaries and symbol table (functions
+    and classes), so lookups survive restarts and don't scan memory.
+    """
+
+    # Upper bound on names compared by difflib in one fuzzy lookup
+    max_fuzzy_candidates = 2000
+
+    def __init__(self, db_path: str = "./data/repositories.db"):
+        # Repository's relationships must resolve when used on their own
+        from .chat_db import ChatHistory
+
+        self.engine = get_engine(db_path)
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        Base.metadata.create_all(
+            bind=self.engine, tables=[RepoFile.__table__, CodeSymbol.__table__]
+        )
+
+    def get_session(self) -> Session:
+        return self.SessionLocal()
+
+    def _delete_files(self, session: Session, repo_id: int, file_paths=None):
+        for model in (RepoFile, CodeSymbol):
+            query = session.query(model).filter(model.repo_id == repo_id)
+            if file_paths is not None:
+                query = query.filter(model.file_path.in_(list(file_paths)))
+            query.delete(synchronize_session=False)
+
+    def save_files(self, repo_id: int, code_summaries: Iterable[Any]):
+        """Replace the stored summaries and symbols of the given files."""
+        code_summaries = list(code_summaries)
+        if not code_summaries:
+            return
+        with self.get_session() as session:
+            try:
+                self._delete_files(
+                    session, repo_id, [s.file_path for s in code_summaries]
+                )
+                files, symbols = [], []
+                for code_summary in code_summaries:
+                    files.append(
+                        {
+                            "repo_id": repo_id,
+                            "file_path": code_summary.file_path,
+                            "summary": code_summary.summary,
+                            "content_preview": code_summary.content_preview,
+                            "file_size": code_summary.metadata.get("file_size"),
+                            "file_url": code_summary.metadata.get("file_url"),
+                        }
+                    )
+                    for kind, elements in (
+                        ("function", code_summary.functions),
+                        ("class", code_summary.classes),
+                    ):
+                        for element in elements:
+                            symbols.append(
+                                {
+                                    "repo_id": repo_id,
+                                    "name": element["name"],
+                                    "kind": kind,
+                                    "file_path": code_summary.file_path,
+                                    "line": element["line"],
+                                    "signature": element.get("signature"),
+                                }
+                            )
+                session.bulk_insert_mappings(RepoFile, files)
+                if symbols:
+                    session.bulk_insert_mappings(CodeSymbol, symbols)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def delete_files(self, repo_id: int, file_paths: Optional[Iterable[str]] = None):
+        """Delete the given files' rows, or every file of the repository."""
+        with self.get_session() as session:
+            try:
+                self._delete_files(session, repo_id, file_paths)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def has_files(self, repo_id: int) -> bool:
+        with self.get_session() as session:
+            return (
+                session.query(RepoFile.id).filter(RepoFile.repo_id == repo_id).first()
+                is not None
+            )
+
+    def get_file(self, repo_id: int, file_path: str) -> Optional[RepoFile]:
+        with self.get_session() as session:
+            return (
+                session.query(RepoFile)
+                .filter(RepoFile.repo_id == repo_id, RepoFile.file_path == file_path)
+                .first()
+            )
+
+    def get_files(self, repo_id: int, file_paths: Iterable[str]) -> List[RepoFile]:
+        with self.get_session() as session:
+            return (
+                session.query(RepoFile)
+                .filter(
+                    RepoFile.repo_id == repo_id,
+                    RepoFile.file_path.in_(list(file_paths)),
+                )
+                .all()
+            )
+
+    def list_file_stats(
+        self, repo_id: int, limit: int = 500, after: Optional[str] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        One page of (file_path, symbol count) for a repository, ordered by
+        path and continuing after `after`. Both parts are index-only reads;
+        no summaries or previews are loaded.
+        """
+        symbol_count = (
+            select(func.count(CodeSymbol.id))
+            .where(
+                CodeSymbol.repo_id == repo_id,
+                CodeSymbol.file_path == RepoFile.file_path,
+            )
+            .scalar_subquery()
+        )
+        with self.get_session() as session:
+            query = session.query(RepoFile.file_path, symbol_count).filter(
+                RepoFile.repo_id == repo_id
+            )
+            if after is not None:
+                query = query.filter(RepoFile.file_path > after)
+            rows = query.order_by(RepoFile.file_path).limit(limit).all()
+            return [tuple(row) for row in rows]
+
+    def list_file_summaries(
+        self, repo_id: int, limit: int = 500, after: Optional[str] = None
+    ) -> List[Tuple[str, str]]:
+        """One page of (file_path, summary), ordered by path after `after`."""
+        with self.get_session() as session:
+            query = session.query(RepoFile.file_path, RepoFile.summary).filter(
+                RepoFile.repo_id == repo_id
+            )
+            if after is not None:
+                query = query.filter(RepoFile.file_path > after)
+            rows = query.order_by(RepoFile.file_path).limit(limit).all()
+            return [tuple(row) for row in rows]
+
+    def list_symbols(
+        self,
+        repo_id: int,
+        kind: Optional[str] = None,
+        file_path: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        with self.get_session() as session:
+            query = session.query(CodeSymbol).filter(CodeSymbol.repo_id == repo_id)
+            if kind is not None:
+                query = query.filter(CodeSymbol.kind == kind)
+            if file_path is not None:
+                query = query.filter(CodeSymbol.file_path == file_path)
+            query = query.order_by(CodeSymbol.file_path, CodeSymbol.line)
+            if limit is not None:
+                query = query.limit(limit)
+            return [symbol_to_dict(symbol) for symbol in query.all()]
+
+    def _fuzzy_candidates(
+        self,
+        session: Session,
+        repo_id: int,
+        query: str,
+        limit: int,
+        file_path: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Names sharing the longest prefix of `query` that still yields `limit`
+        names, capped at `max_fuzzy_candidates`. Each step is an index range
+        scan, so fuzzy lookup never compares against the whole table.
+        """
+        base = session.query(CodeSymbol.name).filter(CodeSymbol.repo_id == repo_id)
+        if file_path is not None:
+            base = base.filter(CodeSymbol.file_path == file_path)
+        names: List[str] = []
+        for length in range(len(query) - 1, 0, -1):
+            prefix = query[:length]
+            names = [
+                name
+                for (name,) in base.filter(
+                    CodeSymbol.name >= prefix,
+                    CodeSymbol.name < prefix + _PREFIX_END,
+                )
+                .distinct()
+                .limit(self.max_fuzzy_candidates)
+                .all()
+            ]
+            if len(names) >= limit or len(names) >= self.max_fuzzy_candidates:
+                break
+        return names
+
+    def search_symbols(
+        self,
+        repo_id: int,
+        query: str,
+        match: str = "exact",
+        kind: Optional[str] = None,
+        file_path: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """
+        Look up symbols by name. `match` is "exact", "prefix" (index range
+        scan) or "fuzzy" (close matches among names sharing a prefix with
+        the query, so a typo in the first character is not matched).
+        `kind` and `file_path` narrow the results down further.
+        """
+        with self.get_session() as session:
+            base = session.query(CodeSymbol).filter(CodeSymbol.repo_id == repo_id)
+            if kind is not None:
+                base = base.filter(CodeSymbol.kind == kind)
+            if file_path is not None:
+                base = base.filter(CodeSymbol.file_path == file_path)
+
+            if match == "exact":
+                rows = base.filter(CodeSymbol.name == query).limit(limit).all()
+            elif match == "prefix":
+                rows = (
+                    base.filter(
+                        CodeSymbol.name >= query,
+                        CodeSymbol.name < query + _PREFIX_END,
+                    )
+                    .order_by(CodeSymbol.name)
+                    .limit(limit)
+                    .all()
+                )
+            elif match == "fuzzy":
+                names = difflib.get_close_matches(
+                    query,
+                    self._fuzzy_candidates(session, repo_id, query, limit, file_path),
+                    n=limit,
+                    cutoff=0.6,
+                )
+                if not names:
+                    return []
+                by_name: Dict[str, List[CodeSymbol]] = {}
+                for row in base.filter(CodeSymbol.name.in_(names)).all():
+                    by_name.setdefault(row.name, []).append(row)
+                rows = [row for name in names for row in by_name.get(name, [])]
+                rows = rows[:limit]
+            else:
+                raise ValueError(f"Unknown match mode: {match}")
+
+            return [symbol_to_dict(symbol) for symbol in rows]
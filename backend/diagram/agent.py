@@ -1,25 +1,17 @@
-import os
-from typing import List
+from typing import List, Optional
 
-from groq import Groq
-import chromadb
-from db.repo_db import RepositoryDataManager
 from core.config import settings
-
-
-class DiagramAgent:
-    def __init__(self):
-        self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
-
-    def generate_graph(self, repo_url: str, file_paths: List[str]) -> str:
-        """
-        Generate a Mermaid graph for the file structure using Groq LLM.
-        """
-        # Extract the repository name from the URL
-        repo_name = repo_url.rstrip("/").split("/")[-1]
-        # Create a formatted string of file paths for the prompt
-        file_list_str = "\n".join(f"- {path}" for path in file_paths)
-        systemPrompt = """
+from core.llm import LLMError
+from core.resources import (
+    get_chroma_client,
+    get_llm_gateway,
+    get_repo_manager,
+    get_single_flight,
+)
+from core.tokens import PromptBudget
+from .tree import MermaidTreeBuilder, extract_mermaid
+
+DIAGRAM_SYSTEM_PROMPT = """
 When generating output, follow these strict formatting rules to ensure consistency and correctness:
 
 - Use Proper Syntax: Ensure the output adheres to the specified syntax (e.g., Mermaid syntax for diagrams). Do not deviate from the required format.
@@ -105,35 +97,70 @@ graph TD
     src --> tests
 ```
 """
+
+
+class DiagramAgent:
+    def __init__(self):
+        self.llm = get_llm_gateway()
+        self.tree_builder = MermaidTreeBuilder(
+            max_depth=settings.diagram_max_depth,
+            max_children=settings.diagram_max_children,
+        )
+
+    def generate_graph(self, repo_url: str, file_paths: List[str]) -> str:
+        """
+        Generate a Mermaid graph for the file structure. The graph is built
+        locally from the paths; with `diagram_llm_refine` set, Groq then
+        relabels and regroups the compressed tree.
+        """
+        repo_name = repo_url.rstrip("/").split("/")[-1]
+        graph = self.tree_builder.build(repo_name, file_paths)
+        if settings.diagram_llm_refine:
+            return self.refine_graph(repo_url, graph) or graph
+        return graph
+
+    def refine_graph(self, repo_url: str, graph: str) -> Optional[str]:
+        """
+        Ask the LLM to improve the labels and grouping of a locally built
+        graph. Returns None when it fails or returns invalid Mermaid.
+        """
+        repo_name = repo_url.rstrip("/").split("/")[-1]
         prompt = f"""
-        Given the file structure of a GitHub repository, generate an optimized Mermaid diagram that represents the high-level architecture of the codebase. Group related files and directories into logical components (e.g., controllers, models, utils, api) and represent these components as subgraph nodes in the diagram. Use only the following Mermaid syntax: graph, subgraph, and --> (for connections). Ensure that:
+        Below is a Mermaid diagram of the file structure of a GitHub repository, built from its file paths. Large directories are already collapsed into single nodes with file counts, and "+N more files" nodes stand for folded entries. Improve it into a high-level architecture diagram: group related subgraphs into logical components (e.g., api, models, utils), give components short descriptive labels, and connect components with --> where one clearly uses another. Keep every collapsed node's file count. Use only the following Mermaid syntax: graph, subgraph, and --> (for connections).
 
-        Files belonging to a logical component are included within its subgraph and do not appear as separate nodes outside the subgraph.
-        Connections are made between subgraphs or high-level components, avoiding redundant links to individual files.
-        Only critical entry points (e.g., main.py, app.js, config.json) or standalone files (e.g., deploy.sh, requirements.txt) are represented as separate nodes outside of subgraphs.
-        The root directory acts as the top-level node, with subgraphs representing major components of the codebase. Prioritize simplicity, readability, and scalability. Avoid clutter by collapsing subdirectories into logical components where appropriate.
-        
         project_name: {repo_name}
-        
-        file structure: {file_list_str}
-        
+
+        diagram:
+        {graph}
+
         Diagram:
         """
+        budget = PromptBudget(
+            settings.GROQ_Diagram_MODEL_ID, max_completion_tokens=2000
+        )
+        if budget.count(DIAGRAM_SYSTEM_PROMPT + prompt) > budget.available:
+            print(f"Diagram for {repo_url} is too large to refine; keeping it as is")
+            return None
 
         try:
-            response = self.groq_client.chat.completions.create(
-                model=settings.GROQ_Diagram_MODEL_ID,
-                messages=[
-                    {"role": "system", "content": systemPrompt},
+            content = self.llm.complete(
+                settings.GROQ_Diagram_MODEL_ID,
+                [
+                    {"role": "system", "content": DIAGRAM_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=2000,
                 temperature=0.1,
+                label=f"diagram {repo_url}",
             )
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"Error generating diagram for {repo_url}: {e}")
-            return "An error occurred while generating the diagram."
+        except LLMError as e:
+            print(f"Error refining diagram for {repo_url}: {e}")
+            return None
+        source = extract_mermaid(content)
+        if source is None:
+            print(f"Discarding refined diagram for {repo_url}: not valid Mermaid")
+            return None
+        return f"```mermaid\n{source}\n```"
 
 
 class DiagramOrchestrator:
@@ -142,16 +169,24 @@ class DiagramOrchestrator:
         repo_db_path: str = settings.repo_db_path,
         chroma_path: str = settings.chroma_db_path,
     ):
-        self.repo_manager = RepositoryDataManager(repo_db_path)
-        self.chroma_client = chromadb.PersistentClient(path=chroma_path)
+        self.repo_manager = get_repo_manager(repo_db_path)
+        self.single_flight = get_single_flight()
+        self.chroma_path = chroma_path
         self.diagram_agent = DiagramAgent()
 
+    @property
+    def chroma_client(self):
+        # Looked up per use: the registry reopens it when vectors change
+        return get_chroma_client(self.chroma_path)
+
     def generate_graph_for_repo(self, repo_id: int) -> str:
         """
         Fetches the file structure for a repo and generates a Mermaid graph.
         """
         # 1. Get repository info from the database
-        repo = self.repo_manager.get_full_repository_by_id(repo_id)
+        repo = self.repo_manager.get_full_repository_by_id(
+            repo_id, include=("diagram_script",)
+        )
         if not repo:
             return "Error: Repository with the given ID was not found."
 
@@ -160,9 +195,25 @@ class DiagramOrchestrator:
             print(f"Returning cached diagram for repo_id: {repo_id}")
             return repo.diagram_script
 
-        # 3. If not cached, generate the graph
+        # 3. Generate once, however many requests arrive at the same time
+        return self.single_flight.do(
+            f"diagram:{repo_id}",
+            lambda: self._generate_graph(
+                repo_id, repo.repo_url, repo.collection_name
+            ),
+            check=lambda: self._cached_diagram(repo_id),
+        )
+
+    def _cached_diagram(self, repo_id: int):
+        repo = self.repo_manager.get_full_repository_by_id(
+            repo_id, include=("diagram_script",)
+        )
+        return repo.diagram_script if repo else None
+
+    def _generate_graph(
+        self, repo_id: int, repo_url: str, collection_name: str
+    ) -> str:
         print(f"No cached diagram found. Generating new diagram for repo_id: {repo_id}")
-        repo_url, collection_name = repo.repo_url, repo.collection_name
 
         try:
             collection = self.chroma_client.get_collection(name=collection_name)
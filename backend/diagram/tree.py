@@ -0,0 +1,177 @@
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Names that usually mark where a project starts; kept visible when a
+# directory's files are folded
+ENTRY_POINT_NAMES = {
+    "main",
+    "__main__",
+    "app",
+    "server",
+    "index",
+    "cli",
+    "manage",
+    "setup",
+    "readme",
+}
+
+
+class DirNode:
+    """A directory in the file tree, with per-subtree file counts."""
+
+    __slots__ = ("name", "dirs", "files", "file_count")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.dirs: Dict[str, "DirNode"] = {}
+        self.files: List[str] = []
+        self.file_count = 0
+
+
+def build_tree(file_paths: Iterable[str]) -> DirNode:
+    """Fold file paths into a directory tree. Duplicate paths count once."""
+    # Group by directory first: a repository has far fewer directories than
+    # files, so the tree walk below runs once per directory
+    by_dir: Dict[str, List[str]] = {}
+    for file_path in set(file_paths):
+        directory, _, file_name = file_path.strip("/").rpartition("/")
+        if file_name:
+            by_dir.setdefault(directory, []).append(file_name)
+
+    root = DirNode("")
+    for directory, files in by_dir.items():
+        node = root
+        node.file_count += len(files)
+        for part in directory.split("/"):
+            if not part or part == ".":
+                continue
+            child = node.dirs.get(part)
+            if child is None:
+                child = node.dirs[part] = DirNode(part)
+            node = child
+            node.file_count += len(files)
+        node.files.extend(files)
+    return root
+
+
+def _is_entry_point(file_name: str) -> bool:
+    return os.path.splitext(file_name)[0].lower() in ENTRY_POINT_NAMES
+
+
+class MermaidTreeBuilder:
+    """
+    Builds a Mermaid diagram of a repository straight from its file paths.
+
+    Directories become subgraphs. Below `max_depth`, a directory is drawn as
+    one node with its file count. A directory with more than `max_children`
+    entries shows its largest subdirectories and entry-point files, and
+    folds the rest into a "+N more" node. Chains of single-child directories
+    (`src/main/java`) are merged into one subgraph. The output size depends
+    on these limits, not on the repository size.
+    """
+
+    def __init__(self, max_depth: int = 3, max_children: int = 12):
+        self.max_depth = max_depth
+        self.max_children = max_children
+
+    def build(self, repo_name: str, file_paths: Iterable[str]) -> str:
+        """Mermaid source, fenced as ```mermaid like the LLM output was."""
+        self._ids = 0
+        self._lines = ["graph TD"]
+        root = build_tree(file_paths)
+        root_id = self._node(repo_name or "repository", shape="root")
+        self._children(root, root_id, depth=0, indent=1)
+        return "```mermaid\n" + "\n".join(self._lines) + "\n```"
+
+    def _next_id(self) -> str:
+        self._ids += 1
+        return f"n{self._ids}"
+
+    @staticmethod
+    def _label(text: str) -> str:
+        # Quoted labels allow any characters except the quote itself
+        return '"' + text.replace('"', "#quot;") + '"'
+
+    def _node(self, text: str, indent: int = 1, shape: str = "box") -> str:
+        node_id = self._next_id()
+        label = self._label(text)
+        wrapped = f"([{label}])" if shape == "root" else f"[{label}]"
+        self._lines.append("    " * indent + node_id + wrapped)
+        return node_id
+
+    def _link(self, source: str, target: str, indent: int):
+        self._lines.append("    " * indent + f"{source} --> {target}")
+
+    def _pick(self, node: DirNode):
+        """Entries to draw for `node`, and how many files are folded away."""
+        dirs = sorted(node.dirs.values(), key=lambda d: (-d.file_count, d.name))
+        files = sorted(node.files, key=lambda f: (not _is_entry_point(f), f))
+        if len(dirs) + len(files) <= self.max_children:
+            return dirs, files, 0
+        # Entry points get their slots first, directories the rest
+        shown_files = [f for f in files if _is_entry_point(f)][: self.max_children]
+        shown_dirs = dirs[: self.max_children - len(shown_files)]
+        shown = sum(d.file_count for d in shown_dirs) + len(shown_files)
+        return shown_dirs, shown_files, node.file_count - shown
+
+    def _children(
+        self,
+        node: DirNode,
+        parent_id: Optional[str],
+        depth: int,
+        indent: int,
+        picked=None,
+    ):
+        # Inside a subgraph, containment already shows the hierarchy; only
+        # the root node links to its entries
+        dirs, files, folded = picked or self._pick(node)
+        for file_name in files:
+            self._entry(self._node(file_name, indent), parent_id, indent)
+        for child in dirs:
+            self._directory(child, parent_id, depth + 1, indent)
+        if folded:
+            more = self._node(f"+{folded} more files", indent)
+            self._entry(more, parent_id, indent)
+
+    def _entry(self, node_id: str, parent_id: Optional[str], indent: int):
+        if parent_id is not None:
+            self._link(parent_id, node_id, indent)
+
+    def _directory(
+        self, node: DirNode, parent_id: Optional[str], depth: int, indent: int
+    ):
+        name = node.name
+        while len(node.dirs) == 1 and not node.files:
+            node = next(iter(node.dirs.values()))
+            name = f"{name}/{node.name}"
+
+        picked = self._pick(node)
+        dirs, files, folded = picked
+        if depth >= self.max_depth or not (dirs or len(files) + bool(folded) > 1):
+            count = node.file_count
+            label = f"{name}/ ({count} file{'s' if count != 1 else ''})"
+            if not node.dirs and len(node.files) == 1:
+                label = f"{name}/{node.files[0]}"
+            self._entry(self._node(label, indent), parent_id, indent)
+            return
+
+        subgraph_id = self._next_id()
+        self._lines.append(
+            "    " * indent + f"subgraph {subgraph_id}[{self._label(name + '/')}]"
+        )
+        self._children(node, None, depth, indent + 1, picked)
+        self._lines.append("    " * indent + "end")
+        self._entry(subgraph_id, parent_id, indent)
+
+
+def extract_mermaid(text: str) -> Optional[str]:
+    """The Mermaid source inside `text` (fenced or bare), or None."""
+    match = re.search(r"```(?:mermaid)?\s*\n(.*?)```", text, re.DOTALL)
+    source = (match.group(1) if match else text).strip()
+    if not re.match(r"(graph|flowchart)\s+(TD|TB|BT|LR|RL)\b", source):
+        return None
+    # Every subgraph must be closed
+    opened = len(re.findall(r"^\s*subgraph\b", source, re.MULTILINE))
+    closed = len(re.findall(r"^\s*end\s*$", source, re.MULTILINE))
+    return source if opened == closed else None
@@ -1,10 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from core.config import settings
+from core.jobs import IngestWorkerPool
 from routes import api_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Repository ingestion runs in one process fed by the job queue. Each
+    # API worker starts one, but only one at a time writes (see IngestWorkerPool)
+    pool = IngestWorkerPool(workers=settings.ingest_workers)
+    pool.start()
+    try:
+        yield
+    finally:
+        pool.stop()
+
+
 app = FastAPI(
     title="DevCompass API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware to allow requests from your frontend
@@ -14,6 +31,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Chat history page cursors
+    expose_headers=["X-Prev-Cursor", "X-Next-Cursor"],
 )
 
 app.include_router(api_router)
@@ -1,13 +1,23 @@
-from groq import Groq
 import os
-import chromadb
-from db.repo_db import RepositoryDataManager
 from core.config import settings
+from core.llm import LLMError
+from core.tokens import get_token_counter
+from core.resources import (
+    SharedFastEmbedEmbedder,
+    get_chroma_client,
+    get_llm_gateway,
+    get_repo_manager,
+    get_single_flight,
+)
+from chat.rollup import repository_overview
+from db.rollup_db import RollupStoreManager
+from db.symbol_db import SymbolStoreManager
+from podcast.context import PodcastContextBuilder
 
 
 class PodcastAgent:
     def __init__(self):
-        self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
+        self.llm = get_llm_gateway()
 
     def generate_script(self, repo_url: str, topic: str, context: str) -> str:
         """
@@ -41,17 +51,17 @@ class PodcastAgent:
         """
 
         try:
-            response = self.groq_client.chat.completions.create(
-                model=settings.GROQ_POD_MODEL_ID,
-                messages=[
+            return self.llm.complete(
+                settings.GROQ_POD_MODEL_ID,
+                [
                     {"role": "system", "content": systemPrompt},
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=1500,
                 temperature=0.4,
+                label=f"podcast {repo_url}",
             )
-            return response.choices[0].message.content
-        except Exception as e:
+        except LLMError as e:
             print(f"Error generating podcast script for {repo_url}: {e}")
             return "An error occurred while generating the podcast script."
 
@@ -62,24 +72,38 @@ class PodcastOrchestrator:
         repo_db_path: str = settings.repo_db_path,
         chroma_path: str = settings.chroma_db_path,
     ):
-        self.repo_manager = RepositoryDataManager(repo_db_path)
-        self.chroma_client = chromadb.PersistentClient(path=chroma_path)
+        self.repo_manager = get_repo_manager(repo_db_path)
+        self.single_flight = get_single_flight()
+        self.chroma_path = chroma_path
         self.podcast_agent = PodcastAgent()
+        count_tokens = get_token_counter(settings.GROQ_POD_MODEL_ID)
+        rollup_store = RollupStoreManager(repo_db_path)
+        self.context_builder = PodcastContextBuilder(
+            SymbolStoreManager(repo_db_path),
+            max_tokens=settings.podcast_context_tokens,
+            page_size=settings.podcast_context_page_size,
+            topic_candidates=settings.podcast_topic_candidates,
+            # Same model the vectors were embedded with
+            embed=SharedFastEmbedEmbedder().get_embedding,
+            count_tokens=count_tokens,
+            overview=lambda repo_id, max_tokens: repository_overview(
+                rollup_store, repo_id, max_tokens, count_tokens
+            ),
+        )
 
-    def truncate_context(self, repo_documents, max_chars=6500):
-        context = ""
-        for doc in repo_documents:
-            if len(context) + len(doc) > max_chars:
-                break
-            context += "\n\n---\n\n" + doc
-        return context
+    @property
+    def chroma_client(self):
+        # Looked up per use: the registry reopens it when vectors change
+        return get_chroma_client(self.chroma_path)
 
     def generate_script_for_repo(self, repo_id: int) -> str:
         """
         Fetches full context for a repo and generates a podcast script.
         """
         # 1. Get repository info from the database
-        repo = self.repo_manager.get_full_repository_by_id(repo_id)
+        repo = self.repo_manager.get_full_repository_by_id(
+            repo_id, include=("podcast_script",)
+        )
         if not repo:
             return "Error: Repository with the given ID was not found."
 
@@ -88,22 +112,39 @@ class PodcastOrchestrator:
             print(f"Returning cached podcast script for repo_id: {repo_id}")
             return repo.podcast_script
 
-        # 3. If not cached, generate the script
+        # 3. Generate once, however many requests arrive at the same time
+        return self.single_flight.do(
+            f"podcast:{repo_id}",
+            lambda: self._generate_script(
+                repo_id, repo.repo_url, repo.collection_name
+            ),
+            check=lambda: self._cached_podcast(repo_id),
+        )
+
+    def _cached_podcast(self, repo_id: int):
+        repo = self.repo_manager.get_full_repository_by_id(
+            repo_id, include=("podcast_script",)
+        )
+        return repo.podcast_script if repo else None
+
+    def _generate_script(
+        self, repo_id: int, repo_url: str, collection_name: str
+    ) -> str:
         print(
             f"No cached script found. Generating new podcast script for repo_id: {repo_id}"
         )
-        repo_url, collection_name = repo.repo_url, repo.collection_name
 
-        # 4. Get the full context from the vector database
+        # 4. Build a ranked, budgeted context from the most relevant files
+        topic = f"A deep dive into the {os.path.basename(repo_url)} repository."
         try:
             collection = self.chroma_client.get_collection(name=collection_name)
-            results = collection.get()  # Gets all items in the collection
+            context = self.context_builder.build(repo_id, topic, collection)
+            if not context:
+                # Ingested before summaries were stored
+                context = self.context_builder.build_from_collection(collection)
 
-            if not results or not results.get("documents"):
+            if not context:
                 return "Error: No context found for this repository. Please ensure it has been processed."
-            repo_documents = results["documents"]
-            context = self.truncate_context(repo_documents)
-            topic = f"A deep dive into the {os.path.basename(repo_url)} repository."
 
         except Exception as e:
             print(
@@ -0,0 +1,178 @@
+import math
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.tokens import estimate_tokens
+from db.symbol_db import SymbolStoreManager
+
+# Basenames (without extension) of files that usually show how a project starts
+ENTRY_POINT_NAMES = {
+    "main",
+    "__main__",
+    "app",
+    "server",
+    "index",
+    "cli",
+    "manage",
+    "wsgi",
+    "asgi",
+    "setup",
+}
+README_PREFIXES = ("readme", "overview", "architecture", "getting_started")
+# Directories whose files rarely explain what a project does
+LOW_VALUE_DIRS = {"test", "tests", "spec", "__tests__", "examples", "vendor", "dist"}
+
+
+class PodcastContextBuilder:
+    """
+    Picks and packs the repository context for a podcast episode.
+
+    With an `overview` function (repo_id, max_tokens) -> text, such as the
+    directory rollups, up to half the budget goes to it first. Files are
+    ranked from the symbol table alone (paths and symbol counts, read a page
+    at a time): entry points and README-like files first, then files
+    defining many symbols, shallow paths over deep ones. When an `embed`
+    function is given, files whose vectors are closest to the episode topic
+    get a boost. Only the summaries of the best files are then read, and
+    packed until `max_tokens` is reached.
+    """
+
+    def __init__(
+        self,
+        symbol_store: SymbolStoreManager,
+        max_tokens: int = 1600,
+        page_size: int = 500,
+        topic_candidates: int = 50,
+        embed: Optional[Callable[[str], Sequence[float]]] = None,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        overview: Optional[Callable[[int, int], str]] = None,
+    ):
+        self.symbol_store = symbol_store
+        self.max_tokens = max_tokens
+        self.page_size = page_size
+        self.topic_candidates = topic_candidates
+        self.embed = embed
+        self.count_tokens = count_tokens
+        self.overview = overview
+
+    @staticmethod
+    def score_path(file_path: str, symbol_count: int) -> float:
+        parts = file_path.lower().split("/")
+        stem = os.path.splitext(parts[-1])[0]
+        score = 0.0
+        if stem in ENTRY_POINT_NAMES:
+            score += 3.0
+        if stem.startswith(README_PREFIXES):
+            score += 3.0
+        if LOW_VALUE_DIRS.intersection(parts[:-1]) or stem.startswith("test_"):
+            score -= 1.5
+        score += min(2.0, math.log2(1 + symbol_count) / 3)
+        score -= min(1.0, 0.25 * (len(parts) - 1))
+        return score
+
+    def topic_scores(self, collection, topic: str) -> Dict[str, float]:
+        """Boost by rank for the files nearest the topic in vector space."""
+        if self.embed is None or collection is None:
+            return {}
+        try:
+            results = collection.query(
+                query_embeddings=[list(self.embed(topic))],
+                n_results=self.topic_candidates,
+                include=["metadatas"],
+            )
+        except Exception as e:
+            print(f"Topic ranking skipped: {e}")
+            return {}
+        scores: Dict[str, float] = {}
+        metadatas = results.get("metadatas") or [[]]
+        for rank, metadata in enumerate(metadatas[0]):
+            file_path = (metadata or {}).get("file_path")
+            if file_path and file_path not in scores:
+                scores[file_path] = 2.0 * (1 - rank / self.topic_candidates)
+        return scores
+
+    def rank_files(self, repo_id: int, boosts: Dict[str, float]) -> List[str]:
+        ranked: List[Tuple[float, str]] = []
+        after = None
+        while True:
+            page = self.symbol_store.list_file_stats(
+                repo_id, limit=self.page_size, after=after
+            )
+            for file_path, symbol_count in page:
+                score = self.score_path(file_path, symbol_count)
+                ranked.append((score + boosts.get(file_path, 0.0), file_path))
+            if len(page) < self.page_size:
+                break
+            after = page[-1][0]
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [file_path for _, file_path in ranked]
+
+    def format_file(self, repo_id: int, repo_file) -> str:
+        symbols = self.symbol_store.list_symbols(
+            repo_id, file_path=repo_file.file_path, limit=30
+        )
+        functions = [s["name"] for s in symbols if s["kind"] == "function"]
+        classes = [s["name"] for s in symbols if s["kind"] == "class"]
+        lines = [f"File: {repo_file.file_path}", f"Summary: {repo_file.summary}"]
+        if classes:
+            lines.append(f"Classes: {', '.join(classes)}")
+        if functions:
+            lines.append(f"Functions: {', '.join(functions)}")
+        return "\n".join(lines)
+
+    def pack(self, sections: Sequence[str], max_tokens: Optional[int] = None) -> str:
+        max_tokens = self.max_tokens if max_tokens is None else max_tokens
+        context, used = [], 0
+        for section in sections:
+            cost = self.count_tokens(section)
+            if used + cost > max_tokens:
+                continue  # a shorter section further down may still fit
+            context.append(section)
+            used += cost
+        return "\n\n---\n\n".join(context)
+
+    def build(self, repo_id: int, topic: str, collection=None) -> str:
+        """Context for `topic`, or "" when the repository has no summaries."""
+        # Directory rollups cover the whole repository in a few sections;
+        # the best files fill the rest of the budget
+        overview = self.overview(repo_id, self.max_tokens // 2) if self.overview else ""
+        budget = self.max_tokens - (self.count_tokens(overview) if overview else 0)
+        ranked = self.rank_files(repo_id, self.topic_scores(collection, topic))
+        sections: List[str] = []
+        used = 0
+        # Read summaries in small ranked batches until the budget is spent
+        batch_size = 20
+        for start in range(0, len(ranked), batch_size):
+            batch = ranked[start : start + batch_size]
+            by_path = {
+                f.file_path: f for f in self.symbol_store.get_files(repo_id, batch)
+            }
+            for file_path in batch:
+                if file_path in by_path:
+                    section = self.format_file(repo_id, by_path[file_path])
+                    sections.append(section)
+                    used += self.count_tokens(section)
+            if used >= budget:
+                break
+        files = self.pack(sections, budget)
+        return "\n\n---\n\n".join(part for part in (overview, files) if part)
+
+    def build_from_collection(self, collection) -> str:
+        """
+        Fallback for repositories without stored summaries: page through the
+        vector documents and pack them in storage order.
+        """
+        # Documents are far bigger than path rows, so read fewer at a time
+        page_size = min(self.page_size, 50)
+        sections: List[str] = []
+        used, offset = 0, 0
+        while used < self.max_tokens:
+            page = collection.get(include=["documents"], limit=page_size, offset=offset)
+            documents = page.get("documents") or []
+            for document in documents:
+                sections.append(document.strip())
+                used += self.count_tokens(document)
+            if len(documents) < page_size:
+                break
+            offset += page_size
+        return self.pack(sections)
@@ -6,6 +6,8 @@ from routes.status import router as status_router
 from routes.setup import router as setup_router
 from routes.podcast import router as podcast_router
 from routes.diagram import router as diagram_router
+from routes.symbols import router as symbols_router
+from routes.jobs import router as jobs_router
 
 
 api_router = APIRouter(prefix=settings.API_STR)
@@ -16,3 +18,5 @@ api_router.include_router(chat_router, tags=["chat"])
 api_router.include_router(podcast_router, tags=["podcast"])
 api_router.include_router(status_router, tags=["setup status"])
 api_router.include_router(diagram_router, tags=["diagram"])
+api_router.include_router(symbols_router, tags=["symbols"])
+api_router.include_router(jobs_router, tags=["jobs"])
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from datetime import datetime
-import core.state as state
-from typing import List
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import anyio
+import json
 from core.agent_singleton import get_agent
-from db.chat_db import ChatHistoryManager
+from core.concurrency import run_chat_call
+from core.resources import get_chat_history_manager
 
 router = APIRouter()
 
@@ -22,6 +26,8 @@ class ChatHistoryItem(BaseModel):
     repo_id: int
     query: str
     response: str
+    # Set when the response was cut to `response_chars`
+    response_truncated: bool = False
     timestamp: datetime
 
     class Config:
@@ -29,13 +35,15 @@ class ChatHistoryItem(BaseModel):
 
 
 github_agent = get_agent()
-chat_history_manager = ChatHistoryManager()
+chat_history_manager = get_chat_history_manager()
 
 
 @router.post("/chat/{repo_id}", response_model=ChatResponse)
 async def chat_endpoint(repo_id: int, req: ChatRequest):
     # Check if the specific repo exists in the DB.
-    repo_info = github_agent.repo_manager.get_repository(repo_id)
+    repo_info = await run_in_threadpool(
+        github_agent.repo_manager.get_repository, repo_id
+    )
     if not repo_info:
         raise HTTPException(
             status_code=404,
@@ -54,12 +62,18 @@ async def chat_endpoint(repo_id: int, req: ChatRequest):
     #             detail="An agent setup is in progress. Please try again later.",
     #         )
 
-    response_content = github_agent.query_repository(repo_id, req.message)
+    # Blocking LLM call, kept off the event loop and bounded separately
+    response_content = await run_chat_call(
+        github_agent.query_repository, repo_id, req.message
+    )
 
     # Save the chat interaction to the database
     try:
-        chat_history_manager.add_chat_message(
-            repo_id=repo_id, query=req.message, response=response_content
+        await run_in_threadpool(
+            chat_history_manager.add_chat_message,
+            repo_id=repo_id,
+            query=req.message,
+            response=response_content,
         )
     except Exception as e:
         # Log the error, but don't fail the request just because history saving failed
@@ -68,11 +82,113 @@ async def chat_endpoint(repo_id: int, req: ChatRequest):
     return {"response": response_content}
 
 
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Marks the end of the agent's chunk iterator
+_END = object()
+
+
+async def stream_chat_events(
+    request: Request, repo_id: int, message: str, chunks: Iterator[str]
+) -> AsyncIterator[str]:
+    """
+    Relay answer chunks as SSE `token` events, then a `done` event carrying
+    the full answer, which is saved to the chat history. If the client goes
+    away the run is stopped and nothing is saved.
+    """
+    parts: List[str] = []
+    completed = False
+    try:
+        while True:
+            if await request.is_disconnected():
+                print(f"Chat stream for repo {repo_id} closed by client")
+                break
+            # The agent blocks on the LLM, so pull each chunk off the loop
+            chunk = await run_chat_call(next, chunks, _END)
+            if chunk is _END:
+                completed = True
+                break
+            parts.append(chunk)
+            yield sse_event("token", {"content": chunk})
+    except Exception as e:
+        print(f"Chat stream for repo {repo_id} failed: {e}")
+        yield sse_event("error", {"detail": str(e)})
+    finally:
+        # Runs on cancellation too; closing the generator ends the LLM call
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(chunks.close)
+
+    if not completed:
+        return
+
+    response_content = "".join(parts)
+    try:
+        await run_in_threadpool(
+            chat_history_manager.add_chat_message,
+            repo_id=repo_id,
+            query=message,
+            response=response_content,
+        )
+    except Exception as e:
+        print(f"Could not save chat history: {e}")
+    yield sse_event("done", {"response": response_content})
+
+
+@router.post("/chat/{repo_id}/stream")
+async def chat_stream_endpoint(repo_id: int, req: ChatRequest, request: Request):
+    """
+    Streaming variant of /chat/{repo_id}: the answer arrives as server-sent
+    events (`token`, then `done` or `error`).
+    """
+    repo_info = await run_in_threadpool(
+        github_agent.repo_manager.get_repository, repo_id
+    )
+    if not repo_info:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Repository with ID {repo_id} not found. Please process it first via the /setup endpoint.",
+        )
+
+    chunks = github_agent.stream_repository(repo_id, req.message)
+    return StreamingResponse(
+        stream_chat_events(request, repo_id, req.message, chunks),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/answer-cache/stats")
+def get_answer_cache_stats():
+    """
+    Chat answer cache hit/miss counts across all API processes, overall and per
+    repository, plus the number of stored answers.
+    """
+    return github_agent.answer_cache.stats()
+
+
 @router.get("/chat/{repo_id}/history", response_model=List[ChatHistoryItem])
-def get_chat_history(repo_id: int):
+def get_chat_history(
+    repo_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    response_chars: Optional[int] = Query(None, ge=0),
+):
     """
-    Retrieves the chat history for a specific repository.
+    Retrieves one page of the chat history for a specific repository, oldest
+    first. Without a cursor this is the latest `limit` messages; `before` or
+    `after` (a message id) pages from there. The X-Prev-Cursor and
+    X-Next-Cursor headers hold the cursors of the older and newer pages when
+    there are any. `response_chars` truncates responses (0 leaves them out).
     """
+    if before is not None and after is not None:
+        raise HTTPException(
+            status_code=400, detail="Use either 'before' or 'after', not both."
+        )
     try:
         # First, check if the repository exists to give a clean 404
         repo_info = github_agent.repo_manager.get_repository(repo_id)
@@ -81,8 +197,29 @@ def get_chat_history(repo_id: int):
                 status_code=404, detail=f"Repository with ID {repo_id} not found."
             )
 
-        history = chat_history_manager.get_chat_history(repo_id)
-        return [ChatHistoryItem.model_validate(item, from_attributes=True) for item in history]
+        try:
+            page, has_more = chat_history_manager.get_chat_page(
+                repo_id,
+                limit=limit,
+                before=before,
+                after=after,
+                response_chars=response_chars,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Reading backwards, `has_more` means older messages; forwards, newer
+        if after is None:
+            older, newer = has_more, before is not None
+        else:
+            older, newer = True, has_more
+        if page and older:
+            response.headers["X-Prev-Cursor"] = str(page[0]["id"])
+        if page and newer:
+            response.headers["X-Next-Cursor"] = str(page[-1]["id"])
+        return [ChatHistoryItem(**item) for item in page]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to retrieve chat history: {e}"
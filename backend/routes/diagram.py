@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from diagram.agent import DiagramOrchestrator
-import core.state as state
 
 router = APIRouter()
 
+# Clients and database handles are shared, so one orchestrator serves all requests
+orchestrator = DiagramOrchestrator()
+
 
 class DiagramResponse(BaseModel):
     graph_script: str
@@ -16,7 +18,6 @@ def generate_diagram(repo_id: int):
     Generates a Mermaid graph script for the file structure of a given repository.
     """
     try:
-        orchestrator = DiagramOrchestrator()
         # global state to indicate if a process is ongoing
         # if not state.agent_ready and state.last_processed_repo_id is None:
         #     if state.agent_error:
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Literal
+from datetime import datetime
+
+from core.config import settings
+from db.job_db import JobManager
+
+router = APIRouter()
+
+
+class JobRequest(BaseModel):
+    url: str
+
+
+class JobInfo(BaseModel):
+    id: int
+    repo_url: str
+    status: str
+    stage: Optional[str] = None
+    progress: Dict[str, Any] = {}
+    repo_id: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+job_manager = JobManager(
+    settings.repo_db_path,
+    stale_after_seconds=settings.job_stale_after_seconds,
+    max_attempts=settings.job_max_attempts,
+)
+
+
+# Queue a repository for ingestion
+@router.post("/jobs", response_model=JobInfo, status_code=202)
+def create_job(req: JobRequest):
+    """Queue an ingestion job; an active job for the same URL is reused."""
+    return job_manager.enqueue(req.url)
+
+
+@router.get("/jobs", response_model=List[JobInfo])
+def list_jobs(
+    status: Optional[Literal["queued", "running", "succeeded", "failed"]] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """List the most recent ingestion jobs, newest first."""
+    return job_manager.list_jobs(status, limit)
+
+
+@router.get("/jobs/{job_id}", response_model=JobInfo)
+def get_job(job_id: int):
+    """Get the status and per-stage progress of one ingestion job."""
+    job = job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
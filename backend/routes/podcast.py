@@ -1,23 +1,23 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from podcast.agent import PodcastOrchestrator
-import core.state as state
 
 
 router = APIRouter()
 
+# Clients and database handles are shared, so one orchestrator serves all requests
+orchestrator = PodcastOrchestrator()
+
 
 class PodcastResponse(BaseModel):
     script: str
 
 
 @router.post("/podcast/{repo_id}", response_model=PodcastResponse)
-async def generate_podcast(repo_id: int):
+def generate_podcast(repo_id: int):
     """
     Generates a podcast script for a given repository ID.
     """
-    orchestrator = PodcastOrchestrator()
-
     # global state to indicate if a process is ongoing
     # if not state.agent_ready and state.last_processed_repo_id is None:
     #     if state.agent_error:
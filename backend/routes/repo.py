@@ -1,5 +1,5 @@
 # from fastapi import APIRouter, BackgroundTasks, HTTPException
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import json
@@ -34,20 +34,35 @@ github_agent = get_agent()
 
 # Get all Repo Info from DB
 @router.get("/get-all-repos", response_model=List[RepoInfo])
-def get_all_repos():
-    """Get a list of all repositories from the database."""
-    repos = github_agent.repo_manager.list_repositories()
-    return [
-        RepoInfo(id=r[0], repo_url=r[1], collection_name=r[2], created_at=r[3])
-        for r in repos
-    ]
+def get_all_repos(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    before: Optional[int] = None,
+    owner: Optional[str] = None,
+    min_stars: Optional[int] = None,
+    updated_since: Optional[datetime] = None,
+):
+    """
+    List repositories from the database, newest first, one page at a time.
+    When more match, X-Next-Cursor holds the `before` value of the next page.
+    """
+    repos, has_more = github_agent.repo_manager.list_repository_page(
+        limit=limit,
+        before=before,
+        owner=owner,
+        min_stars=min_stars,
+        updated_since=updated_since,
+    )
+    if has_more:
+        response.headers["X-Next-Cursor"] = str(repos[-1]["id"])
+    return [RepoInfo(**repo) for repo in repos]
 
 
 # Fetch Repo Info from DB using Repo ID
 @router.get("/repo/{repo_id}", response_model=RepoInfo)
 def get_repo_by_id(repo_id: int):
     """Get information for a specific repository by its ID."""
-    repo = github_agent.repo_manager.get_full_repository_by_id(repo_id)
+    repo = github_agent.repo_manager.get_full_repository_by_id(repo_id, include=())
     if not repo:
         raise HTTPException(status_code=404, detail="Repository not found")
     if repo.last_activity:
@@ -55,29 +70,23 @@ def get_repo_by_id(repo_id: int):
     return RepoInfo.model_validate(repo, from_attributes=True)
 
 
+# In-memory residency of per-repo vector DBs and knowledge bases
+@router.get("/residency/stats")
+def get_residency_stats():
+    """Resident repository count, cache hits, evictions and rebuild latency."""
+    return github_agent.resident_repos.stats()
+
+
 # fetch Repo Info from DB using URL
 @router.get("/get-repo-by-url", response_model=RepoInfo)
 def get_repo_by_url(url: str):
     """Get information for a specific repository by its URL."""
-    repo_info = github_agent.repo_manager.get_repository_by_url(url)
-    if not repo_info:
+    repo = github_agent.repo_manager.get_repository_info_by_url(url)
+    if not repo:
         raise HTTPException(status_code=404, detail="Repository not found")
-
-    repo_id, _ = repo_info
-    # We need to fetch the full record for the response model
-    full_repo_info = next(
-        (r for r in github_agent.repo_manager.list_repositories() if r[0] == repo_id),
-        None,
-    )
-    if not full_repo_info:
-        raise HTTPException(status_code=404, detail="Repository not found in full list")
-
-    return RepoInfo(
-        id=full_repo_info[0],
-        repo_url=full_repo_info[1],
-        collection_name=full_repo_info[2],
-        created_at=full_repo_info[3],
-    )
+    if repo.last_activity:
+        repo.last_activity = json.loads(repo.last_activity)
+    return RepoInfo.model_validate(repo, from_attributes=True)
 
 
 # Delete specific Repo from DB and Vector
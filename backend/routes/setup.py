@@ -1,8 +1,9 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter
 from pydantic import BaseModel
-from core.agent_singleton import get_agent
-import core.state as state
-from datetime import datetime
+from typing import Optional
+from core.resources import get_single_flight
+from db.repo_db import normalize_repo_url
+from routes.jobs import job_manager
 
 router = APIRouter()
 
@@ -14,39 +15,21 @@ class SetRepoRequest(BaseModel):
 class SetRepoResponse(BaseModel):
     success: bool
     message: str
-
-
-github_agent = get_agent()
-
-
-def setup_repo(repo_url: str):
-    """Background task to process a repository."""
-    state.processing_start_time = datetime.now()
-    success, repo_id = github_agent.process_repository(repo_url)
-
-    if success:
-        state.agent_ready = True
-        state.last_processed_repo_id = repo_id
-        state.agent_error = False
-        state.error_message = None
-    else:
-        state.agent_error = True
-        state.error_message = "Failed to process repository."
-        state.agent_ready = False
-        state.last_processed_repo_id = None
+    job_id: Optional[int] = None
 
 
 # Set Up Repo for Agent
 @router.post("/setup", response_model=SetRepoResponse)
-async def set_repo_endpoint(req: SetRepoRequest, background_tasks: BackgroundTasks):
-    state.agent_ready = False
-    state.agent_error = False
-    state.error_message = None
-    state.last_processed_repo_id = None
-
-    background_tasks.add_task(setup_repo, req.url)
+def set_repo_endpoint(req: SetRepoRequest):
+    """Queue the repository for ingestion by the worker pool."""
+    # One enqueue per repository at a time, so concurrent calls (from any
+    # worker process) find the same active job instead of adding another
+    job = get_single_flight().do(
+        f"setup:{normalize_repo_url(req.url)}", lambda: job_manager.enqueue(req.url)
+    )
 
     return {
         "success": True,
         "message": "Setup started. You can check status or try /chat later.",
+        "job_id": job["id"],
     }
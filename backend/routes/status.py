@@ -1,27 +1,51 @@
-from fastapi import APIRouter
-import core.state as state
+from fastapi import APIRouter, HTTPException
 from datetime import datetime
+from core.resources import get_llm_gateway
+from routes.jobs import job_manager
 
 router = APIRouter()
 
+
 @router.get("/status")
-def get_status():
-    if state.agent_error:
+def get_status(job_id: int):
+    """
+    Setup status of the ingestion job `/setup` returned. Prefer /jobs/{id}
+    for progress details.
+    """
+    job = job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job["status"] == "failed":
         return {
             "status": "error",
-            "message": state.error_message or "Setup failed",
+            "message": job["error"] or "Setup failed",
+            "job_id": job["id"],
         }
-    elif state.agent_ready:
+    elif job["status"] == "succeeded":
         return {
             "status": "ready",
-            "repo_id": state.last_processed_repo_id,
+            "repo_id": job["repo_id"],
+            "job_id": job["id"],
         }
     else:
         elapsed = None
-        if state.processing_start_time:
-            elapsed = (datetime.now() - state.processing_start_time).total_seconds()
-            
+        if job["started_at"]:
+            elapsed = (datetime.now() - job["started_at"]).total_seconds()
+
         return {
             "status": "processing",
-            "elapsed_seconds": elapsed
-        }
\ No newline at end of file
+            "elapsed_seconds": elapsed,
+            "job_id": job["id"],
+            "stage": job["stage"],
+        }
+
+
+@router.get("/llm/stats")
+def get_llm_stats(recent: int = 0):
+    """
+    LLM usage of this API process, per model: calls, retries, coalesced
+    requests, tokens and latency, plus the last `recent` calls.
+    """
+    gateway = get_llm_gateway()
+    return {"models": gateway.stats(), "recent": gateway.recent(recent)}
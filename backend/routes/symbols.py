@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import List, Optional, Literal
+
+from core.agent_singleton import get_agent
+
+router = APIRouter()
+
+
+class SymbolInfo(BaseModel):
+    name: str
+    kind: str
+    file_path: str
+    line: int
+    signature: Optional[str] = None
+
+
+class FileSummaryInfo(BaseModel):
+    file_path: str
+    summary: str
+    content_preview: str
+    functions: List[SymbolInfo]
+    classes: List[SymbolInfo]
+
+
+github_agent = get_agent()
+
+
+# Look up functions/classes by name
+@router.get("/repo/{repo_id}/symbols", response_model=List[SymbolInfo])
+def search_symbols(
+    repo_id: int,
+    q: Optional[str] = None,
+    match: Literal["exact", "prefix", "fuzzy"] = "prefix",
+    kind: Optional[Literal["function", "class"]] = None,
+    file_path: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    Search a repository's symbol table, or list it when no query is given.
+    `kind` and `file_path` filter either way.
+    """
+    if not github_agent.repo_manager.get_repository(repo_id):
+        raise HTTPException(status_code=404, detail="Repository not found")
+    if q is None:
+        return github_agent.symbol_store.list_symbols(
+            repo_id, kind, file_path, limit
+        )
+    return github_agent.find_symbols(repo_id, q, match, kind, file_path, limit)
+
+
+# Stored summary of a single file
+@router.get("/repo/{repo_id}/file-summary", response_model=FileSummaryInfo)
+def get_file_summary(repo_id: int, path: str):
+    """Get the stored summary, functions and classes of one file."""
+    code_summary = github_agent.get_file_summary(repo_id, path)
+    if code_summary is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileSummaryInfo(
+        file_path=code_summary.file_path,
+        summary=code_summary.summary,
+        content_preview=code_summary.content_preview,
+        functions=code_summary.functions,
+        classes=code_summary.classes,
+    )
@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+# Settings are read on first import: keep every test offline and out of ./data
+_data_dir = tempfile.mkdtemp(prefix="devcompass_tests_")
+os.environ.update(
+    CHROMA_DB_PATH=os.path.join(_data_dir, "chroma_db"),
+    REPO_DB_PATH=os.path.join(_data_dir, "repositories.db"),
+    SUMMARY_CACHE_DB_PATH=os.path.join(_data_dir, "summary_cache.db"),
+    LLM_BACKEND="fake",
+    SUMMARIZER_REQUESTS_PER_MINUTE="1000000",
+    SUMMARIZER_TOKENS_PER_MINUTE="1000000000",
+)
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("GITHUB_PERSONAL_ACCESS_TOKEN", "test")
@@ -0,0 +1,107 @@
+import pytest
+
+from db.chat_db import ChatHistoryManager
+from db.repo_db import RepositoryDataManager
+
+
+def make_history(tmp_path) -> ChatHistoryManager:
+    db_path = str(tmp_path / "repositories.db")
+    # The repository manager creates the tables, as it does in the app
+    repos = RepositoryDataManager(db_path)
+    repos.add_repository("https://github.com/o/one")
+    repos.add_repository("https://github.com/o/two")
+    return ChatHistoryManager(db_path)
+
+
+@pytest.fixture
+def history(tmp_path):
+    manager = make_history(tmp_path)
+    for i in range(5):
+        manager.add_chat_message(1, f"q{i}", f"answer {i}")
+    # Another repository's messages never show up
+    manager.add_chat_message(2, "other", "other")
+    return manager
+
+
+def queries(page):
+    return [row["query"] for row in page]
+
+
+def test_latest_page_is_in_chronological_order(history):
+    page, has_more = history.get_chat_page(1, limit=2)
+    assert queries(page) == ["q3", "q4"]
+    assert has_more
+
+
+def test_paging_back_reaches_the_oldest_message(history):
+    page, _ = history.get_chat_page(1, limit=2)
+    seen = queries(page)
+    while True:
+        page, has_more = history.get_chat_page(1, limit=2, before=page[0]["id"])
+        seen = queries(page) + seen
+        if not has_more:
+            break
+    assert seen == ["q0", "q1", "q2", "q3", "q4"]
+    assert queries(page) == ["q0"]
+
+
+def test_page_that_ends_exactly_at_the_oldest_message(history):
+    page, _ = history.get_chat_page(1, limit=4)
+    page, has_more = history.get_chat_page(1, limit=1, before=page[0]["id"])
+    assert queries(page) == ["q0"]
+    assert not has_more
+    page, has_more = history.get_chat_page(1, limit=1, before=page[0]["id"])
+    assert page == []
+    assert not has_more
+
+
+def test_limit_equal_to_the_history_has_no_more(history):
+    page, has_more = history.get_chat_page(1, limit=5)
+    assert queries(page) == ["q0", "q1", "q2", "q3", "q4"]
+    assert not has_more
+
+
+def test_paging_forward_from_a_cursor(history):
+    oldest, _ = history.get_chat_page(1, limit=5)
+    page, has_more = history.get_chat_page(1, limit=2, after=oldest[0]["id"])
+    assert queries(page) == ["q1", "q2"]
+    assert has_more
+    page, has_more = history.get_chat_page(1, limit=2, after=page[-1]["id"])
+    assert queries(page) == ["q3", "q4"]
+    assert not has_more
+
+
+def test_unknown_cursor_is_rejected(history):
+    with pytest.raises(ValueError):
+        history.get_chat_page(1, limit=2, before=999)
+
+
+def test_empty_history(tmp_path):
+    manager = make_history(tmp_path)
+    assert manager.get_chat_page(1, limit=10) == ([], False)
+
+
+def test_responses_truncated_in_sql(history):
+    page, _ = history.get_chat_page(1, limit=1, response_chars=3)
+    assert page[0]["response"] == "ans"
+    assert page[0]["response_truncated"]
+
+
+def test_repository_pages_cover_every_repository_once(tmp_path):
+    manager = RepositoryDataManager(str(tmp_path / "repositories.db"))
+    ids = [manager.add_repository(f"https://github.com/o/r{i}") for i in range(5)]
+    assert len(set(ids)) == 5
+
+    seen, before = [], None
+    while True:
+        page, has_more = manager.list_repository_page(limit=2, before=before)
+        seen += [row["id"] for row in page]
+        if not has_more:
+            break
+        before = page[-1]["id"]
+    assert seen == sorted(ids, reverse=True)
+
+    page, has_more = manager.list_repository_page(limit=5)
+    assert len(page) == 5 and not has_more
+    page, has_more = manager.list_repository_page(limit=2, before=min(ids))
+    assert page == [] and not has_more
@@ -0,0 +1,174 @@
+import base64
+import io
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import chat.agent as agent_module
+from benchmarks.fixtures import make_fake_repo_archive, make_fake_repo_files
+from core.config import settings
+
+REPO_URL = "https://github.com/o/r"
+
+
+def changed(filename, status="modified", previous_filename=None):
+    return SimpleNamespace(
+        filename=filename, status=status, previous_filename=previous_filename
+    )
+
+
+class FakeRepo:
+    """The parts of a PyGithub repository that ingestion uses."""
+
+    def __init__(self, files):
+        self.files = dict(files)
+        self.sha = "a" * 40
+        self.default_branch = "main"
+        self.html_url = REPO_URL
+        self.comparison = None
+        self.unreadable = set()
+
+    def get_branch(self, branch):
+        return SimpleNamespace(commit=SimpleNamespace(sha=self.sha))
+
+    def get_archive_link(self, archive_format, ref=None):
+        return f"fake://{ref}"
+
+    def compare(self, base, head):
+        if self.comparison is None:
+            raise RuntimeError(f"No comparison for {base}...{head}")
+        return self.comparison
+
+    def get_contents(self, path, ref=None):
+        if path in self.unreadable:
+            raise RuntimeError(f"Could not fetch {path}")
+        content = self.files[path]
+        return SimpleNamespace(
+            path=path,
+            content=base64.b64encode(content.encode("utf-8")).decode("ascii"),
+            size=len(content),
+            html_url=f"{REPO_URL}/blob/main/{path}",
+            type="file",
+        )
+
+
+class FakeEmbedding:
+    def embed(self, texts, batch_size=64):
+        for text in texts:
+            yield np.array([float(len(text) % 13) + 1, 1.0, 0.5])
+
+
+class FakeArchive:
+    def __init__(self, data):
+        self.raw = io.BytesIO(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def repo():
+    return FakeRepo(make_fake_repo_files(n_files=12, n_dirs=3))
+
+
+@pytest.fixture
+def assistant(tmp_path, repo, monkeypatch):
+    monkeypatch.setattr(
+        agent_module,
+        "download_repo_archive",
+        lambda url, timeout=60: FakeArchive(make_fake_repo_archive(repo.files)),
+    )
+    assistant = agent_module.GitHubRepoAssistant(
+        chroma_path=str(tmp_path / "chroma"),
+        repo_db_path=str(tmp_path / "repositories.db"),
+    )
+    assistant.get_github_repo = lambda url: repo
+    assistant.fetch_github_metadata = lambda url: {"name": "r", "owner": "o"}
+    assistant.indexer._model = FakeEmbedding()
+    return assistant
+
+
+def test_changed_files_from_compare(assistant, repo):
+    repo.comparison = SimpleNamespace(
+        status="ahead",
+        files=[
+            changed("src/new.py", "added"),
+            changed("src/edited.py"),
+            changed("src/gone.py", "removed"),
+            changed("src/renamed.py", "renamed", previous_filename="src/old.py"),
+            changed("README.md"),
+            changed("notes.txt", "removed"),
+        ],
+    )
+    upserted, removed = assistant.get_changed_files(repo, "a" * 40, "b" * 40)
+    assert upserted == {"src/new.py", "src/edited.py", "src/renamed.py"}
+    assert removed == {"src/gone.py", "src/old.py"}
+
+
+@pytest.mark.parametrize("status", ["diverged", "behind"])
+def test_rewritten_history_needs_a_rebuild(assistant, repo, status):
+    repo.comparison = SimpleNamespace(status=status, files=[changed("a.py")])
+    assert assistant.get_changed_files(repo, "a" * 40, "b" * 40) is None
+
+
+def test_truncated_file_list_needs_a_rebuild(assistant, repo):
+    files = [changed(f"f{i}.py") for i in range(settings.compare_max_files)]
+    repo.comparison = SimpleNamespace(status="ahead", files=files)
+    assert assistant.get_changed_files(repo, "a" * 40, "b" * 40) is None
+
+
+def test_failed_compare_needs_a_rebuild(assistant, repo):
+    assert assistant.get_changed_files(repo, "a" * 40, "b" * 40) is None
+
+
+def test_first_ingestion_records_the_head_commit(assistant, repo):
+    assert assistant.process_repository(REPO_URL) == (True, 1)
+    assert assistant.repo_manager.get_last_commit_sha(1) == repo.sha
+
+
+def test_incremental_update_moves_to_the_new_head(assistant, repo):
+    assistant.process_repository(REPO_URL)
+    path = next(iter(repo.files))
+    repo.files[path] += "\ndef added_later():\n    return 1\n"
+    repo.sha = "b" * 40
+    repo.comparison = SimpleNamespace(status="ahead", files=[changed(path)])
+
+    assert assistant.process_repository(REPO_URL) == (True, 1)
+    assert assistant.repo_manager.get_last_commit_sha(1) == "b" * 40
+    names = [f["name"] for f in assistant.symbol_store.list_symbols(1, file_path=path)]
+    assert "added_later" in names
+
+
+def test_unfetched_changes_keep_the_old_commit(assistant, repo):
+    assistant.process_repository(REPO_URL)
+    path = next(iter(repo.files))
+    repo.unreadable.add(path)
+    repo.sha = "b" * 40
+    repo.comparison = SimpleNamespace(status="ahead", files=[changed(path)])
+
+    assert assistant.process_repository(REPO_URL) == (True, 1)
+    # The next sync diffs from the old commit again and retries the file
+    assert assistant.repo_manager.get_last_commit_sha(1) == "a" * 40
+
+
+def test_interrupted_rebuild_forgets_the_old_commit(assistant, repo):
+    assistant.process_repository(REPO_URL)
+    repo.sha = "b" * 40  # No comparison: the diff can't be trusted
+
+    def interrupted(url, ref=None):
+        yield from ()
+        raise RuntimeError("network down")
+
+    assistant.iter_repo_files = interrupted
+    ok, _ = assistant.process_repository(REPO_URL)
+    assert not ok
+    assert assistant.repo_manager.get_last_commit_sha(1) is None
+
+    # The next sync rebuilds again instead of diffing from "aaa..."
+    del assistant.iter_repo_files
+    assert assistant.process_repository(REPO_URL) == (True, 1)
+    assert assistant.repo_manager.get_last_commit_sha(1) == "b" * 40
@@ -0,0 +1,65 @@
+from core.tokens import PromptBudget, context_window, estimate_tokens
+
+MODEL = "llama3-8b-8192"
+
+
+def lines(count: int) -> str:
+    return "\n".join(f"line {i}: some code = value_{i} + other" for i in range(count))
+
+
+def test_available_leaves_room_for_completion_and_margin():
+    budget = PromptBudget(MODEL, max_completion_tokens=1000)
+    assert budget.available == int(context_window(MODEL) * 0.95) - 1000
+
+
+def test_available_is_capped_and_never_negative():
+    assert PromptBudget(MODEL, 1000, max_prompt_tokens=500).available == 500
+    assert PromptBudget(MODEL, 100000).available == 0
+
+
+def test_fit_keeps_text_within_budget():
+    budget = PromptBudget(MODEL, 256)
+    text = lines(50)
+    assert budget.fit(text, estimate_tokens(text)) == text
+
+
+def test_fit_cuts_at_a_line_break_and_marks_the_cut():
+    budget = PromptBudget(MODEL, 256)
+    text = lines(200)
+    fitted = budget.fit(text, 100)
+    assert estimate_tokens(fitted) <= 100
+    assert fitted.endswith("\n...")
+    kept = fitted[: -len("\n...")]
+    assert text.startswith(kept)
+    assert text[len(kept)] == "\n"
+
+
+def test_fit_to_nothing():
+    budget = PromptBudget(MODEL, 256)
+    assert budget.fit(lines(10), 0) == ""
+    assert budget.fit(lines(10), -5) == ""
+
+
+def test_allocate_fits_everything_beside_the_fixed_text():
+    budget = PromptBudget(MODEL, 256, max_prompt_tokens=300)
+    fixed = "Summarize this file."
+    parts = budget.allocate(fixed, [(lines(100), 1.0), (lines(100), 3.0)])
+    used = sum(estimate_tokens(part) for part in parts)
+    assert used <= budget.available - estimate_tokens(fixed)
+    # The heavier part gets the larger share
+    assert estimate_tokens(parts[1]) > estimate_tokens(parts[0])
+
+
+def test_allocate_gives_what_short_parts_leave_to_the_others():
+    budget = PromptBudget(MODEL, 256, max_prompt_tokens=300)
+    short = "metadata: small"
+    parts = budget.allocate("", [(short, 1.0), (lines(100), 1.0)])
+    assert parts[0] == short
+    remaining = budget.available - estimate_tokens(short)
+    assert estimate_tokens(parts[1]) > remaining // 2
+    assert estimate_tokens(parts[1]) <= remaining
+
+
+def test_allocate_with_no_room_left():
+    budget = PromptBudget(MODEL, 256, max_prompt_tokens=10)
+    assert budget.allocate(lines(20), [(lines(5), 1.0)]) == [""]
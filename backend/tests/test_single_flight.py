@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from core.shared_store import MemorySharedStore
+from core.single_flight import LEASE_PREFIX, SingleFlight
+
+
+def make_flight(store=None, **kwargs) -> SingleFlight:
+    kwargs.setdefault("poll_seconds", 0.01)
+    return SingleFlight(store or MemorySharedStore(), **kwargs)
+
+
+def test_runs_and_releases_the_lease():
+    store = MemorySharedStore()
+    assert make_flight(store).do("k", lambda: 42) == 42
+    assert store.get(LEASE_PREFIX + "k") is None
+
+
+def test_concurrent_callers_in_a_process_share_one_call():
+    flight = make_flight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+    follower.start()
+    release.set()
+    leader.join()
+    follower.join()
+    assert results == ["done", "done"]
+    assert len(calls) == 1
+
+
+def test_takes_over_once_a_crashed_holders_lease_expires():
+    store = MemorySharedStore()
+    # Another process took the lease and died without releasing it
+    store.add(LEASE_PREFIX + "k", "crashed", ttl=0.2)
+    flight = make_flight(store, lease_seconds=5.0, wait_seconds=5.0)
+
+    start = time.monotonic()
+    assert flight.do("k", lambda: "mine", check=lambda: None) == "mine"
+    assert 0.2 <= time.monotonic() - start < 2.0
+    assert store.get(LEASE_PREFIX + "k") is None
+
+
+def test_uses_the_result_stored_by_the_lease_holder():
+    store = MemorySharedStore()
+    store.add(LEASE_PREFIX + "k", "other", ttl=5.0)
+    stored = {}
+    timer = threading.Timer(0.1, lambda: stored.update(result="theirs"))
+    timer.start()
+    flight = make_flight(store, wait_seconds=5.0)
+
+    result = flight.do("k", lambda: "mine", check=lambda: stored.get("result"))
+    timer.join()
+    assert result == "theirs"
+    # The other process still holds its lease
+    assert store.get(LEASE_PREFIX + "k") == "other"
+
+
+def test_gives_up_waiting_after_wait_seconds():
+    store = MemorySharedStore()
+    store.add(LEASE_PREFIX + "k", "stuck", ttl=60.0)
+    flight = make_flight(store, wait_seconds=0.1)
+
+    start = time.monotonic()
+    assert flight.do("k", lambda: "mine", check=lambda: None) == "mine"
+    assert time.monotonic() - start < 2.0
+    assert store.get(LEASE_PREFIX + "k") == "stuck"
+
+
+def test_failure_releases_the_lease_for_the_next_caller():
+    store = MemorySharedStore()
+    flight = make_flight(store)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("k", fail)
+    assert store.get(LEASE_PREFIX + "k") is None
+    assert flight.do("k", lambda: "retried") == "retried"
@@ -1,46 +1,93 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useLayoutEffect, useRef } from "react";
 import { ChatInputForm } from "../components/chatInputForm";
 import { Header } from "../components/header";
+import { Button } from "../components/ui/button";
 import { useRepo } from "../libs/RepoContext";
 
 const API_URL = "http://127.0.0.1:8000/api";
 
 interface Message {
-  id: number;
+  id: string;
   type: "user" | "agent";
   text: string;
 }
 
+// Each saved exchange becomes a question and an answer bubble
+const fromHistory = (history: any[]): Message[] =>
+  history.flatMap((item: any): Message[] => [
+    { id: `${item.id}-query`, type: "user", text: item.query },
+    { id: `${item.id}-response`, type: "agent", text: item.response },
+  ]);
+
 export const ChatPage = () => {
   const [messages, setMessages] = useState<Message[]>([]);
   const [inputValue, setInputValue] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  // The `before` cursor of the next older history page, if there is one
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
+  const scrollRef = useRef<HTMLDivElement>(null);
+  // Scroll height before older messages were prepended, to keep the view
+  const prependedFrom = useRef<number | null>(null);
+  const nextLocalId = useRef(0);
 
   const { repoId } = useRepo();
 
+  const fetchHistory = async (before?: string) => {
+    const query = before ? `?before=${before}` : "";
+    const res = await fetch(`${API_URL}/chat/${repoId}/history${query}`);
+    if (!res.ok) {
+      throw new Error("Failed to fetch history");
+    }
+    setOlderCursor(res.headers.get("X-Prev-Cursor"));
+    return fromHistory(await res.json());
+  };
+
   useEffect(() => {
+    setMessages([]);
+    setOlderCursor(null);
     if (repoId) {
-      fetch(`${API_URL}/chat/${repoId}/history`)
-        .then((res) => res.json())
-        .then((history) => {
-          const formattedHistory = history.flatMap(
-            (item: any, index: number) => [
-              { id: index * 2, type: "user", text: item.query },
-              { id: index * 2 + 1, type: "agent", text: item.response },
-            ]
-          );
-          setMessages(formattedHistory);
-        })
+      fetchHistory()
+        .then(setMessages)
         .catch((err) => console.error("Failed to fetch history", err));
     }
   }, [repoId]);
 
+  const loadOlder = async () => {
+    if (!olderCursor || isLoadingOlder) return;
+    setIsLoadingOlder(true);
+    try {
+      const older = await fetchHistory(olderCursor);
+      prependedFrom.current = scrollRef.current?.scrollHeight ?? null;
+      setMessages((prev) => [...older, ...prev]);
+    } catch (err) {
+      console.error("Failed to fetch history", err);
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
+  useLayoutEffect(() => {
+    const container = scrollRef.current;
+    if (container && prependedFrom.current !== null) {
+      container.scrollTop += container.scrollHeight - prependedFrom.current;
+      prependedFrom.current = null;
+    }
+  }, [messages]);
+
+  const handleScroll = (event: React.UIEvent<HTMLDivElement>) => {
+    if (event.currentTarget.scrollTop === 0) {
+      loadOlder();
+    }
+  };
+
   const handleSubmit = async (event: React.FormEvent) => {
     event.preventDefault();
     if (!inputValue.trim() || !repoId || isLoading) return;
 
+    const localId = nextLocalId.current++;
     const userMessage: Message = {
-      id: messages.length,
+      id: `local-${localId}-query`,
       type: "user",
       text: inputValue,
     };
@@ -49,32 +96,67 @@ export const ChatPage = () => {
     setInputValue("");
     setIsLoading(true);
 
+    const agentMessageId = `local-${localId}-response`;
+    const appendToAgentMessage = (chunk: string) =>
+      setMessages((prev) => {
+        const existing = prev.find((msg) => msg.id === agentMessageId);
+        if (!existing) {
+          return [...prev, { id: agentMessageId, type: "agent", text: chunk }];
+        }
+        return prev.map((msg) =>
+          msg.id === agentMessageId ? { ...msg, text: msg.text + chunk } : msg
+        );
+      });
+
     try {
-      const response = await fetch(`${API_URL}/chat/${repoId}`, {
+      const response = await fetch(`${API_URL}/chat/${repoId}/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ message: currentInput }),
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error("Failed to get response from agent.");
       }
 
-      const data = await response.json();
-      const agentMessage: Message = {
-        id: messages.length + 1,
-        type: "agent",
-        text: data.response,
-      };
-      setMessages((prev) => [...prev, agentMessage]);
+      // Server-sent events: "event: <name>\ndata: <json>\n\n"
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const rawEvent = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          let eventName = "message";
+          let data = "";
+          for (const line of rawEvent.split("\n")) {
+            if (line.startsWith("event: ")) eventName = line.slice(7);
+            else if (line.startsWith("data: ")) data += line.slice(6);
+          }
+          if (eventName === "token") {
+            appendToAgentMessage(JSON.parse(data).content);
+          } else if (eventName === "error") {
+            throw new Error(JSON.parse(data).detail);
+          }
+        }
+      }
     } catch (error) {
       console.error("Chat error:", error);
       const errorMessage: Message = {
-        id: messages.length + 1,
+        id: agentMessageId,
         type: "agent",
         text: "Sorry, I encountered an error. Please try again.",
       };
-      setMessages((prev) => [...prev, errorMessage]);
+      setMessages((prev) => [
+        ...prev.filter((msg) => msg.id !== agentMessageId),
+        errorMessage,
+      ]);
     } finally {
       setIsLoading(false);
     }
@@ -91,6 +173,8 @@ export const ChatPage = () => {
       <Header />
       <div className="flex-1 flex flex-col mx-4 my-2 border border-secondary rounded-lg bg-secondary/40 overflow-hidden">
         <div
+          ref={scrollRef}
+          onScroll={handleScroll}
           className="flex-1 overflow-y-auto p-4 [&::-webkit-scrollbar]:w-2
             [&::-webkit-scrollbar-track]:m-0.5
             [&::-webkit-scrollbar-track]:rounded-lg
@@ -106,6 +190,18 @@ export const ChatPage = () => {
                 </h1>
               </div>
             )}
+            {olderCursor && (
+              <div className="flex justify-center mb-4">
+                <Button
+                  variant="outline"
+                  size="sm"
+                  onClick={loadOlder}
+                  disabled={isLoadingOlder}
+                >
+                  {isLoadingOlder ? "Loading..." : "Load older messages"}
+                </Button>
+              </div>
+            )}
             <div className="space-y-4">
               {messages.map((msg) => (
                 <div
@@ -125,7 +221,8 @@ export const ChatPage = () => {
                   </div>
                 </div>
               ))}
-              {isLoading && (
+              {/* Until the first streamed token arrives */}
+              {isLoading && messages[messages.length - 1]?.type === "user" && (
                 <div className="flex justify-start">
                   <div className="p-3 rounded-lg max-w-lg bg-card border">
                     <p>Thinking...</p>
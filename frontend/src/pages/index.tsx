@@ -54,13 +54,18 @@ export function Index() {
     setInputValue(e.currentTarget.value);
   };
 
+  // Polls the setup job this page started, not whichever job is newest
   const pollStatus = (
+    jobId: number,
     resolve: (value: unknown) => void,
     reject: (reason?: any) => void
   ) => {
     const interval = setInterval(async () => {
       try {
-        const response = await fetch(`${API_URL}/status`);
+        const response = await fetch(`${API_URL}/status?job_id=${jobId}`);
+        if (!response.ok) {
+          throw new Error("Setup job not found.");
+        }
         const data = await response.json();
 
         setProcessingState(data.status);
@@ -104,7 +109,10 @@ export function Index() {
         throw new Error("Failed to start repository setup.");
       }
 
-      const repoId = await new Promise(pollStatus);
+      const { job_id: jobId } = await setupResponse.json();
+      const repoId = await new Promise((resolve, reject) =>
+        pollStatus(jobId, resolve, reject)
+      );
 
       setRepoId(String(repoId));
       setIsReady(true);